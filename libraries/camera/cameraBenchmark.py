@@ -0,0 +1,204 @@
+import sys
+import time
+import argparse
+
+from PyQt5.QtCore import QCoreApplication, QTimer, Qt
+
+from libraries.camera.cameraCapture import CAMERA_CAPTURE
+
+class BENCHMARK_CAPTURE(CAMERA_CAPTURE):
+    """
+    PURPOSE
+
+    Camera thread that measures the CPU time it uses and counts the frames it delivers.
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - args, kwargs = passed to CAMERA_CAPTURE.
+
+        RETURNS
+
+        NONE
+        """
+        CAMERA_CAPTURE.__init__(self, *args, **kwargs)
+        self.cpuTime = 0
+        self.framesDelivered = 0
+        self.cameraNewFrameSignal.connect(self.countFrame, Qt.DirectConnection)
+
+    def countFrame(self, frame, identifier, frameBuffer):
+        """
+        PURPOSE
+
+        Counts each frame sent to the GUI (runs on the camera thread).
+
+        INPUT
+
+        - frame = the QImage sent to the GUI.
+        - identifier = the camera feed number.
+        - frameBuffer = the NumPy array holding the pixels of the frame.
+
+        RETURNS
+
+        NONE
+        """
+        self.framesDelivered += 1
+
+    def run(self):
+        """
+        PURPOSE
+
+        Runs the capture loop and records the CPU time used by this thread.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        startTime = time.thread_time()
+        self.runLoop()
+        self.cpuTime = time.thread_time() - startTime
+
+    def runLoop(self):
+        """
+        PURPOSE
+
+        The capture loop being measured.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        CAMERA_CAPTURE.run(self)
+
+class BUSY_WAIT_CAPTURE(BENCHMARK_CAPTURE):
+    """
+    PURPOSE
+
+    Reproduces the original capture loop, which checked the time in a loop until 1/30 s had passed,
+    so it can be compared with the current loop.
+    """
+    def runLoop(self):
+        """
+        PURPOSE
+
+        The original busy-wait capture loop.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        elapsedTime = 0
+        previousTime = time.monotonic()
+
+        while self.runFeed:
+            self.initiateCamera()
+
+            while self.runFeed and self.initiateStatus:
+                if elapsedTime > 1/30:
+                    self.cameraFeed.grab()
+                    status, frame = self.cameraFeed.read()
+                    if status:
+                        previousTime = time.monotonic()
+                        cameraFrame, frameBuffer = self.convertFrame(frame)
+                        self.cameraNewFrameSignal.emit(cameraFrame, self.identifier, frameBuffer)
+                    else:
+                        break
+
+                elapsedTime = time.monotonic() - previousTime
+
+def runBenchmark(captureClass, feedQuantity = 3, address = "synthetic:640x360@60", resolution = (640, 360), frameRate = 30, duration = 5):
+    """
+    PURPOSE
+
+    Runs several camera threads at the same time and measures the CPU time used by each.
+
+    INPUT
+
+    - captureClass = BENCHMARK_CAPTURE or BUSY_WAIT_CAPTURE.
+    - feedQuantity = number of camera threads to run.
+    - address = camera address for every feed (a synthetic camera by default).
+    - resolution = capture resolution (width, height) of each feed.
+    - frameRate = target frame rate of each feed (0 = as fast as the camera delivers frames).
+    - duration = length of the benchmark (seconds).
+
+    RETURNS
+
+    - results = list containing the CPU usage (%) and delivered frame rate of each feed.
+    """
+    app = QCoreApplication.instance()
+    if app == None:
+        app = QCoreApplication(sys.argv)
+
+    cameraThreads = []
+    for i in range(feedQuantity):
+        cameraThread = captureClass(address, identifier = i)
+        cameraThread.setFrameRate(frameRate)
+        cameraThread.changeResolution(*resolution)
+        cameraThread.setTargetSize(*resolution)
+        cameraThreads.append(cameraThread)
+
+    startTime = time.monotonic()
+    for cameraThread in cameraThreads:
+        cameraThread.start()
+
+    QTimer.singleShot(int(1000 * duration), app.quit)
+    app.exec_()
+    elapsedTime = time.monotonic() - startTime
+
+    for cameraThread in cameraThreads:
+        cameraThread.feedStop()
+    for cameraThread in cameraThreads:
+        cameraThread.wait()
+
+    return [(100 * cameraThread.cpuTime / elapsedTime, cameraThread.framesDelivered / elapsedTime) for cameraThread in cameraThreads]
+
+def printResults(title, results):
+    """
+    PURPOSE
+
+    Prints the results of a benchmark run.
+
+    INPUT
+
+    - title = name of the capture loop that was benchmarked.
+    - results = list returned by runBenchmark.
+
+    RETURNS
+
+    NONE
+    """
+    print("\n{}".format(title))
+    for i, (cpuUsage, frameRate) in enumerate(results):
+        print("  Feed {}:  CPU {:6.1f} %   {:5.1f} FPS".format(i + 1, cpuUsage, frameRate))
+    print("  Total:   CPU {:6.1f} %".format(sum(cpuUsage for cpuUsage, _ in results)))
+
+if __name__ == '__main__':
+    # EXAMPLE: python -m libraries.camera.cameraBenchmark --feeds 3 --resolution 1920x1080 --fps 30
+    parser = argparse.ArgumentParser(description = "Compare the CPU usage of the camera capture threads.")
+    parser.add_argument('--feeds', type = int, default = 3, help = "number of simultaneous feeds")
+    parser.add_argument('--address', default = "synthetic:640x360@60", help = "camera address used by every feed")
+    parser.add_argument('--resolution', default = "640x360", help = "capture resolution of every feed")
+    parser.add_argument('--fps', type = int, default = 30, help = "target frame rate (0 = as fast as the source)")
+    parser.add_argument('--duration', type = float, default = 5, help = "length of each run (seconds)")
+    args = parser.parse_args()
+    resolution = [int(value) for value in args.resolution.split("x")]
+
+    printResults("BUSY-WAIT LOOP (ORIGINAL)", runBenchmark(BUSY_WAIT_CAPTURE, args.feeds, args.address, resolution, 30, args.duration))
+    printResults("DEADLINE LOOP", runBenchmark(BENCHMARK_CAPTURE, args.feeds, args.address, resolution, args.fps, args.duration))
@@ -1,7 +1,7 @@
 import sys
 import time
-from datetime import datetime
-from cv2 import VideoCapture, resize, cvtColor, COLOR_BGR2RGB, CAP_PROP_FRAME_WIDTH, CAP_PROP_FRAME_HEIGHT, CAP_DSHOW, CAP_FFMPEG, CAP_PROP_BUFFERSIZE
+import numpy as np
+from cv2 import VideoCapture, resize, cvtColor, COLOR_BGR2RGB, CAP_PROP_FRAME_WIDTH, CAP_PROP_FRAME_HEIGHT, CAP_DSHOW, CAP_FFMPEG, CAP_PROP_BUFFERSIZE, INTER_AREA, INTER_LINEAR, CAP_PROP_OPEN_TIMEOUT_MSEC, CAP_PROP_READ_TIMEOUT_MSEC
 from PyQt5.QtCore import pyqtSignal, QObject, pyqtSlot, QThread, QTimer, QSize, Qt
 from PyQt5.QtWidgets import (QWidget, QStyleFactory, QMainWindow, QApplication, QComboBox, 
                             QRadioButton, QVBoxLayout, QFormLayout, QGridLayout, QLabel, 
@@ -9,6 +9,13 @@ from PyQt5.QtWidgets import (QWidget, QStyleFactory, QMainWindow, QApplication,
                             QFileDialog, QGraphicsDropShadowEffect, QOpenGLWidget)
 from PyQt5.QtGui import QPixmap, QImage, QResizeEvent, QIcon, QImage, QFont, QColor, QPalette
 
+from libraries.camera.frameGrabber import FRAME_GRABBER
+from libraries.camera.feedStatistics import FEED_STATISTICS
+from libraries.camera.syntheticCamera import SYNTHETIC_CAMERA
+from libraries.camera.visionProcess import VISION_PROCESS
+from libraries.camera.visionWorker import VISION_WORKER
+from libraries.serial.linkStatistics import ROLLING_HISTOGRAM
+
 class VIEW(QWidget):
     def __init__(self, app):
         super(VIEW, self).__init__()
@@ -32,6 +39,7 @@ class VIEW(QWidget):
 
         # INITIATE CAMERA
         self.camThread = CAMERA_CAPTURE()
+        self.camThread.setTargetSize(1422, 800)
         self.camThread.cameraNewFrameSignal.connect(self.updateCameraFeed)
         self.camThread.start()
         
@@ -53,8 +61,8 @@ class VIEW(QWidget):
         self.camThread.feedStop()
         time.sleep(1)
 
-    @pyqtSlot(QPixmap)
-    def updateCameraFeed(self, frame):
+    @pyqtSlot(QImage, int, object)
+    def updateCameraFeed(self, frame, identifier, frameBuffer):
         """
         PURPOSE
 
@@ -62,14 +70,15 @@ class VIEW(QWidget):
 
         INPUT
 
-        - frame = QPixmap containing the new frame captures from the camera.
+        - frame = QImage containing the new frame captures from the camera.
+        - identifier = the identification number of the camera feed.
+        - frameBuffer = the memory the frame is stored in (the frame is copied to a pixmap before this returns).
 
         RETURNS
 
         NONE
         """
-        pixmap = frame.scaledToHeight(800)
-        self.view.setPixmap(pixmap)
+        self.view.setPixmap(QPixmap.fromImage(frame))
     
 class CAMERA_CAPTURE(QThread):
     """
@@ -77,8 +86,30 @@ class CAMERA_CAPTURE(QThread):
 
     Contains all the functions to setup and read from RTSP and USB cameras.
     """
-    # CREATE SIGNAL
-    cameraNewFrameSignal = pyqtSignal(QPixmap, int)
+    # CREATE SIGNAL (WITH THE IMAGE, THE CAMERA NUMBER AND THE NUMPY ARRAY HOLDING THE PIXELS OF THE IMAGE,
+    # WHICH MUST BE KEPT FOR AS LONG AS THE IMAGE IS USED, OR NONE IF THE IMAGE OWNS ITS PIXELS)
+    cameraNewFrameSignal = pyqtSignal(QImage, int, object)
+    cameraStatisticsSignal = pyqtSignal(int, dict)
+
+    # DATABASE
+    # MAXIMUM NUMBER OF RE-USABLE FRAME BUFFERS SHARED WITH THE GUI
+    bufferCount = 3
+    # DEFAULT CAPTURE RATE (FPS, 0 = AS FAST AS THE CAMERA DELIVERS FRAMES)
+    defaultFrameRate = 30
+    # READ RTSP FEEDS ON A GRABBER THREAD THAT ONLY KEEPS THE NEWEST FRAME
+    dropStaleFrames = True
+    # TIME TO WAIT FOR A FRAME FROM THE GRABBER THREAD BEFORE RECONNECTING (SECONDS)
+    grabTimeout = 2
+    # MAXIMUM TIME TO WAIT FOR A RTSP CAMERA TO OPEN (SECONDS)
+    openTimeout = 5
+    # TIME BETWEEN SENDING FEED STATISTICS TO THE MAIN PROGRAM (SECONDS)
+    statisticsInterval = 1
+    # RUN VISION PROCESSING TASKS ON A VISION_WORKER THREAD INSTEAD OF THE CAPTURE THREAD
+    backgroundTasks = True
+    # RUN BACKGROUND TASKS THAT SUPPORT IT IN A SEPARATE PROCESS (VISION_PROCESS) INSTEAD OF A THREAD
+    processTasks = True
+    # CAPTURE RESOLUTIONS A SECONDARY FEED CAN BE REDUCED TO, SMALLEST FIRST
+    resolutionSteps = [[256, 144], [640, 360], [1024, 576], [1280, 720], [1600, 900], [1920, 1080]]
 
     def __init__(self, address = "", identifier = 0):
         """
@@ -96,16 +127,47 @@ class CAMERA_CAPTURE(QThread):
         self.address = address
         self.identifier = identifier
         self.cameraFeed = None
+        self.initiateStatus = False
         self.runFeed = True
         self.task = None
+        self.visionWorker = None
+        # RESOLUTION SELECTED BY THE USER AND THE RESOLUTION ACTUALLY REQUESTED FROM THE CAMERA
+        self.selectedWidth = 1920
+        self.selectedHeight = 1080
         self.width = 1920      
         self.height = 1080
+        # PRIMARY FEEDS ARE ALWAYS CAPTURED AT THE SELECTED RESOLUTION
+        self.primary = False
+        self.frameRate = self.defaultFrameRate
+        self.nextFrameTime = 0
+        self.frameGrabber = None
+        # INCREMENTED EVERY TIME THE SOURCE CHANGES, SO OUT OF DATE CONNECTION ATTEMPTS CAN BE IGNORED
+        self.sourceGeneration = 0
+        self.defaultImage = QImage("graphics/no_signal.png")
+
+        # CAPTURE TO DISPLAY DELAY OF SYNTHETIC TEST FRAMES (MS)
+        self.frameLatency = ROLLING_HISTOGRAM()
+
+        # VIDEO_RECORDER THE FRAMES ARE SENT TO WHILE A MISSION IS BEING RECORDED
+        self.recorder = None
+
+        # TIME SPENT IN EACH STAGE OF THE FEED
+        self.statistics = FEED_STATISTICS()
+        self.nextStatisticsTime = 0
+
+        # SIZE OF THE WIDGET DISPLAYING THE FEED (FRAMES ARE SCALED TO FIT BEFORE BEING SENT)
+        self.targetSize = None
+
+        # RE-USABLE FRAME BUFFERS, AND THE REFERENCE COUNT OF A BUFFER THAT NOTHING ELSE IS USING
+        self.frameBuffers = []
+        self.freeReferenceCount = 0
     
     def run(self):
         """
         PURPOSE
 
         Main loop that captures camera frames and displays them on the GUI.
+        Used when the camera is run on its own thread rather than by the CAMERA_MANAGER.
 
         INPUT
 
@@ -115,61 +177,347 @@ class CAMERA_CAPTURE(QThread):
 
         NONE
         """
-        elapsedTime = 0
-        previousTime = datetime.now()
-        defaultImage = QPixmap("graphics/no_signal.png")
-
         # ATTEMPT TO CONNECT TO CAMERA EVERY 0.5 SECONDS
         while self.runFeed:
             # INITIATE CAMERA
-            self.initiateCamera()
-
-            if self.initiateStatus:
-                self.cameraFeed.set(CAP_PROP_FRAME_WIDTH, self.width)
-                self.cameraFeed.set(CAP_PROP_FRAME_HEIGHT, self.height)
+            self.openCamera()
 
             while self.runFeed and self.initiateStatus:
-                
-                # ~30 FPS CAPTURE RATE
-                if elapsedTime > 1/30:
-                    try:
-                        # CAPTURE FRAME
-                        self.cameraFeed.grab()
-                        status, frame = self.cameraFeed.read()
-
-                        # IF FRAME IS CAPTURED            
-                        if status:
-                            previousTime = datetime.now()
-                            
-                            # RUN IMAGE THROUGH VISION PROCESSING ALGORITHM
-                            if self.task != None:
-                                frame = self.task.runAlgorithm(frame)
-
-                            # CONVERT TO PIXMAP
-                            cameraFrame = self.convertFrame(frame)
-                            
-                            # SEND FRAME BACK TO MAIN PROGRAM
-                            self.cameraNewFrameSignal.emit(cameraFrame, self.identifier)
-
-                        else:
-                            # DEFAULT IMAGE
-                            self.cameraNewFrameSignal.emit(defaultImage, self.identifier)
-                            break
-                    
-                    except:
-                        pass
+                # CAPTURE AND SEND FRAME, STOP IF THE CAMERA FAILS
+                if not self.processFrame():
+                    break
 
-                elapsedTime = (datetime.now() - previousTime).total_seconds()
+                # SLEEP UNTIL THE NEXT FRAME IS DUE
+                self.waitForNextFrame()
 
+            self.closeCamera()
             QThread.msleep(500)
 
-            self.cameraNewFrameSignal.emit(defaultImage, self.identifier)
-            
+            self.emitDefaultImage()
+
+    def openCamera(self):
+        """
+        PURPOSE
+
+        Connects to the camera, applies the capture resolution and starts the grabber thread if required.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - status = True if the camera was opened.
+        """
+        self.initiateCamera()
+
+        if self.initiateStatus:
+            self.attachCamera(self.cameraFeed)
+
+        return self.initiateStatus
+
+    def attachCamera(self, cameraFeed):
+        """
+        PURPOSE
+
+        Starts capturing from a camera that has already been opened.
+
+        INPUT
+
+        - cameraFeed = the camera object returned by createCamera().
+
+        RETURNS
+
+        NONE
+        """
+        self.cameraFeed = cameraFeed
+        self.cameraFeed.set(CAP_PROP_FRAME_WIDTH, self.width)
+        self.cameraFeed.set(CAP_PROP_FRAME_HEIGHT, self.height)
+        self.nextFrameTime = time.monotonic()
+        self.startGrabber()
+        self.initiateStatus = True
+
+    def closeCamera(self):
+        """
+        PURPOSE
+
+        Stops the grabber thread and disconnects from the camera.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.initiateStatus = False
+        self.stopGrabber(release = True)
+
+    def processFrame(self):
+        """
+        PURPOSE
+
+        Captures a single frame, runs it through any vision processing task and sends it to the GUI.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - status = False if the camera failed to deliver a frame.
+        """
         try:
-            self.cameraFeed.release()
+            # CAPTURE FRAME (BLOCKS UNTIL THE CAMERA DELIVERS A FRAME)
+            status, frame = self.captureFrame()
+
+            # IF FRAME IS CAPTURED            
+            if status:
+                # SYNTHETIC TEST FRAMES CARRY THE TIME THEY WERE CAPTURED
+                captureTime = SYNTHETIC_CAMERA.readTimestamp(frame) if SYNTHETIC_CAMERA.isSyntheticAddress(self.address) else None
+
+                # RECORD THE FRAME BEFORE ANYTHING IS DRAWN ON IT
+                recorder = self.recorder
+                if recorder != None:
+                    recorder.addFrame(self.identifier, frame, self.frameRate)
+
+                self.deliverFrame(frame)
+
+                if captureTime != None:
+                    self.frameLatency.addSample(1000 * (time.monotonic() - captureTime))
+
+            else:
+                # DEFAULT IMAGE
+                self.statistics.addCount('readFailures')
+                self.emitDefaultImage()
+                return False
+        
         except:
             pass
 
+        return True
+
+    def deliverFrame(self, frame):
+        """
+        PURPOSE
+
+        Runs a frame through any vision processing task, converts it and sends it to the GUI.
+        Used for captured frames and for frames read back from a recording during a mission replay.
+
+        INPUT
+
+        - frame = the image to show.
+
+        RETURNS
+
+        NONE
+        """
+        visionWorker = self.visionWorker
+
+        # PASS IMAGE TO THE BACKGROUND VISION PROCESSING ALGORITHM AND DRAW ITS NEWEST RESULT
+        if visionWorker != None:
+            visionWorker.addFrame(frame)
+            startTime = time.perf_counter()
+            frame = visionWorker.drawResult(frame)
+            self.statistics.recordStage('overlay', time.perf_counter() - startTime)
+
+        # RUN IMAGE THROUGH VISION PROCESSING ALGORITHM
+        elif self.task != None:
+            startTime = time.perf_counter()
+            frame = self.task.runAlgorithm(frame)
+            self.statistics.recordStage('process', time.perf_counter() - startTime)
+
+        # SCALE AND CONVERT TO QIMAGE
+        startTime = time.perf_counter()
+        cameraFrame, frameBuffer = self.convertFrame(frame)
+        self.statistics.recordStage('convert', time.perf_counter() - startTime)
+        
+        # SEND FRAME BACK TO MAIN PROGRAM
+        self.cameraNewFrameSignal.emit(cameraFrame, self.identifier, frameBuffer)
+
+        self.emitStatistics()
+
+    def emitStatistics(self):
+        """
+        PURPOSE
+
+        Sends the feed statistics to the main program, at most once every statisticsInterval.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        currentTime = time.monotonic()
+
+        if currentTime >= self.nextStatisticsTime:
+            self.nextStatisticsTime = currentTime + self.statisticsInterval
+            self.cameraStatisticsSignal.emit(self.identifier, self.statistics.getSnapshot())
+
+    def emitDefaultImage(self):
+        """
+        PURPOSE
+
+        Sends the 'no signal' image to the GUI.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.cameraNewFrameSignal.emit(self.defaultImage, self.identifier, None)
+
+    def startGrabber(self):
+        """
+        PURPOSE
+
+        Starts a grabber thread for RTSP feeds, so the decoder is always drained and only the newest frame is kept.
+        USB cameras do not buffer frames, so they are read directly.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.stopGrabber()
+
+        if self.dropStaleFrames and isinstance(self.address, str):
+            self.frameGrabber = FRAME_GRABBER(self.cameraFeed, self.statistics)
+            self.frameGrabber.start()
+
+    def stopGrabber(self, release = False):
+        """
+        PURPOSE
+
+        Stops the grabber thread if one is running, waiting up to the read timeout for its current read to finish.
+
+        INPUT
+
+        - release = True to also disconnect from the camera. If the grabber is still reading, it releases the camera when the read returns.
+
+        RETURNS
+
+        NONE
+        """
+        frameGrabber = self.frameGrabber
+        self.frameGrabber = None
+
+        if frameGrabber != None:
+            if release:
+                frameGrabber.close(self.grabTimeout)
+            else:
+                frameGrabber.stop()
+                frameGrabber.join(self.grabTimeout)
+
+        elif release:
+            try:
+                self.cameraFeed.release()
+            except:
+                pass
+
+    def captureFrame(self):
+        """
+        PURPOSE
+
+        Gets the next frame, either the newest frame from the grabber thread or directly from the camera.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - status = True if a frame was captured.
+        - frame = the captured image.
+        """
+        frameGrabber = self.frameGrabber
+
+        if frameGrabber != None:
+            return frameGrabber.getLatestFrame(self.grabTimeout)
+
+        startTime = time.perf_counter()
+        status, frame = self.cameraFeed.read()
+        if status:
+            self.statistics.recordStage('decode', time.perf_counter() - startTime)
+
+        return status, frame
+
+    def waitForNextFrame(self):
+        """
+        PURPOSE
+
+        Sleeps until the next frame is due at the target frame rate.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        delay = self.scheduleNextFrame() - time.monotonic()
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def scheduleNextFrame(self):
+        """
+        PURPOSE
+
+        Calculates when the next frame is due at the target frame rate.
+        If capturing has fallen behind, the schedule restarts from now instead of trying to catch up.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - nextFrameTime = time.monotonic() value when the next frame should be captured.
+        """
+        currentTime = time.monotonic()
+
+        # NO LIMIT, THE BLOCKING READ PACES THE LOOP
+        if self.frameRate <= 0:
+            self.nextFrameTime = currentTime
+            return self.nextFrameTime
+
+        interval = 1 / self.frameRate
+        self.nextFrameTime += interval
+
+        if self.nextFrameTime < currentTime - interval:
+            self.nextFrameTime = currentTime
+
+        return self.nextFrameTime
+
+    def setFrameRate(self, frameRate):
+        """
+        PURPOSE
+
+        Changes the target capture rate of the camera feed.
+
+        INPUT
+
+        - frameRate = target frames per second (0 = as fast as the camera delivers frames).
+
+        RETURNS
+
+        NONE
+        """
+        self.frameRate = frameRate
+        self.nextFrameTime = time.monotonic()
+
     def initiateCamera(self):
         """
         PURPOSE
@@ -184,37 +532,67 @@ class CAMERA_CAPTURE(QThread):
 
         NONE
         """
-        self.initiateStatus = False
+        self.cameraFeed = self.createCamera(self.address)
+        self.initiateStatus = self.cameraFeed != None
 
-        if self.address != "":
+    def createCamera(self, address):
+        """
+        PURPOSE
+
+        Connects to a camera without changing the current camera feed.
+        This can block for several seconds for RTSP cameras, so the CAMERA_MANAGER calls it on a separate thread.
+
+        INPUT
+
+        - address = the source, either an integer for USB cameras, or a RTSP link for IP cameras.
+
+        RETURNS
+
+        - cameraFeed = the opened camera object, or None if the camera could not be opened.
+        """
+        cameraFeed = None
+
+        if address != "":
 
             # CHECK IF ADDRESS IS INTEGER OR STRING
-            addressType = isinstance(self.address, str)
-
-            # RTSP CAMERA
-            if addressType:
-                try:
-                    self.cameraFeed = VideoCapture(self.address, CAP_FFMPEG)
-                    self.cameraFeed.set(CAP_PROP_BUFFERSIZE, 3)
-                    self.initiateStatus = True
-                except:
-                    self.initiateStatus = False
-
-            # USB CAMERA
-            else:
-                try:
-                    self.cameraFeed = VideoCapture(self.address, CAP_DSHOW)
-                    
-                    self.cameraFeed.set(CAP_PROP_BUFFERSIZE, 3)
-                    self.initiateStatus = True
-                except:
-                    self.initiateStatus = False
+            addressType = isinstance(address, str)
+
+            try:
+                # SYNTHETIC TEST CAMERA
+                if SYNTHETIC_CAMERA.isSyntheticAddress(address):
+                    cameraFeed = SYNTHETIC_CAMERA.fromAddress(address)
+
+                # RTSP CAMERA
+                elif addressType:
+                    try:
+                        # LIMIT HOW LONG OPENING AND READING THE STREAM CAN BLOCK
+                        cameraFeed = VideoCapture(address, CAP_FFMPEG, [CAP_PROP_OPEN_TIMEOUT_MSEC, int(1000 * self.openTimeout),
+                                                                        CAP_PROP_READ_TIMEOUT_MSEC, int(1000 * self.grabTimeout)])
+                    except:
+                        cameraFeed = VideoCapture(address, CAP_FFMPEG)
+                    cameraFeed.set(CAP_PROP_BUFFERSIZE, 3)
+
+                # USB CAMERA
+                else:
+                    cameraFeed = VideoCapture(address, CAP_DSHOW)
+                    cameraFeed.set(CAP_PROP_BUFFERSIZE, 3)
+
+                # CHECK THE CAMERA ACTUALLY OPENED
+                if not cameraFeed.isOpened():
+                    cameraFeed.release()
+                    cameraFeed = None
+            except:
+                cameraFeed = None
+
+        return cameraFeed
 
     def convertFrame(self, frame):
         """
         PURPOSE
 
-        Converts the cv2 image into a pixmap.
+        Scales the cv2 image to fit the display widget, converts it to RGB and wraps it in a QImage.
+        The image is written into a re-usable buffer that the GUI has finished with,
+        so memory is not normally allocated for each frame.
 
         INPUT
 
@@ -222,24 +600,114 @@ class CAMERA_CAPTURE(QThread):
 
         RETURNS
 
-        - cameraFrame = the converted pixmap image.
+        - cameraFrame = QImage that shares the memory of the frame buffer.
+        - frameBuffer = the NumPy array holding the pixels, which must be kept for as long as the QImage is used
+                        (the QImage does not keep it alive).
+        """
+        # GET FRAME DIMENSIONS AFTER SCALING TO FIT THE DISPLAY WIDGET
+        frameHeight, frameWidth = frame.shape[:2]
+        width, height = self.getDisplaySize(frameWidth, frameHeight)
+
+        # GET NEXT FREE BUFFER
+        frameBuffer = self.getFrameBuffer(width, height)
+
+        # SCALE BEFORE CONVERTING COLOUR SO THE CONVERSION RUNS ON FEWER PIXELS
+        if (width, height) != (frameWidth, frameHeight):
+            interpolation = INTER_AREA if width < frameWidth else INTER_LINEAR
+            resize(frame, (width, height), dst = frameBuffer, interpolation = interpolation)
+            cvtColor(frameBuffer, COLOR_BGR2RGB, dst = frameBuffer)
+        else:
+            cvtColor(frame, COLOR_BGR2RGB, dst = frameBuffer)
+
+        # GENERATE QIMAGE WITHOUT COPYING THE PIXEL DATA
+        cameraFrame = QImage(frameBuffer.data, width, height, frameBuffer.strides[0], QImage.Format_RGB888)
+
+        return cameraFrame, frameBuffer
+
+    def getDisplaySize(self, frameWidth, frameHeight):
+        """
+        PURPOSE
+
+        Calculates the largest size that fits inside the display widget whilst keeping the aspect ratio of the frame.
+
+        INPUT
+
+        - frameWidth = width of the captured frame in pixels.
+        - frameHeight = height of the captured frame in pixels.
+
+        RETURNS
+
+        - width = width of the displayed frame in pixels.
+        - height = height of the displayed frame in pixels.
+        """
+        if self.targetSize == None:
+            return frameWidth, frameHeight
+
+        targetWidth, targetHeight = self.targetSize
+        scale = min(targetWidth / frameWidth, targetHeight / frameHeight)
+
+        return max(1, int(frameWidth * scale)), max(1, int(frameHeight * scale))
+
+    def getFrameBuffer(self, width, height):
+        """
+        PURPOSE
+
+        Returns a buffer that nothing else is using. Buffers sent to the GUI stay in use for as long as the GUI
+        holds on to them (such as a frame waiting to be drawn or being drawn), so a frame is never overwritten
+        while it is shown. If every buffer is in use a new one is allocated.
+
+        INPUT
+
+        - width = width of the frame in pixels.
+        - height = height of the frame in pixels.
+
+        RETURNS
+
+        - frameBuffer = NumPy array to write the frame into.
         """
-        # CONVERT TO RGB COLOUR
-        cameraFrame = cvtColor(frame, COLOR_BGR2RGB)
-        # GET FRAME DIMENSIONS AND NUMBER OF COLOUR CHANNELS
-        height, width, _ = cameraFrame.shape
-        # GENERATE QIMAGE
-        cameraFrame = QImage(cameraFrame.data, width, height, cameraFrame.strides[0], QImage.Format_RGB888)
-        # CONVERT TO PIXMAP
-        cameraFrame = QPixmap.fromImage(cameraFrame)
+        # BUFFERS OF THE OLD SIZE ARE DROPPED, AND FREED ONCE THE GUI HAS FINISHED WITH THEM
+        if len(self.frameBuffers) > 0 and self.frameBuffers[0].shape != (height, width, 3):
+            self.frameBuffers = []
+
+        # RE-USE A BUFFER THAT IS ONLY REFERENCED BY THIS LIST
+        for index in range(len(self.frameBuffers)):
+            if sys.getrefcount(self.frameBuffers[index]) <= self.freeReferenceCount:
+                return self.frameBuffers[index]
+
+        # ALL BUFFERS ARE IN USE, SO ALLOCATE ANOTHER (ONLY KEPT FOR RE-USE IF THERE ARE FEWER THAN bufferCount)
+        if len(self.frameBuffers) >= self.bufferCount:
+            return np.empty((height, width, 3), dtype = np.uint8)
+
+        self.frameBuffers.append(np.empty((height, width, 3), dtype = np.uint8))
+        self.freeReferenceCount = sys.getrefcount(self.frameBuffers[-1])
+
+        return self.frameBuffers[-1]
+
+    def setTargetSize(self, width, height):
+        """
+        PURPOSE
+
+        Sets the size of the widget displaying the camera feed, so frames can be scaled on the capture thread.
+
+        INPUT
 
-        return cameraFrame
+        - width = width of the widget in pixels.
+        - height = height of the widget in pixels.
+
+        RETURNS
+
+        NONE
+        """
+        if width > 0 and height > 0:
+            self.targetSize = (width, height)
+            self.negotiateResolution()
 
     def changeResolution(self, width, height):
         """
         PURPOSE
 
-        Changes the capture resolution of the camera frames.
+        Changes the capture resolution selected for the camera frames.
+        Secondary feeds may be captured at a lower resolution if they are displayed smaller than this.
 
         INPUT
 
@@ -250,6 +718,96 @@ class CAMERA_CAPTURE(QThread):
 
         NONE
         """
+        self.selectedWidth = width
+        self.selectedHeight = height
+        self.negotiateResolution()
+
+    def setPrimary(self, status):
+        """
+        PURPOSE
+
+        Sets whether the feed is shown in the main display.
+
+        INPUT
+
+        - status = True if the feed is the primary feed, False if it is shown in a secondary tile.
+
+        RETURNS
+
+        NONE
+        """
+        self.primary = status
+        self.negotiateResolution()
+
+    def setRecorder(self, recorder):
+        """
+        PURPOSE
+
+        Starts or stops sending captured frames to a video recorder.
+
+        INPUT
+
+        - recorder = the VIDEO_RECORDER to send frames to, or None to stop recording.
+
+        RETURNS
+
+        NONE
+        """
+        self.recorder = recorder
+        self.negotiateResolution()
+
+    def getCaptureResolution(self):
+        """
+        PURPOSE
+
+        Works out which resolution to request from the camera.
+        The primary feed, and any feed running a vision processing task or being recorded, use the selected resolution.
+        Secondary feeds use the smallest resolution step that still covers the widget they are displayed in,
+        so pixels that would only be thrown away when scaling are never decoded.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - width = width of the frame in pixels.
+        - height = height of the frame in pixels.
+        """
+        if self.primary or self.task != None or self.recorder != None or self.targetSize == None:
+            return self.selectedWidth, self.selectedHeight
+
+        targetWidth, targetHeight = self.targetSize
+
+        for width, height in self.resolutionSteps:
+            if width >= self.selectedWidth or height >= self.selectedHeight:
+                break
+            if width >= targetWidth or height >= targetHeight:
+                return width, height
+
+        return self.selectedWidth, self.selectedHeight
+
+    def negotiateResolution(self):
+        """
+        PURPOSE
+
+        Requests a new capture resolution from the camera if the feed's role, display size or selected resolution
+        means a different resolution is needed. Cameras that cannot change resolution (such as most RTSP streams)
+        keep sending their own resolution, which is then scaled to the display size as before.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        width, height = self.getCaptureResolution()
+
+        if (width, height) == (self.width, self.height):
+            return
+
         self.width = width
         self.height = height
 
@@ -276,13 +834,11 @@ class CAMERA_CAPTURE(QThread):
         """
         if address != self.address:
             self.address = address
+            self.sourceGeneration += 1
             self.initiateStatus = False
-        
-            try:
-                # DISCONNECT FROM CAMERA
-                self.cameraFeed.release()
-            except:
-                pass
+
+            # DISCONNECT FROM CAMERA
+            self.stopGrabber(release = True)
 
     def feedStop(self):
         """
@@ -300,6 +856,11 @@ class CAMERA_CAPTURE(QThread):
         """
         self.runFeed = False
 
+        # WAKE THE CAMERA THREAD, WHICH CLOSES THE GRABBER AND CAMERA ITSELF
+        frameGrabber = self.frameGrabber
+        if frameGrabber != None:
+            frameGrabber.stop()
+
     def feedBegin(self):
         """
         PURPOSE
@@ -316,7 +877,7 @@ class CAMERA_CAPTURE(QThread):
         """
         self.runFeed = True
 
-    def processImage(self, task):
+    def processImage(self, task, frameInterval = None, maxResultAge = None, analysisScale = None):
         """
         PURPOSE
 
@@ -325,13 +886,28 @@ class CAMERA_CAPTURE(QThread):
         INPUT
 
         - task = the class object of the processing algorithm
+        - frameInterval = only process every nth frame (background tasks only, if not given the VISION_WORKER default is used).
+        - maxResultAge = results older than this are not drawn (seconds, background tasks only).
+        - analysisScale = size frames are analysed at as a fraction of the captured size (background tasks only,
+                          if not given the task's own analysisScale is used).
 
         RETURNS
 
         NONE
         """
+        self.stopVisionWorker()
         self.task = task
 
+        if self.backgroundTasks:
+            if self.processTasks and VISION_PROCESS.supportsTask(task):
+                visionWorker = VISION_PROCESS(task, self.statistics, frameInterval, maxResultAge, analysisScale)
+            else:
+                visionWorker = VISION_WORKER(task, self.statistics, frameInterval, maxResultAge, analysisScale)
+            visionWorker.start()
+            self.visionWorker = visionWorker
+
+        self.negotiateResolution()
+
     def stopProcessing(self):
         """
         PURPOSE
@@ -346,7 +922,30 @@ class CAMERA_CAPTURE(QThread):
 
         NONE
         """
+        self.stopVisionWorker()
         self.task = None
+        self.negotiateResolution()
+
+    def stopVisionWorker(self):
+        """
+        PURPOSE
+
+        Stops the thread or child process running the vision processing task in the background, if there is one,
+        and waits for it to end.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        visionWorker = self.visionWorker
+        self.visionWorker = None
+
+        if visionWorker != None:
+            visionWorker.stop()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,786 @@
+import random
+from threading import Thread, Lock, Event, Condition
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QThread, Qt, pyqtSignal
+
+from libraries.camera.cameraCapture import CAMERA_CAPTURE
+from libraries.camera.videoRecorder import VIDEO_RECORDER
+
+class CAMERA_MANAGER(QThread):
+    """
+    PURPOSE
+
+    Owns every camera feed and captures them all from a single scheduler thread and a bounded pool of workers,
+    instead of running one thread per feed. The pool size caps how many frames are captured and converted
+    at the same time, so adding more cameras does not add more threads.
+
+    Cameras are opened on their own short-lived threads with a timeout, so a dead RTSP camera never blocks
+    the scheduler or the workers, and changing the source abandons any connection attempt still in progress.
+    Feeds that fail to connect are retried with an exponential backoff (with random jitter) that is shared
+    between feeds using the same address. Feeds are only captured while they are enabled and have at least one subscriber.
+
+    FEED STATUS
+
+    - 'off' = the feed is disabled, has no subscribers or has no source address.
+    - 'connecting' = the camera is being opened.
+    - 'live' = frames are being received.
+    - 'stalled' = the camera stopped delivering frames and will be reconnected.
+    - 'failed' = the camera could not be opened, waiting to try again.
+    """
+    # SIGNAL EMITTED WHEN THE STATUS OF A FEED CHANGES (IDENTIFIER, STATUS)
+    cameraStatusSignal = pyqtSignal(int, str)
+
+    # DATABASE
+    # MAXIMUM NUMBER OF FRAMES CAPTURED AT THE SAME TIME
+    maxWorkers = 3
+    # RECONNECT DELAYS (SECONDS)
+    initialBackoff = 0.5
+    maximumBackoff = 8
+    backoffFactor = 2
+    # RANDOM VARIATION OF EACH RECONNECT DELAY (FRACTION OF THE DELAY)
+    backoffJitter = 0.3
+    # GIVE UP ON A CONNECTION ATTEMPT AFTER THIS LONG (SECONDS)
+    openTimeout = 5
+    # LONGEST TIME THE SCHEDULER SLEEPS WITHOUT CHECKING THE FEEDS (SECONDS)
+    schedulerInterval = 0.1
+    # LONGEST TIME TO WAIT FOR WORKERS TO FINISH READING WHEN STOPPING (SECONDS, LONGER THAN THE CAMERA READ TIMEOUT)
+    stopTimeout = 3
+
+    def __init__(self, maxWorkers = None):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - maxWorkers = maximum number of frames captured at the same time (if not given the default is used).
+
+        RETURNS
+
+        NONE
+        """
+        QThread.__init__(self)
+
+        if maxWorkers != None:
+            self.maxWorkers = maxWorkers
+
+        self.feeds = []
+        self.runManager = False
+        self.lock = Lock()
+        self.wakeEvent = Event()
+        self.workerPool = None
+
+        # FEEDS CURRENTLY BEING SERVICED BY A WORKER (THE CONDITION IS NOTIFIED WHEN A WORKER FINISHES)
+        self.busyFeeds = set()
+        self.workerCondition = Condition(self.lock)
+
+        # NEW ADDRESSES FOR BUSY FEEDS, APPLIED BY THE WORKER ONCE IT HAS FINISHED WITH THE CAMERA
+        self.pendingSources = {}
+
+        # FEED STATE (ENABLED, SUBSCRIBERS, NEXT RETRY TIME, STATUS)
+        self.enabledFeeds = {}
+        self.subscribers = {}
+        self.retryTimes = {}
+        self.feedStatus = {}
+
+        # CONNECTION ATTEMPTS IN PROGRESS (SOURCE GENERATION, START TIME)
+        self.openAttempts = {}
+
+        # RECONNECT FAILURES AND NEXT RETRY TIME FOR EACH ADDRESS, SHARED BETWEEN FEEDS
+        self.addressFailures = {}
+
+        # MISSION VIDEO RECORDING
+        self.recorder = None
+
+    def addFeed(self, address = ""):
+        """
+        PURPOSE
+
+        Creates a new camera feed.
+
+        INPUT
+
+        - address = address of the camera feed.
+
+        RETURNS
+
+        - identifier = the number of the new camera feed.
+        """
+        with self.lock:
+            identifier = len(self.feeds)
+            cameraFeed = CAMERA_CAPTURE(address, identifier)
+            self.feeds.append(cameraFeed)
+            self.enabledFeeds[identifier] = True
+            self.subscribers[identifier] = []
+            self.retryTimes[identifier] = 0
+            self.feedStatus[identifier] = 'off'
+
+        self.wakeEvent.set()
+
+        return identifier
+
+    def getFeed(self, identifier):
+        """
+        PURPOSE
+
+        Returns the camera feed object, for example to attach a vision processing task.
+
+        INPUT
+
+        - identifier = the camera feed number.
+
+        RETURNS
+
+        - cameraFeed = the CAMERA_CAPTURE object.
+        """
+        return self.feeds[identifier]
+
+    def subscribe(self, identifier, slot, connectionType = Qt.AutoConnection):
+        """
+        PURPOSE
+
+        Connects a function to receive the frames of a camera feed.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - slot = function called with (QImage, identifier, frame buffer) for each new frame (the frame buffer must be
+                 kept for as long as the QImage is used).
+        - connectionType = Qt connection type (Qt.DirectConnection calls the slot on the capture thread).
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.feeds[identifier].cameraNewFrameSignal.connect(slot, connectionType)
+            self.subscribers[identifier].append(slot)
+
+        self.wakeEvent.set()
+
+    def unsubscribe(self, identifier, slot):
+        """
+        PURPOSE
+
+        Stops a function receiving the frames of a camera feed. A feed with no subscribers is not captured.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - slot = the function passed to subscribe().
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            if slot in self.subscribers[identifier]:
+                self.subscribers[identifier].remove(slot)
+                try:
+                    self.feeds[identifier].cameraNewFrameSignal.disconnect(slot)
+                except:
+                    pass
+
+        self.checkFeedActive(identifier)
+
+    def enableFeed(self, identifier, status):
+        """
+        PURPOSE
+
+        Turns a camera feed on or off.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - status = True to capture the feed, False to stop capturing it.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.enabledFeeds[identifier] = status
+            self.retryTimes[identifier] = 0
+
+        self.checkFeedActive(identifier)
+        self.wakeEvent.set()
+
+    def isFeedActive(self, identifier):
+        """
+        PURPOSE
+
+        Checks whether a camera feed should be captured.
+
+        INPUT
+
+        - identifier = the camera feed number.
+
+        RETURNS
+
+        - status = True if the feed is enabled, has subscribers and has a source address.
+        """
+        return self.runManager and self.enabledFeeds[identifier] and len(self.subscribers[identifier]) > 0 and self.feeds[identifier].address != ""
+
+    def checkFeedActive(self, identifier):
+        """
+        PURPOSE
+
+        Disconnects a camera that should no longer be captured.
+
+        INPUT
+
+        - identifier = the camera feed number.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            if self.isFeedActive(identifier) or identifier in self.busyFeeds:
+                return
+            cameraFeed = self.feeds[identifier]
+            self.openAttempts.pop(identifier, None)
+
+        cameraFeed.closeCamera()
+        cameraFeed.emitDefaultImage()
+        self.setStatus(identifier, 'off')
+
+    def changeSource(self, identifier, address):
+        """
+        PURPOSE
+
+        Changes the address of a camera feed.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - address = the source, either an integer for USB cameras, or a RTSP link for IP cameras.
+
+        RETURNS
+
+        NONE
+        """
+        cameraFeed = self.feeds[identifier]
+
+        with self.lock:
+            changed = address != self.pendingSources.get(identifier, cameraFeed.address)
+
+            # ABANDON ANY CONNECTION ATTEMPT TO THE OLD SOURCE
+            if changed:
+                # A WORKER IS STILL READING THE CAMERA, SO LEAVE IT TO THE WORKER TO RELEASE IT
+                if identifier in self.busyFeeds:
+                    self.pendingSources[identifier] = address
+                else:
+                    cameraFeed.changeSource(address)
+                self.openAttempts.pop(identifier, None)
+                self.retryTimes[identifier] = self.getRetryTime(address)
+
+        if changed:
+            cameraFeed.emitDefaultImage()
+
+            if self.isFeedActive(identifier):
+                self.setStatus(identifier, 'connecting')
+            else:
+                self.checkFeedActive(identifier)
+
+        self.wakeEvent.set()
+
+    def changeResolution(self, identifier, width, height):
+        """
+        PURPOSE
+
+        Changes the capture resolution of a camera feed.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - width = width of the frame in pixels.
+        - height = height of the frame in pixels.
+
+        RETURNS
+
+        NONE
+        """
+        self.feeds[identifier].changeResolution(width, height)
+
+    def setFrameRate(self, identifier, frameRate):
+        """
+        PURPOSE
+
+        Changes the target capture rate of a camera feed.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - frameRate = target frames per second (0 = as fast as the camera delivers frames).
+
+        RETURNS
+
+        NONE
+        """
+        self.feeds[identifier].setFrameRate(frameRate)
+        self.wakeEvent.set()
+
+    def setTargetSize(self, identifier, width, height):
+        """
+        PURPOSE
+
+        Sets the size of the widget displaying a camera feed.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - width = width of the widget in pixels.
+        - height = height of the widget in pixels.
+
+        RETURNS
+
+        NONE
+        """
+        self.feeds[identifier].setTargetSize(width, height)
+
+    def setPrimary(self, identifier, status):
+        """
+        PURPOSE
+
+        Sets whether a camera feed is shown in the main display.
+        Secondary feeds are captured at a resolution that matches their display size.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - status = True for the primary feed, False for a secondary feed.
+
+        RETURNS
+
+        NONE
+        """
+        self.feeds[identifier].setPrimary(status)
+
+    def startRecording(self, directory = None):
+        """
+        PURPOSE
+
+        Starts recording every feed that is being captured.
+
+        INPUT
+
+        - directory = folder to save recordings in (if not given the default is used).
+
+        RETURNS
+
+        - missionDirectory = the folder the video files are written to.
+        """
+        if self.recorder == None:
+            self.recorder = VIDEO_RECORDER(directory)
+            self.recorder.start()
+
+            for cameraFeed in self.feeds:
+                cameraFeed.setRecorder(self.recorder)
+
+        return self.recorder.missionDirectory
+
+    def setMissionLog(self, missionLog):
+        """
+        PURPOSE
+
+        Logs every recorded frame on the mission timeline.
+
+        INPUT
+
+        - missionLog = the MISSION_LOG to log frames in.
+
+        RETURNS
+
+        NONE
+        """
+        if self.recorder != None:
+            self.recorder.setMissionLog(missionLog)
+
+    def stopRecording(self):
+        """
+        PURPOSE
+
+        Stops recording and closes the video files.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        recorder = self.recorder
+        self.recorder = None
+
+        if recorder != None:
+            for cameraFeed in self.feeds:
+                cameraFeed.setRecorder(None)
+            recorder.stop()
+
+    def recordSensorReadings(self, readings):
+        """
+        PURPOSE
+
+        Saves sensor readings alongside the video while recording, so the recording can be searched by sensor value.
+
+        INPUT
+
+        - readings = list of sensor readings.
+
+        RETURNS
+
+        NONE
+        """
+        recorder = self.recorder
+        if recorder != None:
+            recorder.addSensorReadings(readings)
+
+    def getRetryTime(self, address):
+        """
+        PURPOSE
+
+        Returns when a connection to an address should next be attempted, using the shared backoff.
+
+        INPUT
+
+        - address = the camera address.
+
+        RETURNS
+
+        - retryTime = time.monotonic() value of the next attempt (0 if the address has not failed).
+        """
+        _, retryTime = self.addressFailures.get(address, (0, 0))
+
+        return retryTime
+
+    def recordConnection(self, address, status):
+        """
+        PURPOSE
+
+        Updates the shared backoff for an address after a connection attempt.
+        Each failure doubles the delay before the next attempt, up to the maximum, with random jitter
+        so cameras on the same network do not all reconnect at once.
+
+        INPUT
+
+        - address = the camera address.
+        - status = True if the connection succeeded.
+
+        RETURNS
+
+        NONE
+        """
+        if status:
+            self.addressFailures.pop(address, None)
+        else:
+            failures, _ = self.addressFailures.get(address, (0, 0))
+            delay = min(self.initialBackoff * self.backoffFactor ** failures, self.maximumBackoff)
+            delay *= 1 + random.uniform(-self.backoffJitter, self.backoffJitter)
+            self.addressFailures[address] = (failures + 1, monotonic() + delay)
+
+    def setStatus(self, identifier, status):
+        """
+        PURPOSE
+
+        Changes the status of a feed and emits the status signal if it has changed.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - status = 'off', 'connecting', 'live', 'stalled' or 'failed'.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            changed = self.feedStatus[identifier] != status
+            self.feedStatus[identifier] = status
+
+        if changed:
+            self.cameraStatusSignal.emit(identifier, status)
+
+    def run(self):
+        """
+        PURPOSE
+
+        Scheduler loop. Hands each active feed to a worker when its next frame is due,
+        starts connection attempts when they are due, and abandons attempts that take too long.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        while self.runManager:
+            currentTime = monotonic()
+            wakeTime = currentTime + self.schedulerInterval
+            timedOut = []
+            connect = []
+
+            with self.lock:
+                for identifier, cameraFeed in enumerate(self.feeds):
+                    if identifier in self.busyFeeds or not self.isFeedActive(identifier):
+                        continue
+
+                    # WAITING FOR THE CAMERA TO OPEN
+                    if identifier in self.openAttempts:
+                        _, startTime = self.openAttempts[identifier]
+                        if currentTime - startTime > self.openTimeout:
+                            timedOut.append(identifier)
+                        else:
+                            wakeTime = min(wakeTime, startTime + self.openTimeout)
+
+                    # CAPTURE NEXT FRAME WHEN DUE
+                    elif cameraFeed.initiateStatus:
+                        if cameraFeed.nextFrameTime <= currentTime:
+                            self.busyFeeds.add(identifier)
+                            self.workerPool.submit(self.captureFeed, identifier)
+                        else:
+                            wakeTime = min(wakeTime, cameraFeed.nextFrameTime)
+
+                    # RETRY CONNECTION WHEN DUE
+                    else:
+                        retryTime = self.retryTimes[identifier]
+                        if retryTime <= currentTime:
+                            connect.append(identifier)
+                        else:
+                            wakeTime = min(wakeTime, retryTime)
+
+            for identifier in timedOut:
+                self.connectionFailed(identifier, self.feeds[identifier].address)
+
+            for identifier in connect:
+                self.connectFeed(identifier)
+
+            # SLEEP UNTIL THE NEXT FEED IS DUE OR SOMETHING CHANGES
+            self.wakeEvent.wait(max(0, wakeTime - monotonic()))
+            self.wakeEvent.clear()
+
+    def connectFeed(self, identifier):
+        """
+        PURPOSE
+
+        Starts a thread that opens the camera, so a slow or dead camera cannot block any other feed.
+
+        INPUT
+
+        - identifier = the camera feed number.
+
+        RETURNS
+
+        NONE
+        """
+        cameraFeed = self.feeds[identifier]
+
+        with self.lock:
+            generation = cameraFeed.sourceGeneration
+            address = cameraFeed.address
+            self.openAttempts[identifier] = (generation, monotonic())
+
+        self.setStatus(identifier, 'connecting')
+
+        openThread = Thread(target = self.openFeed, args = (identifier, address, generation), daemon = True)
+        openThread.start()
+
+    def openFeed(self, identifier, address, generation):
+        """
+        PURPOSE
+
+        Opening thread. Opens the camera and hands it to the feed, unless the attempt was cancelled
+        or timed out in the meantime, in which case the camera is closed again.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - address = the address being opened.
+        - generation = the source generation of the feed when the attempt started.
+
+        RETURNS
+
+        NONE
+        """
+        cameraFeed = self.feeds[identifier]
+        camera = cameraFeed.createCamera(address)
+
+        # ATTACH WHILE LOCKED SO THE SOURCE CANNOT CHANGE AT THE SAME TIME
+        with self.lock:
+            attempt = self.openAttempts.get(identifier)
+            current = attempt != None and attempt[0] == generation and cameraFeed.sourceGeneration == generation
+            if current:
+                del self.openAttempts[identifier]
+                if camera != None:
+                    cameraFeed.attachCamera(camera)
+                    self.recordConnection(address, True)
+
+        # ATTEMPT WAS CANCELLED OR TIMED OUT
+        if not current:
+            if camera != None:
+                camera.release()
+            return
+
+        if camera != None:
+            self.setStatus(identifier, 'live')
+            self.wakeEvent.set()
+        else:
+            self.connectionFailed(identifier, address)
+
+    def connectionFailed(self, identifier, address):
+        """
+        PURPOSE
+
+        Records a failed or timed out connection attempt and schedules the next attempt.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - address = the address that failed.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.openAttempts.pop(identifier, None)
+            self.recordConnection(address, False)
+            self.retryTimes[identifier] = self.getRetryTime(address)
+
+        self.feeds[identifier].emitDefaultImage()
+        self.setStatus(identifier, 'failed')
+        self.wakeEvent.set()
+
+    def captureFeed(self, identifier):
+        """
+        PURPOSE
+
+        Worker task that captures and sends a single frame.
+
+        INPUT
+
+        - identifier = the camera feed number.
+
+        RETURNS
+
+        NONE
+        """
+        cameraFeed = self.feeds[identifier]
+        generation = cameraFeed.sourceGeneration
+
+        if cameraFeed.processFrame():
+            cameraFeed.scheduleNextFrame()
+
+        # CAMERA HAS STOPPED DELIVERING FRAMES, RECONNECT (UNLESS THE SOURCE WAS CHANGED DURING THE CAPTURE)
+        elif cameraFeed.sourceGeneration == generation:
+            cameraFeed.closeCamera()
+            self.setStatus(identifier, 'stalled')
+
+        self.finishTask(identifier)
+
+    def finishTask(self, identifier):
+        """
+        PURPOSE
+
+        Marks a feed as no longer being serviced and wakes the scheduler.
+        Applies any source change, and closes the camera if the feed was turned off or the manager was stopped, while the worker was busy.
+
+        INPUT
+
+        - identifier = the camera feed number.
+
+        RETURNS
+
+        NONE
+        """
+        while True:
+            with self.lock:
+                address = self.pendingSources.pop(identifier, None)
+                if address == None:
+                    self.busyFeeds.discard(identifier)
+                    self.workerCondition.notify_all()
+                    stopped = not self.runManager
+                    break
+
+            # THE FEED IS STILL MARKED BUSY, SO NOTHING ELSE USES THE CAMERA WHILST IT IS RELEASED
+            self.feeds[identifier].changeSource(address)
+
+        # THE MANAGER GAVE UP WAITING FOR THIS WORKER, SO THE WORKER CLOSES ITS OWN CAMERA
+        if stopped:
+            self.feeds[identifier].closeCamera()
+            return
+
+        self.checkFeedActive(identifier)
+        self.wakeEvent.set()
+
+    def startManager(self):
+        """
+        PURPOSE
+
+        Starts the worker pool and scheduler thread.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        if self.runManager:
+            return
+
+        self.runManager = True
+        self.workerPool = ThreadPoolExecutor(max_workers = self.maxWorkers)
+        self.start()
+
+        # SHOW THE NO SIGNAL IMAGE ON FEEDS THAT ARE NOT BEING CAPTURED
+        for identifier in range(len(self.feeds)):
+            self.checkFeedActive(identifier)
+
+    def stopManager(self):
+        """
+        PURPOSE
+
+        Stops the scheduler thread, stops the vision processing of every feed and disconnects from every camera.
+        Cameras are only released once their worker has finished reading from them. Workers still reading
+        after stopTimeout are not waited for, and release their camera themselves when they finish.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        if not self.runManager:
+            return
+
+        self.runManager = False
+        self.wakeEvent.set()
+        self.wait()
+
+        self.workerPool.shutdown(wait = False)
+        self.stopRecording()
+
+        # CAMERAS STILL BEING OPENED ARE CLOSED BY THEIR OWN THREAD
+        with self.lock:
+            self.openAttempts.clear()
+
+            # RELEASING A CAMERA WHILE A WORKER IS READING FROM IT CAN CRASH OPENCV
+            self.workerCondition.wait_for(lambda: len(self.busyFeeds) == 0, self.stopTimeout)
+            idleFeeds = [cameraFeed for identifier, cameraFeed in enumerate(self.feeds) if identifier not in self.busyFeeds]
+
+        for cameraFeed in idleFeeds:
+            cameraFeed.closeCamera()
+
+        # STOP VISION PROCESSING THREADS AND CHILD PROCESSES, SO NONE ARE LEFT RUNNING AS THE PROGRAM EXITS
+        for cameraFeed in self.feeds:
+            cameraFeed.stopVisionWorker()
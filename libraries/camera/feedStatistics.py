@@ -0,0 +1,138 @@
+from threading import Lock
+from time import monotonic
+
+from libraries.serial.linkStatistics import ROLLING_HISTOGRAM, RATE_COUNTER
+
+class FEED_STATISTICS():
+    """
+    PURPOSE
+
+    Thread safe counters and rolling histograms describing the performance of each stage of a camera feed,
+    so the slowest stage can be found when a feed lags.
+
+    - framesCaptured = frames read from the camera by the capture loop.
+    - droppedFrames = frames the camera delivered that were replaced by a newer frame before being processed.
+    - skippedPaints = frames sent to the display that were replaced by a newer frame before being drawn.
+    - readFailures = reads that failed or timed out.
+    - skippedAnalyses = frames sent to the vision processing task that were replaced by a newer frame before being processed.
+    - analysisErrors = frames the vision processing task failed on.
+    - stages = processing time histograms (ms) for each stage of the feed.
+
+    STAGES
+
+    - 'decode' = reading and decoding a frame from the camera. This includes waiting for the camera,
+                 so a time close to the camera's frame interval means the camera itself is the limit.
+    - 'process' = running the frame through the vision processing task (on the VISION_WORKER thread if the task runs in the background).
+    - 'overlay' = drawing the newest vision processing result onto the frame.
+    - 'convert' = scaling the frame and converting it to a QImage.
+    - 'paint' = drawing the frame on the GUI thread.
+    """
+    # DATABASE
+    stageNames = ['decode', 'process', 'overlay', 'convert', 'paint']
+    # NUMBER OF RECENT SAMPLES EACH STAGE IS SUMMARISED OVER
+    maxSamples = 120
+
+    def __init__(self):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        PURPOSE
+
+        Clears all counters and histograms.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.counters = {'framesCaptured': 0, 'droppedFrames': 0, 'skippedPaints': 0, 'readFailures': 0, 'skippedAnalyses': 0,
+                             'analysisErrors': 0}
+            self.captureRate = RATE_COUNTER()
+            self.paintRate = RATE_COUNTER()
+            self.stages = {name: ROLLING_HISTOGRAM(self.maxSamples) for name in self.stageNames}
+
+    def addCount(self, counter, amount = 1):
+        """
+        PURPOSE
+
+        Increments one of the counters.
+
+        INPUT
+
+        - counter = name of the counter.
+        - amount = amount to add.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.counters[counter] += amount
+
+    def recordStage(self, stageName, stageTime):
+        """
+        PURPOSE
+
+        Stores the time taken by one stage for a single frame.
+        Capturing and painting a frame also count towards the capture and display frame rates.
+
+        INPUT
+
+        - stageName = 'decode', 'process', 'overlay', 'convert' or 'paint'.
+        - stageTime = time taken by the stage (seconds).
+
+        RETURNS
+
+        NONE
+        """
+        currentTime = monotonic()
+        with self.lock:
+            self.stages[stageName].addSample(1000 * stageTime)
+
+            if stageName == 'convert':
+                self.counters['framesCaptured'] += 1
+                self.captureRate.addEvent(currentTime)
+            elif stageName == 'paint':
+                self.paintRate.addEvent(currentTime)
+
+    def getSnapshot(self):
+        """
+        PURPOSE
+
+        Returns a copy of all the feed statistics.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - snapshot = dictionary containing the counters, frame rates (per second) and stage time summaries (ms).
+        """
+        currentTime = monotonic()
+        with self.lock:
+            snapshot = dict(self.counters)
+            snapshot['captureRate'] = self.captureRate.getRate(currentTime)
+            snapshot['paintRate'] = self.paintRate.getRate(currentTime)
+            snapshot['stages'] = {name: histogram.getSummary() for name, histogram in self.stages.items()}
+
+        return snapshot
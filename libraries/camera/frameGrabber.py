@@ -0,0 +1,182 @@
+from threading import Thread, Condition, current_thread
+from time import perf_counter
+
+class FRAME_GRABBER(Thread):
+    """
+    PURPOSE
+
+    Sub-thread that continuously reads frames from a camera and keeps only the newest one.
+    Network streams buffer frames inside the decoder, so if frames are processed slower than the
+    stream delivers them the delay keeps growing. Draining the decoder on its own thread means
+    the frame handed out is always the most recent one.
+    """
+    def __init__(self, cameraFeed, statistics = None):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - cameraFeed = the cv2.VideoCapture (or SYNTHETIC_CAMERA) object to read from.
+        - statistics = FEED_STATISTICS object to record decode times and dropped frames in (optional).
+
+        RETURNS
+
+        NONE
+        """
+        Thread.__init__(self, daemon = True)
+        self.cameraFeed = cameraFeed
+        self.statistics = statistics
+        self.runGrabber = True
+        self.status = True
+        self.condition = Condition()
+
+        # SET WHEN THE CAMERA SHOULD BE RELEASED ONCE THE CURRENT READ HAS FINISHED
+        self.releaseFeed = False
+        self.finished = False
+
+        # NEWEST FRAME AND HOW MANY FRAMES HAVE BEEN GRABBED / HANDED OUT
+        self.latestFrame = None
+        self.frameNumber = 0
+        self.readNumber = 0
+        self.droppedFrames = 0
+
+    def run(self):
+        """
+        PURPOSE
+
+        Reads frames as fast as the camera delivers them, replacing any frame that has not been collected.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        while self.runGrabber:
+            try:
+                startTime = perf_counter()
+                status, frame = self.cameraFeed.read()
+                decodeTime = perf_counter() - startTime
+            except:
+                status = False
+
+            with self.condition:
+                if not status:
+                    self.status = False
+                    self.condition.notify_all()
+                    break
+
+                # COUNT FRAMES THAT WERE REPLACED BEFORE THEY WERE COLLECTED
+                if self.frameNumber > self.readNumber:
+                    self.droppedFrames += 1
+                    if self.statistics != None:
+                        self.statistics.addCount('droppedFrames')
+
+                self.latestFrame = frame
+                self.frameNumber += 1
+                self.condition.notify_all()
+
+            if self.statistics != None:
+                self.statistics.recordStage('decode', decodeTime)
+
+        with self.condition:
+            self.finished = True
+            releaseFeed = self.releaseFeed
+
+        if releaseFeed:
+            self.releaseCamera()
+
+    def getLatestFrame(self, timeout = 2):
+        """
+        PURPOSE
+
+        Waits for a frame that has not been collected yet and returns it.
+
+        INPUT
+
+        - timeout = maximum time to wait for a new frame (seconds).
+
+        RETURNS
+
+        - status = True if a frame was returned, False if the camera failed or timed out.
+        - frame = the newest frame.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.frameNumber > self.readNumber or not self.status or not self.runGrabber, timeout)
+
+            if self.frameNumber > self.readNumber:
+                self.readNumber = self.frameNumber
+                return True, self.latestFrame
+
+        return False, None
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops the grabber thread after the current read finishes.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.condition:
+            self.runGrabber = False
+            self.condition.notify_all()
+
+    def close(self, timeout = None):
+        """
+        PURPOSE
+
+        Stops the grabber thread and releases the camera once the current read has finished.
+        Waits up to the timeout for the thread to finish, if it is still reading after that
+        the thread releases the camera itself when the read returns.
+
+        INPUT
+
+        - timeout = maximum time to wait for the current read to finish (seconds).
+
+        RETURNS
+
+        NONE
+        """
+        with self.condition:
+            self.runGrabber = False
+            self.condition.notify_all()
+
+            # RELEASE HERE ONLY IF THE THREAD IS NO LONGER READING FROM THE CAMERA
+            releaseNow = self.finished
+            self.releaseFeed = not self.finished
+
+        if releaseNow:
+            self.releaseCamera()
+
+        if self.is_alive() and current_thread() is not self:
+            self.join(timeout)
+
+    def releaseCamera(self):
+        """
+        PURPOSE
+
+        Disconnects from the camera.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        try:
+            self.cameraFeed.release()
+        except:
+            pass
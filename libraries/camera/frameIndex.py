@@ -0,0 +1,519 @@
+import os
+import csv
+import mmap
+import struct
+import argparse
+
+from cv2 import VideoCapture, imwrite, CAP_PROP_POS_FRAMES
+
+class FRAME_INDEX_WRITER():
+    """
+    PURPOSE
+
+    Writes the sidecar index of a recorded camera feed, which maps the capture time of every recorded frame
+    to the video segment and frame number it was written to.
+
+    FILES
+
+    - <name>.index = one fixed size record per frame (capture time, segment number, frame number), in capture order.
+                     Frames that could not be written have a segment number of missingSegment.
+    - <name>.segments = the file name of each video segment, one per line.
+    """
+    # DATABASE
+    # CAPTURE TIME (SECONDS SINCE THE EPOCH), SEGMENT NUMBER, FRAME NUMBER WITHIN THE SEGMENT
+    recordFormat = struct.Struct('<dII')
+    # SEGMENT NUMBER OF A FRAME THAT WAS NOT WRITTEN
+    missingSegment = 0xFFFFFFFF
+
+    def __init__(self, basePath):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - basePath = path of the index files without the extension.
+
+        RETURNS
+
+        NONE
+        """
+        self.indexFile = open(basePath + ".index", 'ab')
+        self.segmentsFile = open(basePath + ".segments", 'a')
+        self.segmentNumber = -1
+
+    def addSegment(self, filePath):
+        """
+        PURPOSE
+
+        Records the start of a new video segment.
+
+        INPUT
+
+        - filePath = path of the video file.
+
+        RETURNS
+
+        NONE
+        """
+        self.segmentsFile.write(os.path.basename(filePath) + "\n")
+        self.segmentsFile.flush()
+        self.segmentNumber += 1
+
+    def addFrame(self, captureTime, frameNumber):
+        """
+        PURPOSE
+
+        Records a frame written to the current segment.
+
+        INPUT
+
+        - captureTime = time the frame was captured (seconds since the epoch).
+        - frameNumber = position of the frame in the current segment.
+
+        RETURNS
+
+        NONE
+        """
+        self.indexFile.write(self.recordFormat.pack(captureTime, self.segmentNumber, frameNumber))
+
+    def addMissingFrame(self, captureTime):
+        """
+        PURPOSE
+
+        Records a frame that could not be written, so the positions of the frames after it stay the same
+        as the positions given out when they were queued.
+
+        INPUT
+
+        - captureTime = time the frame was captured (seconds since the epoch).
+
+        RETURNS
+
+        NONE
+        """
+        self.indexFile.write(self.recordFormat.pack(captureTime, self.missingSegment, 0))
+
+    def close(self):
+        """
+        PURPOSE
+
+        Closes the index files.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.indexFile.close()
+        self.segmentsFile.close()
+
+class FRAME_INDEX():
+    """
+    PURPOSE
+
+    Reads the sidecar index of a recorded camera feed, so the frame captured at any moment can be found
+    with a binary search of the index file and read without decoding the recording from the start.
+    """
+    recordFormat = FRAME_INDEX_WRITER.recordFormat
+    missingSegment = FRAME_INDEX_WRITER.missingSegment
+    # LARGEST GAP SKIPPED BY DECODING FRAMES INSTEAD OF SEEKING WHEN READING FORWARDS
+    maxSkipFrames = 30
+
+    def __init__(self, basePath):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - basePath = path of the index files without the extension (such as 'recordings/mission_.../camera_1').
+
+        RETURNS
+
+        NONE
+        """
+        self.directory = os.path.dirname(basePath)
+
+        with open(basePath + ".segments") as segmentsFile:
+            self.segments = [line.strip() for line in segmentsFile if line.strip() != ""]
+
+        # MAP THE INDEX INTO MEMORY SO ONLY THE RECORDS VISITED BY THE SEARCH ARE READ
+        self.indexFile = open(basePath + ".index", 'rb')
+        size = os.path.getsize(basePath + ".index")
+        self.frameCount = size // self.recordFormat.size
+        self.index = mmap.mmap(self.indexFile.fileno(), 0, access = mmap.ACCESS_READ) if size > 0 else b""
+
+        # SEGMENT KEPT OPEN BY readPosition SO FRAMES READ IN ORDER ARE NOT SOUGHT ONE BY ONE
+        self.video = None
+        self.videoSegment = None
+        self.nextFrame = 0
+
+    def __len__(self):
+        """
+        PURPOSE
+
+        Returns the number of frames in the index.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - frameCount = number of indexed frames.
+        """
+        return self.frameCount
+
+    def __getitem__(self, position):
+        """
+        PURPOSE
+
+        Reads a single record from the index.
+
+        INPUT
+
+        - position = record number.
+
+        RETURNS
+
+        - captureTime = time the frame was captured (seconds since the epoch).
+        - segmentNumber = the segment the frame was written to.
+        - frameNumber = position of the frame in the segment.
+        """
+        if position < 0 or position >= self.frameCount:
+            raise IndexError(position)
+
+        return self.recordFormat.unpack_from(self.index, position * self.recordFormat.size)
+
+    def getCaptureTime(self, position):
+        """
+        PURPOSE
+
+        Reads the capture time of a single record from the index.
+
+        INPUT
+
+        - position = record number.
+
+        RETURNS
+
+        - captureTime = time the frame was captured (seconds since the epoch).
+        """
+        return self[position][0]
+
+    def findFrame(self, timestamp):
+        """
+        PURPOSE
+
+        Finds the frame captured closest to a moment in time.
+
+        INPUT
+
+        - timestamp = the moment to find (seconds since the epoch).
+
+        RETURNS
+
+        - segmentPath = path of the video file containing the frame (None if the index is empty).
+        - frameNumber = position of the frame in the video file.
+        - captureTime = time the frame was captured.
+        """
+        if self.frameCount == 0:
+            return None, 0, None
+
+        # BINARY SEARCH FOR THE FIRST FRAME CAPTURED AT OR AFTER THE TIMESTAMP
+        low = 0
+        high = self.frameCount
+        while low < high:
+            middle = (low + high) // 2
+            if self.getCaptureTime(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        position = low
+
+        # PICK WHICHEVER NEIGHBOUR IS CLOSER
+        if position == self.frameCount or (position > 0 and timestamp - self.getCaptureTime(position - 1) < self.getCaptureTime(position) - timestamp):
+            position -= 1
+
+        # FRAMES THAT WERE NOT WRITTEN ARE REPLACED BY THE CLOSEST FRAME THAT WAS
+        position = self.findWrittenFrame(position, timestamp)
+        if position == None:
+            return None, 0, None
+
+        captureTime, segmentNumber, frameNumber = self[position]
+
+        return os.path.join(self.directory, self.segments[segmentNumber]), frameNumber, captureTime
+
+    def findWrittenFrame(self, position, timestamp):
+        """
+        PURPOSE
+
+        Finds the written frame closest to a moment in time, starting from a position and searching outwards.
+
+        INPUT
+
+        - position = record number to start from.
+        - timestamp = the moment to find (seconds since the epoch).
+
+        RETURNS
+
+        - position = record number of the closest written frame (None if no frames were written).
+        """
+        before = position
+        while before >= 0 and self[before][1] == self.missingSegment:
+            before -= 1
+
+        after = position
+        while after < self.frameCount and self[after][1] == self.missingSegment:
+            after += 1
+
+        if before < 0:
+            return after if after < self.frameCount else None
+        if after == self.frameCount:
+            return before
+
+        return before if timestamp - self.getCaptureTime(before) <= self.getCaptureTime(after) - timestamp else after
+
+    def readFrame(self, timestamp):
+        """
+        PURPOSE
+
+        Reads the frame captured closest to a moment in time from the recording.
+
+        INPUT
+
+        - timestamp = the moment to find (seconds since the epoch).
+
+        RETURNS
+
+        - status = True if the frame was read.
+        - frame = the recorded image.
+        - captureTime = time the frame was captured.
+        """
+        segmentPath, frameNumber, captureTime = self.findFrame(timestamp)
+
+        if segmentPath == None:
+            return False, None, None
+
+        video = VideoCapture(segmentPath)
+        video.set(CAP_PROP_POS_FRAMES, frameNumber)
+        status, frame = video.read()
+        video.release()
+
+        return status, frame, captureTime
+
+    def readPosition(self, position):
+        """
+        PURPOSE
+
+        Reads a frame from the recording by its position in the index.
+        The segment is kept open between calls, so reading frames in order (such as during a mission replay)
+        decodes the video sequentially instead of seeking to every frame.
+
+        INPUT
+
+        - position = record number.
+
+        RETURNS
+
+        - status = True if the frame was read (False if it was not written to the recording).
+        - frame = the recorded image.
+        - captureTime = time the frame was captured.
+        """
+        try:
+            captureTime, segmentNumber, frameNumber = self[position]
+        except IndexError:
+            return False, None, None
+
+        if segmentNumber == self.missingSegment:
+            return False, None, captureTime
+
+        if segmentNumber != self.videoSegment:
+            self.releaseVideo()
+            self.video = VideoCapture(os.path.join(self.directory, self.segments[segmentNumber]))
+            self.videoSegment = segmentNumber
+
+        # SKIP SHORT GAPS (REPEATED FRAMES) BY DECODING, OTHERWISE SEEK
+        skipFrames = frameNumber - self.nextFrame
+        if skipFrames < 0 or skipFrames > self.maxSkipFrames:
+            self.video.set(CAP_PROP_POS_FRAMES, frameNumber)
+        else:
+            for _ in range(skipFrames):
+                self.video.grab()
+
+        status, frame = self.video.read()
+        self.nextFrame = frameNumber + 1
+
+        return status, frame, captureTime
+
+    def releaseVideo(self):
+        """
+        PURPOSE
+
+        Closes the segment kept open by readPosition.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        if self.video != None:
+            self.video.release()
+            self.video = None
+            self.videoSegment = None
+            self.nextFrame = 0
+
+    def close(self):
+        """
+        PURPOSE
+
+        Closes the index file and any open video segment.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.releaseVideo()
+        if self.frameCount > 0:
+            self.index.close()
+        self.indexFile.close()
+
+class SENSOR_LOG_WRITER():
+    """
+    PURPOSE
+
+    Writes the sensor readings received during a recording, one line per reading with its time,
+    so recorded video can be matched to what the ROV was measuring.
+    """
+    def __init__(self, filePath):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - filePath = path of the CSV file.
+
+        RETURNS
+
+        NONE
+        """
+        self.logFile = open(filePath, 'a', newline = "")
+        self.writer = csv.writer(self.logFile)
+
+    def addReadings(self, timestamp, readings):
+        """
+        PURPOSE
+
+        Records a set of sensor readings.
+
+        INPUT
+
+        - timestamp = time the readings were received (seconds since the epoch).
+        - readings = list of sensor readings.
+
+        RETURNS
+
+        NONE
+        """
+        self.writer.writerow(["{:.3f}".format(timestamp)] + list(readings))
+        self.logFile.flush()
+
+    def close(self):
+        """
+        PURPOSE
+
+        Closes the file.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.logFile.close()
+
+def findSensorCrossing(filePath, sensor, threshold, rising = True, startTime = 0):
+    """
+    PURPOSE
+
+    Finds the first moment a sensor reading crossed a threshold, such as the depth passing 3 m.
+
+    INPUT
+
+    - filePath = path of the sensor log written during the recording.
+    - sensor = position of the sensor in the readings (0, 1, 2 etc.)
+    - threshold = the value to find.
+    - rising = True to find the reading going above the threshold, False to find it going below.
+    - startTime = ignore readings before this time (seconds since the epoch).
+
+    RETURNS
+
+    - timestamp = time of the first reading past the threshold (None if it never crossed).
+    """
+    previousValue = None
+
+    with open(filePath, newline = "") as logFile:
+        for row in csv.reader(logFile):
+            try:
+                timestamp = float(row[0])
+                value = float(row[sensor + 1])
+            except:
+                continue
+
+            if timestamp < startTime:
+                continue
+
+            if previousValue != None:
+                if rising and previousValue < threshold <= value:
+                    return timestamp
+                if not rising and previousValue > threshold >= value:
+                    return timestamp
+
+            previousValue = value
+
+    return None
+
+if __name__ == '__main__':
+    # EXAMPLE: python -m libraries.camera.frameIndex recordings/mission_20240101_120000 --sensor 1 --threshold 3 --camera 1
+    parser = argparse.ArgumentParser(description = "Find the recorded frame at the moment a sensor crossed a threshold.")
+    parser.add_argument('mission', help = "folder of the recording")
+    parser.add_argument('--sensor', type = int, default = 0, help = "position of the sensor in the readings")
+    parser.add_argument('--threshold', type = float, required = True, help = "value the sensor crosses")
+    parser.add_argument('--falling', action = 'store_true', help = "find the reading going below the threshold")
+    parser.add_argument('--camera', type = int, default = 1, help = "camera feed to read the frame from")
+    parser.add_argument('--output', default = "frame.png", help = "image file to save the frame to")
+    args = parser.parse_args()
+
+    timestamp = findSensorCrossing(os.path.join(args.mission, "sensors.csv"), args.sensor, args.threshold, not args.falling)
+
+    if timestamp == None:
+        print("Sensor {} never crossed {}".format(args.sensor, args.threshold))
+    else:
+        frameIndex = FRAME_INDEX(os.path.join(args.mission, "camera_{}".format(args.camera)))
+        segmentPath, frameNumber, captureTime = frameIndex.findFrame(timestamp)
+        status, frame, _ = frameIndex.readFrame(timestamp)
+        frameIndex.close()
+
+        print("Sensor {} crossed {} at {:.3f}".format(args.sensor, args.threshold, timestamp))
+        if status:
+            imwrite(args.output, frame)
+            print("Frame {} of {} (captured {:.3f}) saved to {}".format(frameNumber, segmentPath, captureTime, args.output))
+        else:
+            print("No recorded frame found")
@@ -0,0 +1,134 @@
+import sys
+import time
+import argparse
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from libraries.camera.cameraCapture import CAMERA_CAPTURE
+from libraries.serial.linkStatistics import ROLLING_HISTOGRAM
+
+class SLOW_TASK():
+    """
+    PURPOSE
+
+    Stand-in for a vision processing task that takes a fixed time per frame.
+    """
+    def __init__(self, processingTime):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - processingTime = time spent processing each frame (seconds).
+
+        RETURNS
+
+        NONE
+        """
+        self.processingTime = processingTime
+
+    def runAlgorithm(self, frame):
+        """
+        PURPOSE
+
+        Simulates processing a frame.
+
+        INPUT
+
+        - frame = the camera frame.
+
+        RETURNS
+
+        - frame = the unchanged camera frame.
+        """
+        time.sleep(self.processingTime)
+        return frame
+
+def runBenchmark(dropStaleFrames, address = "synthetic:640x360@30/100", processingTime = 0.05, duration = 5, backgroundTask = False):
+    """
+    PURPOSE
+
+    Streams synthetic timestamped frames through CAMERA_CAPTURE with slow processing,
+    and measures the delay between each frame being captured and being sent to the GUI.
+
+    INPUT
+
+    - dropStaleFrames = True to read the stream with the grabber thread, False to read it directly.
+    - address = synthetic camera address (the '/100' buffers 100 frames like an RTSP decoder).
+    - processingTime = simulated processing time per frame (seconds).
+    - duration = length of the benchmark (seconds).
+    - backgroundTask = True to run the processing on a VISION_WORKER thread instead of the capture thread.
+
+    RETURNS
+
+    - results = list of latency summaries (ms), one for each second of the benchmark.
+    """
+    app = QCoreApplication.instance()
+    if app == None:
+        app = QCoreApplication(sys.argv)
+
+    cameraThread = CAMERA_CAPTURE(address)
+    cameraThread.dropStaleFrames = dropStaleFrames
+    cameraThread.backgroundTasks = backgroundTask
+    cameraThread.setFrameRate(0)
+    cameraThread.changeResolution(640, 360)
+    cameraThread.setTargetSize(640, 360)
+    cameraThread.processImage(SLOW_TASK(processingTime))
+
+    # COLLECT LATENCY SUMMARY EVERY SECOND
+    results = []
+    def collectResults():
+        results.append(cameraThread.frameLatency.getSummary())
+        cameraThread.frameLatency = ROLLING_HISTOGRAM()
+
+    timer = QTimer()
+    timer.timeout.connect(collectResults)
+
+    cameraThread.start()
+    timer.start(1000)
+    QTimer.singleShot(int(1000 * duration) + 100, app.quit)
+    app.exec_()
+
+    timer.stop()
+    cameraThread.feedStop()
+    cameraThread.wait()
+    cameraThread.stopProcessing()
+
+    return results
+
+def printResults(title, results):
+    """
+    PURPOSE
+
+    Prints the latency measured in each second of a benchmark run.
+
+    INPUT
+
+    - title = name of the capture mode that was benchmarked.
+    - results = list returned by runBenchmark.
+
+    RETURNS
+
+    NONE
+    """
+    print("\n{}".format(title))
+    for second, summary in enumerate(results):
+        if summary['count'] == 0:
+            print("  {:>3} s:  no frames".format(second + 1))
+        else:
+            print("  {:>3} s:  {:>3} frames   latency p50 {:7.1f} ms   max {:7.1f} ms".format(
+                  second + 1, summary['count'], summary['p50'], summary['max']))
+
+if __name__ == '__main__':
+    # EXAMPLE: python -m libraries.camera.latencyBenchmark --processing 0.05 --duration 5
+    parser = argparse.ArgumentParser(description = "Measure capture to display latency with a synthetic timestamped stream.")
+    parser.add_argument('--address', default = "synthetic:640x360@30/100", help = "synthetic camera address")
+    parser.add_argument('--processing', type = float, default = 0.05, help = "simulated processing time per frame (seconds)")
+    parser.add_argument('--duration', type = float, default = 5, help = "length of each run (seconds)")
+    args = parser.parse_args()
+
+    printResults("DIRECT READ", runBenchmark(False, args.address, args.processing, args.duration))
+    printResults("GRABBER THREAD (DROP STALE FRAMES)", runBenchmark(True, args.address, args.processing, args.duration))
+    printResults("GRABBER THREAD + BACKGROUND PROCESSING", runBenchmark(True, args.address, args.processing, args.duration, True))
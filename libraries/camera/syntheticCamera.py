@@ -0,0 +1,295 @@
+import re
+import numpy as np
+from struct import pack, unpack
+from time import monotonic, sleep
+from cv2 import CAP_PROP_FRAME_WIDTH, CAP_PROP_FRAME_HEIGHT, CAP_PROP_FPS
+
+class SYNTHETIC_CAMERA():
+    """
+    PURPOSE
+
+    Stand-in for cv2.VideoCapture that delivers a test pattern at a fixed frame rate, like a real camera.
+    read() and grab() block until the next frame is due, so it can be used to test and benchmark
+    the camera threads without any cameras connected.
+
+    Used by CAMERA_CAPTURE for addresses of the form 'synthetic' or 'synthetic:<width>x<height>@<fps>[/<buffer>]'
+    (for example 'synthetic:1280x720@30' or 'synthetic:1280x720@30/50' to buffer 50 frames like an RTSP decoder).
+
+    The time each frame was captured (time.monotonic) is written into the first pixels of the frame,
+    so the delay until it is displayed can be measured with readTimestamp().
+    """
+    # DATABASE
+    addressPrefix = "synthetic"
+    timestampSize = 8
+
+    def __init__(self, width = 1280, height = 720, frameRate = 30, bufferSize = 1):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - width = width of the frames in pixels.
+        - height = height of the frames in pixels.
+        - frameRate = rate frames are delivered at (Hz).
+        - bufferSize = number of frames held when they are not read in time (older frames are discarded).
+
+        RETURNS
+
+        NONE
+        """
+        self.frameRate = frameRate
+        self.bufferSize = max(1, bufferSize)
+        self.frameNumber = 0
+        self.startTime = monotonic()
+        self.captureTime = self.startTime
+        self.opened = True
+        self.createFrame(width, height)
+
+    @classmethod
+    def isSyntheticAddress(cls, address):
+        """
+        PURPOSE
+
+        Checks whether a camera address refers to a synthetic camera.
+
+        INPUT
+
+        - address = the camera address.
+
+        RETURNS
+
+        - status = True if the address is a synthetic camera address.
+        """
+        return isinstance(address, str) and address.startswith(cls.addressPrefix)
+
+    @classmethod
+    def fromAddress(cls, address):
+        """
+        PURPOSE
+
+        Creates a synthetic camera from an address such as 'synthetic:1280x720@30'.
+
+        INPUT
+
+        - address = the camera address.
+
+        RETURNS
+
+        - camera = the synthetic camera object.
+        """
+        match = re.match(r"synthetic:(\d+)x(\d+)(?:@(\d+))?(?:/(\d+))?$", address)
+        if match == None:
+            return cls()
+
+        width, height, frameRate, bufferSize = match.groups()
+        return cls(int(width), int(height), int(frameRate) if frameRate != None else 30, int(bufferSize) if bufferSize != None else 1)
+
+    @classmethod
+    def readTimestamp(cls, frame):
+        """
+        PURPOSE
+
+        Reads the capture time written into a synthetic frame.
+
+        INPUT
+
+        - frame = a frame returned by read() or retrieve().
+
+        RETURNS
+
+        - captureTime = time.monotonic() value when the frame was captured, or None if it cannot be read.
+        """
+        try:
+            return unpack('<d', frame[0, :cls.timestampSize, 0].tobytes())[0]
+        except:
+            return None
+
+    def createFrame(self, width, height):
+        """
+        PURPOSE
+
+        Generates the colour bar test pattern.
+
+        INPUT
+
+        - width = width of the frame in pixels.
+        - height = height of the frame in pixels.
+
+        RETURNS
+
+        NONE
+        """
+        colours = [(255, 255, 255), (0, 255, 255), (255, 255, 0), (0, 255, 0), (255, 0, 255), (0, 0, 255), (255, 0, 0), (0, 0, 0)]
+        self.frame = np.zeros((height, width, 3), dtype = np.uint8)
+        barWidth = max(1, width // len(colours))
+
+        for i, colour in enumerate(colours):
+            self.frame[:, i * barWidth:(i + 1) * barWidth] = colour
+
+    def isOpened(self):
+        """
+        PURPOSE
+
+        Checks whether the camera is open, like cv2.VideoCapture.isOpened().
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - status = True if the camera has not been released.
+        """
+        return self.opened
+
+    def set(self, propertyID, value):
+        """
+        PURPOSE
+
+        Changes the frame size or frame rate, like cv2.VideoCapture.set().
+
+        INPUT
+
+        - propertyID = the cv2 property to change.
+        - value = the new value.
+
+        RETURNS
+
+        - status = True if the property is supported.
+        """
+        height, width = self.frame.shape[:2]
+
+        if propertyID == CAP_PROP_FRAME_WIDTH:
+            self.createFrame(int(value), height)
+        elif propertyID == CAP_PROP_FRAME_HEIGHT:
+            self.createFrame(width, int(value))
+        elif propertyID == CAP_PROP_FPS:
+            self.frameRate = value
+            self.startTime = monotonic()
+            self.frameNumber = 0
+        else:
+            return False
+
+        return True
+
+    def get(self, propertyID):
+        """
+        PURPOSE
+
+        Returns the frame size or frame rate, like cv2.VideoCapture.get().
+
+        INPUT
+
+        - propertyID = the cv2 property to read.
+
+        RETURNS
+
+        - value = the property value (0 if not supported).
+        """
+        height, width = self.frame.shape[:2]
+
+        return {CAP_PROP_FRAME_WIDTH: width, CAP_PROP_FRAME_HEIGHT: height, CAP_PROP_FPS: self.frameRate}.get(propertyID, 0)
+
+    def grab(self):
+        """
+        PURPOSE
+
+        Waits for the next frame to be captured, or takes the oldest frame still held in the buffer.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - status = True if the camera is open.
+        """
+        if not self.opened:
+            return False
+
+        # NO FRAME RATE LIMIT
+        if self.frameRate <= 0:
+            self.captureTime = monotonic()
+            self.frameNumber += 1
+            return True
+
+        interval = 1 / self.frameRate
+        captureTime = self.startTime + self.frameNumber * interval
+        currentTime = monotonic()
+
+        if captureTime > currentTime:
+            # WAIT FOR THE NEXT FRAME TO BE CAPTURED
+            sleep(captureTime - currentTime)
+        else:
+            # FRAMES THAT DID NOT FIT IN THE BUFFER ARE LOST, LIKE A LIVE CAMERA
+            backlog = int((currentTime - captureTime) / interval) + 1
+            if backlog > self.bufferSize:
+                self.frameNumber += backlog - self.bufferSize
+                captureTime = self.startTime + self.frameNumber * interval
+
+        self.captureTime = captureTime
+        self.frameNumber += 1
+
+        return True
+
+    def retrieve(self):
+        """
+        PURPOSE
+
+        Returns the most recently grabbed frame.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - status = True if the camera is open.
+        - frame = the test pattern image.
+        """
+        if not self.opened:
+            return False, None
+
+        # WRITE CAPTURE TIME INTO THE FIRST PIXELS
+        frame = self.frame.copy()
+        frame[0, :self.timestampSize, 0] = np.frombuffer(pack('<d', self.captureTime), dtype = np.uint8)
+
+        return True, frame
+
+    def read(self):
+        """
+        PURPOSE
+
+        Waits for and returns the next frame.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - status = True if the camera is open.
+        - frame = the test pattern image.
+        """
+        if not self.grab():
+            return False, None
+
+        return self.retrieve()
+
+    def release(self):
+        """
+        PURPOSE
+
+        Closes the camera.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.opened = False
@@ -0,0 +1,420 @@
+import os
+import time
+from datetime import datetime
+from queue import Queue, Empty, Full
+from threading import Thread, Lock
+
+from cv2 import VideoWriter, VideoWriter_fourcc, VIDEOWRITER_PROP_QUALITY
+
+from libraries.camera.frameIndex import FRAME_INDEX_WRITER, SENSOR_LOG_WRITER
+
+class VIDEO_ENCODER(Thread):
+    """
+    PURPOSE
+
+    Sub-thread that encodes the frames of a single camera feed into a series of video files.
+    Frames are passed in through a bounded queue. If the encoder falls behind, new frames are dropped
+    instead of waiting for space, so the capture thread is never held up by the disk or the codec.
+
+    Each file is a segment of at most segmentDuration seconds, named after the time its first frame was captured.
+    Gaps left by dropped frames are filled by repeating the previous frame, so every segment plays back in real time.
+    The capture time of every frame is written to a sidecar index (see FRAME_INDEX) so recordings can be searched by time.
+    Every queued frame has an index record, including frames that failed to write, so the position returned when a
+    frame is queued is always its position in the index.
+    """
+    def __init__(self, identifier, directory, frameRate, settings):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - directory = folder to write the video files to.
+        - frameRate = frame rate of the video files.
+        - settings = the VIDEO_RECORDER containing the codec, quality, segment and queue settings.
+
+        RETURNS
+
+        NONE
+        """
+        Thread.__init__(self, daemon = True)
+        self.identifier = identifier
+        self.directory = directory
+        self.frameRate = frameRate
+        self.settings = settings
+        self.runEncoder = True
+        self.frameQueue = Queue(maxsize = settings.queueSize)
+        # STOPS FRAMES BEING QUEUED WHILE THE ENCODER IS STOPPING
+        self.queueLock = Lock()
+
+        # CURRENT SEGMENT
+        self.videoWriter = None
+        self.segmentStart = 0
+        self.segmentSize = None
+        self.segmentFrames = 0
+        self.previousFrame = None
+
+        # INDEX OF THE CAPTURE TIME OF EVERY FRAME
+        self.frameIndex = FRAME_INDEX_WRITER(os.path.join(directory, "camera_{}".format(identifier + 1)))
+
+        # FILES WRITTEN AND FRAMES QUEUED / WRITTEN / DROPPED
+        self.segmentFiles = []
+        self.framesQueued = 0
+        self.framesWritten = 0
+        self.droppedFrames = 0
+
+    def addFrame(self, frame, captureTime):
+        """
+        PURPOSE
+
+        Queues a frame to be encoded, or drops it if the queue is full. Never blocks.
+
+        INPUT
+
+        - frame = the captured image (copied, so the caller can keep using it).
+        - captureTime = time the frame was captured (seconds since the epoch).
+
+        RETURNS
+
+        - position = position the frame will have in the frame index (None if it was dropped).
+        """
+        with self.queueLock:
+            # FRAMES QUEUED AFTER THE ENCODER HAS STOPPED WOULD NEVER BE INDEXED
+            if not self.runEncoder or self.frameQueue.full():
+                self.droppedFrames += 1
+                return None
+
+            try:
+                self.frameQueue.put_nowait((frame.copy(), captureTime))
+            except Full:
+                self.droppedFrames += 1
+                return None
+
+            position = self.framesQueued
+            self.framesQueued += 1
+
+        return position
+
+    def run(self):
+        """
+        PURPOSE
+
+        Encodes queued frames until stopped, then writes any frames still in the queue and closes the file.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        while self.runEncoder or not self.frameQueue.empty():
+            try:
+                frame, captureTime = self.frameQueue.get(timeout = 0.2)
+            except Empty:
+                continue
+
+            try:
+                self.writeFrame(frame, captureTime)
+            except:
+                self.closeSegment()
+                # KEEP THE INDEX POSITIONS OF LATER FRAMES ALIGNED WITH THE POSITIONS ALREADY GIVEN OUT
+                try:
+                    self.frameIndex.addMissingFrame(captureTime)
+                except:
+                    pass
+
+        self.closeSegment()
+        self.frameIndex.close()
+
+    def writeFrame(self, frame, captureTime):
+        """
+        PURPOSE
+
+        Writes a frame to the current segment, starting a new segment if the current one is full
+        or the frame size has changed.
+
+        INPUT
+
+        - frame = the captured image.
+        - captureTime = time the frame was captured (seconds since the epoch).
+
+        RETURNS
+
+        NONE
+        """
+        frameSize = (frame.shape[1], frame.shape[0])
+
+        if self.videoWriter == None or frameSize != self.segmentSize or captureTime - self.segmentStart >= self.settings.segmentDuration:
+            self.closeSegment()
+            self.openSegment(frameSize, captureTime)
+
+        # REPEAT THE PREVIOUS FRAME TO FILL ANY GAP, SO THE VIDEO KEEPS IN TIME WITH THE MISSION
+        targetFrame = int((captureTime - self.segmentStart) * self.frameRate)
+        repeats = min(targetFrame - self.segmentFrames, self.frameRate)
+        for _ in range(repeats):
+            self.videoWriter.write(self.previousFrame)
+            self.segmentFrames += 1
+
+        self.videoWriter.write(frame)
+        self.frameIndex.addFrame(captureTime, self.segmentFrames)
+        self.segmentFrames += 1
+        self.framesWritten += 1
+        self.previousFrame = frame
+
+    def openSegment(self, frameSize, captureTime):
+        """
+        PURPOSE
+
+        Opens a new video file named after the feed and the capture time of its first frame.
+
+        INPUT
+
+        - frameSize = (width, height) of the frames in pixels.
+        - captureTime = time the first frame was captured (seconds since the epoch).
+
+        RETURNS
+
+        NONE
+        """
+        timestamp = datetime.fromtimestamp(captureTime).strftime("%Y%m%d_%H%M%S")
+        fileName = "camera_{}_{}{}".format(self.identifier + 1, timestamp, self.settings.fileExtension)
+        filePath = os.path.join(self.directory, fileName)
+
+        # A SEGMENT STARTED IN THE SAME SECOND (SUCH AS AFTER A FAILED WRITE) MUST NOT OVERWRITE THE PREVIOUS ONE
+        copyNumber = 1
+        while os.path.exists(filePath):
+            copyNumber += 1
+            fileName = "camera_{}_{}_{}{}".format(self.identifier + 1, timestamp, copyNumber, self.settings.fileExtension)
+            filePath = os.path.join(self.directory, fileName)
+
+        self.videoWriter = VideoWriter(filePath, VideoWriter_fourcc(*self.settings.codec), self.frameRate, frameSize)
+        self.videoWriter.set(VIDEOWRITER_PROP_QUALITY, self.settings.quality)
+        self.segmentStart = captureTime
+        self.segmentSize = frameSize
+        self.segmentFrames = 0
+        self.segmentFiles.append(filePath)
+        self.frameIndex.addSegment(filePath)
+
+    def closeSegment(self):
+        """
+        PURPOSE
+
+        Finishes the current video file.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        if self.videoWriter != None:
+            self.videoWriter.release()
+            self.videoWriter = None
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops the encoder once the frames already queued have been written.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.queueLock:
+            self.runEncoder = False
+
+class VIDEO_RECORDER():
+    """
+    PURPOSE
+
+    Records every camera feed during a mission. Each feed is encoded on its own VIDEO_ENCODER thread
+    (OpenCV releases the GIL while encoding, so the encoders run alongside the capture threads),
+    and every recording is saved into a folder named after the time the recording started.
+    Sensor readings received while recording are saved to sensors.csv in the same folder.
+    If a MISSION_LOG is given, every recorded frame is also logged on the mission timeline.
+    """
+    # DATABASE
+    directory = "recordings"
+    # FOURCC CODEC AND MATCHING FILE EXTENSION
+    codec = "MJPG"
+    fileExtension = ".avi"
+    # ENCODING QUALITY (0 - 100, ONLY USED BY CODECS THAT SUPPORT IT)
+    quality = 85
+    # MAXIMUM LENGTH OF EACH VIDEO FILE (SECONDS)
+    segmentDuration = 300
+    # FRAMES WAITING TO BE ENCODED BEFORE NEW FRAMES ARE DROPPED (PER FEED)
+    queueSize = 30
+    # FRAME RATE OF FEEDS CAPTURED AS FAST AS THE CAMERA DELIVERS FRAMES
+    defaultFrameRate = 30
+
+    def __init__(self, directory = None):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - directory = folder to save recordings in (if not given the default is used).
+
+        RETURNS
+
+        NONE
+        """
+        if directory != None:
+            self.directory = directory
+
+        self.missionLog = None
+
+        self.lock = Lock()
+        self.encoders = {}
+        self.recording = False
+        self.missionDirectory = None
+        self.sensorLog = None
+
+    def start(self):
+        """
+        PURPOSE
+
+        Starts a new recording in its own folder.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - missionDirectory = the folder the video files are written to.
+        """
+        with self.lock:
+            if not self.recording:
+                self.missionDirectory = os.path.join(self.directory, datetime.now().strftime("mission_%Y%m%d_%H%M%S"))
+                os.makedirs(self.missionDirectory, exist_ok = True)
+                self.sensorLog = SENSOR_LOG_WRITER(os.path.join(self.missionDirectory, "sensors.csv"))
+                self.recording = True
+
+        return self.missionDirectory
+
+    def setMissionLog(self, missionLog):
+        """
+        PURPOSE
+
+        Sets the mission log that each recorded frame is logged in.
+
+        INPUT
+
+        - missionLog = the MISSION_LOG, or None to stop logging frames.
+
+        RETURNS
+
+        NONE
+        """
+        self.missionLog = missionLog
+
+    def addFrame(self, identifier, frame, frameRate = 0):
+        """
+        PURPOSE
+
+        Passes a captured frame to the encoder of its feed. Called from the capture thread and never blocks.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - frame = the captured image.
+        - frameRate = target frame rate of the feed (0 = as fast as the camera delivers frames).
+
+        RETURNS
+
+        - status = True if the frame was queued, False if it was dropped or nothing is being recorded.
+        """
+        with self.lock:
+            if not self.recording:
+                return False
+
+            encoder = self.encoders.get(identifier)
+            if encoder == None:
+                encoder = VIDEO_ENCODER(identifier, self.missionDirectory, frameRate if frameRate > 0 else self.defaultFrameRate, self)
+                encoder.start()
+                self.encoders[identifier] = encoder
+
+        position = encoder.addFrame(frame, time.time())
+
+        if position == None:
+            return False
+
+        if self.missionLog != None:
+            self.missionLog.addFrame(identifier, position)
+
+        return True
+
+    def addSensorReadings(self, readings):
+        """
+        PURPOSE
+
+        Saves a set of sensor readings with the time they were received.
+
+        INPUT
+
+        - readings = list of sensor readings.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            if self.recording:
+                self.sensorLog.addReadings(time.time(), readings)
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops recording, and waits for the encoders to write the frames still queued and close their files.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            if self.recording:
+                self.sensorLog.close()
+            self.recording = False
+            encoders = list(self.encoders.values())
+            self.encoders = {}
+
+        for encoder in encoders:
+            encoder.stop()
+        for encoder in encoders:
+            encoder.join()
+
+    def getStatistics(self):
+        """
+        PURPOSE
+
+        Returns how many frames of each feed have been written and dropped.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - statistics = dictionary of {identifier: (framesWritten, droppedFrames)}.
+        """
+        with self.lock:
+            return {identifier: (encoder.framesWritten, encoder.droppedFrames) for identifier, encoder in self.encoders.items()}
@@ -0,0 +1,566 @@
+import time
+import struct
+import traceback
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
+from threading import Thread, Lock
+from time import monotonic
+
+import numpy as np
+
+from libraries.camera.visionWorker import VISION_WORKER, reduceFrame
+
+class FRAME_RING():
+    """
+    PURPOSE
+
+    Ring of fixed size frame slots in shared memory, so frames can be passed to another process
+    by copying them into a slot and sending the slot number, instead of pickling the whole image.
+    """
+    def __init__(self, slotCount, slotSize, name = None):
+        """
+        PURPOSE
+
+        Class constructor. Creates the shared memory, or attaches to memory created by another process.
+
+        INPUT
+
+        - slotCount = number of frame slots.
+        - slotSize = size of each slot (bytes).
+        - name = name of the shared memory to attach to (None to create it).
+
+        RETURNS
+
+        NONE
+        """
+        self.slotCount = slotCount
+        self.slotSize = slotSize
+        self.owner = name == None
+
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create = True, size = slotCount * slotSize)
+        else:
+            self.memory = shared_memory.SharedMemory(name = name)
+
+        self.name = self.memory.name
+
+    def writeFrame(self, slot, frame):
+        """
+        PURPOSE
+
+        Copies a frame into a slot.
+
+        INPUT
+
+        - slot = slot number.
+        - frame = the image (8 bit, at most slotSize bytes).
+
+        RETURNS
+
+        NONE
+        """
+        view = np.ndarray(frame.shape, dtype = np.uint8, buffer = self.memory.buf, offset = slot * self.slotSize)
+        np.copyto(view, frame)
+
+    def readFrame(self, slot, shape):
+        """
+        PURPOSE
+
+        Returns a frame stored in a slot, without copying it.
+        The frame must be deleted before the ring is closed.
+
+        INPUT
+
+        - slot = slot number.
+        - shape = shape of the frame.
+
+        RETURNS
+
+        - frame = the image, backed by the shared memory.
+        """
+        return np.ndarray(shape, dtype = np.uint8, buffer = self.memory.buf, offset = slot * self.slotSize)
+
+    def close(self):
+        """
+        PURPOSE
+
+        Detaches from the shared memory, and frees it if this process created it.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.memory.close()
+        if self.owner:
+            try:
+                self.memory.unlink()
+            except:
+                pass
+
+class VISION_PROCESS():
+    """
+    PURPOSE
+
+    Runs the vision processing task of a camera feed in a child process, so algorithms that spend
+    time in Python (and hold the GIL) do not slow down the capture threads or the GUI thread, and
+    the processing of several feeds is spread across the CPU cores.
+
+    Has the same interface as VISION_WORKER. Frames are copied into a FRAME_RING in shared memory and
+    only the slot number is sent to the child. One frame is processed at a time: frames arriving while
+    the child is busy are skipped, so the child always starts on the newest frame. Results are returned
+    as compact packed structures and unpacked in this process.
+
+    TASK INTERFACE (IN ADDITION TO THE VISION_WORKER INTERFACE)
+
+    - packResult(result) = encodes a result returned by analyseFrame as bytes.
+    - unpackResult(data) = decodes the bytes back into the result.
+    - publishResult(result) = optional, sends the result to the rest of the program (called in this process,
+                              as signals emitted in the child process do not reach the GUI).
+    - scaleResult(result, scale) = optional, as for VISION_WORKER (frames are reduced in the child process).
+
+    The task class is created again in the child process, so it must be importable and take no arguments.
+    """
+    # DATABASE
+    # ONLY PROCESS EVERY NTH FRAME
+    frameInterval = 1
+    # RESULTS FROM FRAMES CAPTURED LONGER AGO THAN THIS ARE NOT DRAWN (SECONDS)
+    maxResultAge = 0.5
+    # SIZE FRAMES ARE ANALYSED AT, AND THE SMALLEST WIDTH THEY ARE REDUCED TO (SEE VISION_WORKER)
+    analysisScale = VISION_WORKER.analysisScale
+    minAnalysisWidth = VISION_WORKER.minAnalysisWidth
+    # LONGEST TIME TO WAIT FOR THE CHILD PROCESS TO FINISH ITS CURRENT FRAME WHEN STOPPING (SECONDS)
+    stopTimeout = 2
+    # NUMBER OF FRAME SLOTS IN SHARED MEMORY
+    slotCount = 2
+    # START THE CHILD AS A NEW INTERPRETER (FORKING A PROCESS RUNNING QT AND CAMERA THREADS IS NOT SAFE)
+    startMethod = 'spawn'
+    # FRAME CAPTURE TIME AND PROCESSING TIME (SECONDS) SENT BEFORE EACH PACKED RESULT
+    resultHeader = struct.Struct('<dd')
+
+    @classmethod
+    def supportsTask(cls, task):
+        """
+        PURPOSE
+
+        Checks whether a task can be run in a child process.
+
+        INPUT
+
+        - task = the class object of the processing algorithm.
+
+        RETURNS
+
+        - status = True if the task provides analyseFrame, drawResult, packResult and unpackResult.
+        """
+        return all(hasattr(task, name) for name in ['analyseFrame', 'drawResult', 'packResult', 'unpackResult'])
+
+    def __init__(self, task, statistics, frameInterval = None, maxResultAge = None, analysisScale = None):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - task = the class object of the processing algorithm.
+        - statistics = the FEED_STATISTICS of the camera feed, to record processing times in.
+        - frameInterval = only process every nth frame (if not given the default is used).
+        - maxResultAge = maximum age of a result that is still drawn (seconds, if not given the default is used).
+        - analysisScale = size to analyse frames at as a fraction of the captured size (if not given the task's own
+                          analysisScale, or the default, is used).
+
+        RETURNS
+
+        NONE
+        """
+        self.task = task
+        self.statistics = statistics
+
+        if frameInterval != None:
+            self.frameInterval = max(1, int(frameInterval))
+        if maxResultAge != None:
+            self.maxResultAge = maxResultAge
+        self.analysisScale = analysisScale if analysisScale != None else getattr(task, 'analysisScale', self.analysisScale)
+
+        self.frameCount = 0
+        self.runWorker = False
+        self.process = None
+        self.ring = None
+        self.nextSlot = 0
+
+        # THE CHILD IS BUSY FROM WHEN A FRAME IS SENT UNTIL ITS RESULT ARRIVES
+        self.sendLock = Lock()
+        self.busy = False
+
+        # NEWEST RESULT, THE TIME ITS FRAME WAS RECEIVED AND THE SIZE OF THAT FRAME
+        self.resultLock = Lock()
+        self.result = None
+        self.resultTime = 0
+        self.resultShape = None
+        self.pendingShape = None
+
+    def start(self):
+        """
+        PURPOSE
+
+        Starts the child process and the thread that receives its results.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        context = multiprocessing.get_context(self.startMethod)
+        self.frameReceiver, self.frameSender = context.Pipe(duplex = False)
+        self.resultReceiver, self.resultSender = context.Pipe(duplex = False)
+
+        self.process = context.Process(target = runVisionProcess, args = (type(self.task), self.frameReceiver, self.resultSender), daemon = True)
+        self.process.start()
+        self.runWorker = True
+
+        # ONLY THE CHILD USES THESE ENDS, SO THE RESULT THREAD SEES THE PIPE CLOSE IF THE CHILD ENDS
+        self.frameReceiver.close()
+        self.resultSender.close()
+
+        self.resultThread = Thread(target = self.receiveResults, daemon = True)
+        self.resultThread.start()
+
+    def addFrame(self, frame):
+        """
+        PURPOSE
+
+        Sends a live frame to the child process if it is not busy. Never blocks.
+
+        INPUT
+
+        - frame = the captured image.
+
+        RETURNS
+
+        NONE
+        """
+        self.frameCount += 1
+        if self.frameCount % self.frameInterval != 0:
+            return
+
+        with self.sendLock:
+            if not self.runWorker:
+                return
+
+            if self.busy:
+                self.statistics.addCount('skippedAnalyses')
+                return
+
+            try:
+                # MAKE A LARGER RING IF THE FRAME DOES NOT FIT (THE CHILD IS IDLE, SO THE OLD RING IS NOT IN USE)
+                if self.ring == None or frame.nbytes > self.ring.slotSize:
+                    self.replaceRing(frame.nbytes)
+
+                slot = self.nextSlot
+                self.nextSlot = (slot + 1) % self.ring.slotCount
+                self.ring.writeFrame(slot, frame)
+
+                self.pendingShape = frame.shape
+                self.frameSender.send(('frame', slot, frame.shape, monotonic(), self.analysisScale, self.minAnalysisWidth))
+                self.busy = True
+
+            except:
+                self.runWorker = False
+
+    def replaceRing(self, frameSize):
+        """
+        PURPOSE
+
+        Creates a new shared memory ring big enough for the frames, and tells the child process to use it.
+
+        INPUT
+
+        - frameSize = size of each frame (bytes).
+
+        RETURNS
+
+        NONE
+        """
+        oldRing = self.ring
+        self.ring = FRAME_RING(self.slotCount, frameSize)
+        self.nextSlot = 0
+        self.frameSender.send(('ring', self.ring.name, self.ring.slotCount, self.ring.slotSize))
+
+        if oldRing != None:
+            oldRing.close()
+
+    def drawResult(self, frame):
+        """
+        PURPOSE
+
+        Draws the newest result onto a live frame.
+
+        INPUT
+
+        - frame = the captured image.
+
+        RETURNS
+
+        - frame = the image to show (the unchanged frame if there is no recent result).
+        """
+        with self.resultLock:
+            result = self.result
+            resultTime = self.resultTime
+            resultShape = self.resultShape
+
+        # DO NOT DRAW RESULTS THAT ARE OUT OF DATE OR FROM A DIFFERENT RESOLUTION
+        if result is None or monotonic() - resultTime > self.maxResultAge or resultShape != frame.shape:
+            return frame
+
+        return self.task.drawResult(frame, result)
+
+    def receiveResults(self):
+        """
+        PURPOSE
+
+        Result thread. Unpacks each result sent back by the child process and passes it to the task,
+        until the child process ends.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        while True:
+            try:
+                data = self.resultReceiver.recv_bytes()
+            except:
+                break
+
+            frameTime, processTime = self.resultHeader.unpack_from(data)
+            payload = data[self.resultHeader.size:]
+
+            # AN EMPTY RESULT MEANS THE TASK FAILED ON THIS FRAME
+            if len(payload) > 0:
+                self.statistics.recordStage('process', processTime)
+                try:
+                    result = self.task.unpackResult(payload)
+                    with self.resultLock:
+                        self.result = result
+                        self.resultTime = frameTime
+                        self.resultShape = self.pendingShape
+
+                    if hasattr(self.task, 'publishResult'):
+                        self.task.publishResult(result)
+                except Exception:
+                    self.statistics.addCount('analysisErrors')
+            else:
+                self.statistics.addCount('analysisErrors')
+
+            with self.sendLock:
+                self.busy = False
+
+        with self.sendLock:
+            self.runWorker = False
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops the child process, waits for it and the result thread to end, and frees the shared memory.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.sendLock:
+            self.runWorker = False
+            try:
+                self.frameSender.send(('stop',))
+            except:
+                pass
+
+        if self.process != None:
+            self.process.join(self.stopTimeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.process = None
+
+            # THE RESULT THREAD ENDS ONCE THE CHILD HAS CLOSED ITS END OF THE PIPE
+            self.resultThread.join(self.stopTimeout)
+
+            self.frameSender.close()
+            self.resultReceiver.close()
+
+        with self.sendLock:
+            if self.ring != None:
+                self.ring.close()
+                self.ring = None
+
+def runVisionProcess(taskClass, frameReceiver, resultSender):
+    """
+    PURPOSE
+
+    Main loop of the child process. Runs the task on each frame sent to it and sends back the packed results.
+
+    INPUT
+
+    - taskClass = class of the processing algorithm (created in this process).
+    - frameReceiver = connection frames are sent through.
+    - resultSender = connection results are sent back through.
+
+    RETURNS
+
+    NONE
+    """
+    task = taskClass()
+    scaleResults = hasattr(task, 'scaleResult')
+    ring = None
+    errorReported = False
+
+    while True:
+        try:
+            message = frameReceiver.recv()
+        except:
+            break
+
+        if message[0] == 'stop':
+            break
+
+        elif message[0] == 'ring':
+            _, name, slotCount, slotSize = message
+            if ring != None:
+                ring.close()
+            ring = FRAME_RING(slotCount, slotSize, name)
+
+        elif message[0] == 'frame':
+            _, slot, shape, frameTime, analysisScale, minAnalysisWidth = message
+            startTime = time.perf_counter()
+            frame = None
+            reducedFrame = None
+
+            try:
+                frame = ring.readFrame(slot, shape)
+                if scaleResults:
+                    # ANALYSE A REDUCED COPY AND MAP THE RESULT BACK TO THE SIZE OF THE LIVE FRAME
+                    reducedFrame, scale = reduceFrame(frame, analysisScale, minAnalysisWidth)
+                    result = task.analyseFrame(reducedFrame)
+                    if scale != 1:
+                        result = task.scaleResult(result, 1 / scale)
+                else:
+                    result = task.analyseFrame(frame)
+                payload = task.packResult(result)
+            except Exception:
+                payload = b""
+                # PRINT THE FIRST FAILURE, LATER FAILURES ARE ONLY COUNTED BY THE MAIN PROGRAM
+                if not errorReported:
+                    errorReported = True
+                    print("Vision task {} failed (later failures are only counted):".format(taskClass.__name__))
+                    traceback.print_exc()
+            finally:
+                # RELEASE THE VIEW OF THE SHARED MEMORY, OTHERWISE THE RING CANNOT BE CLOSED WHEN IT IS REPLACED
+                del frame, reducedFrame
+
+            try:
+                resultSender.send_bytes(VISION_PROCESS.resultHeader.pack(frameTime, time.perf_counter() - startTime) + payload)
+            except:
+                break
+
+    if ring != None:
+        ring.close()
+
+def runBenchmark(processes, width = 1920, height = 1080, duration = 5):
+    """
+    PURPOSE
+
+    Runs the transect line task on synthetic frames, on either a VISION_WORKER thread or a VISION_PROCESS,
+    while the main thread runs a timer standing in for the GUI thread, and measures how many frames
+    are analysed and how late the timer runs.
+
+    INPUT
+
+    - processes = True to use a VISION_PROCESS, False to use a VISION_WORKER thread.
+    - width = width of the frames.
+    - height = height of the frames.
+    - duration = length of the benchmark (seconds).
+
+    RETURNS
+
+    - results = dictionary containing the frames analysed per second, the processing time summary (ms)
+                and the timer lateness summary (ms).
+    """
+    from libraries.camera.feedStatistics import FEED_STATISTICS
+    from libraries.camera.syntheticCamera import SYNTHETIC_CAMERA
+    from libraries.computer_vision.transectLineTask.transectLineAlgorithm_v1 import TRANSECT_LINE_TASK
+    from libraries.serial.linkStatistics import ROLLING_HISTOGRAM
+
+    camera = SYNTHETIC_CAMERA(width, height, 30)
+    statistics = FEED_STATISTICS()
+    task = TRANSECT_LINE_TASK()
+    worker = VISION_PROCESS(task, statistics) if processes else VISION_WORKER(task, statistics)
+    worker.start()
+
+    # WAIT FOR THE CHILD PROCESS TO START BEFORE TIMING
+    if processes:
+        _, frame = camera.read()
+        worker.addFrame(frame)
+        while worker.busy and worker.runWorker:
+            time.sleep(0.05)
+        statistics.reset()
+
+    # FEED FRAMES FROM A CAPTURE THREAD
+    runCapture = [True]
+    def captureLoop():
+        while runCapture[0]:
+            _, frame = camera.read()
+            worker.addFrame(frame)
+            worker.drawResult(frame)
+
+    captureThread = Thread(target = captureLoop, daemon = True)
+    captureThread.start()
+
+    # 10 MS TIMER ON THE MAIN THREAD
+    lateness = ROLLING_HISTOGRAM(100000)
+    interval = 0.01
+    endTime = monotonic() + duration
+    nextTime = monotonic() + interval
+    while nextTime < endTime:
+        time.sleep(max(0, nextTime - monotonic()))
+        lateness.addSample(1000 * (monotonic() - nextTime))
+        nextTime += interval
+
+    runCapture[0] = False
+    captureThread.join()
+    worker.stop()
+    camera.release()
+
+    snapshot = statistics.getSnapshot()
+    return {'analysisRate': snapshot['stages']['process']['count'] / duration,
+            'process': snapshot['stages']['process'],
+            'lateness': lateness.getSummary()}
+
+if __name__ == '__main__':
+    # EXAMPLE: python -m libraries.camera.visionProcess --width 1920 --height 1080 --duration 5
+    parser = argparse.ArgumentParser(description = "Compare running a vision task on a thread and in a child process.")
+    parser.add_argument('--width', type = int, default = 1920, help = "frame width")
+    parser.add_argument('--height', type = int, default = 1080, help = "frame height")
+    parser.add_argument('--duration', type = float, default = 5, help = "length of each run (seconds)")
+    args = parser.parse_args()
+
+    for processes in [False, True]:
+        results = runBenchmark(processes, args.width, args.height, args.duration)
+        print("\n{}".format("CHILD PROCESS (SHARED MEMORY)" if processes else "WORKER THREAD"))
+        print("  Frames analysed   {:6.1f} /s   (p50 {:.1f} ms)".format(results['analysisRate'], results['process']['p50'] or 0))
+        print("  Main thread timer late by p50 {:.2f} ms   p99 {:.2f} ms   max {:.2f} ms".format(
+              results['lateness']['p50'], results['lateness']['p99'], results['lateness']['max']))
@@ -0,0 +1,269 @@
+import traceback
+from threading import Thread, Condition, Lock
+from time import monotonic, perf_counter
+
+from cv2 import resize, INTER_AREA, INTER_LINEAR
+
+def reduceFrame(frame, analysisScale, minAnalysisWidth):
+    """
+    PURPOSE
+
+    Shrinks a frame to the size a vision task analyses it at.
+
+    The frame is halved until it is less than twice the target size and then resized the rest of the way.
+    Halving with linear interpolation averages each 2x2 block of pixels, which gives the same image as
+    area interpolation in a fraction of the time.
+
+    INPUT
+
+    - frame = the captured image.
+    - analysisScale = size to analyse frames at, as a fraction of the captured size (1 = full size).
+    - minAnalysisWidth = frames are not shrunk below this width (pixels).
+
+    RETURNS
+
+    - frame = the reduced image (the same image if it is not reduced).
+    - scale = the width of the reduced image divided by the width of the original.
+    """
+    height, width = frame.shape[:2]
+    scale = max(analysisScale, min(1, minAnalysisWidth / width))
+
+    if scale >= 1:
+        return frame, 1
+
+    reducedWidth = round(width * scale)
+    reducedHeight = round(height * scale)
+    reducedFrame = frame
+
+    while reducedFrame.shape[1] >= 2 * reducedWidth and reducedFrame.shape[0] >= 2 * reducedHeight:
+        reducedFrame = resize(reducedFrame, (reducedFrame.shape[1] // 2, reducedFrame.shape[0] // 2), interpolation = INTER_LINEAR)
+
+    if reducedFrame.shape[:2] != (reducedHeight, reducedWidth):
+        reducedFrame = resize(reducedFrame, (reducedWidth, reducedHeight), interpolation = INTER_AREA)
+
+    return reducedFrame, reducedWidth / width
+
+class VISION_WORKER(Thread):
+    """
+    PURPOSE
+
+    Sub-thread that runs the vision processing task of a camera feed, so a slow algorithm does not
+    hold up the capture thread and the feed keeps playing at its full frame rate.
+
+    Frames are handed over through a single slot that always holds the newest frame, so the task
+    always processes the most recent frame and never works through a backlog. The newest result is
+    drawn onto every live frame until a newer result arrives, or until it is older than maxResultAge.
+
+    TASK INTERFACE
+
+    - analyseFrame(frame) = processes a frame and returns the result (such as line positions).
+    - drawResult(frame, result) = returns a copy of a frame with the result drawn on it.
+    - scaleResult(result, scale) = optional, returns the result with its coordinates multiplied by scale.
+
+    Tasks with scaleResult are analysed on a copy of the frame reduced to analysisScale (a task can set its own
+    analysisScale), and the result is scaled back to the size of the live frame before it is drawn.
+
+    Tasks that only provide runAlgorithm(frame) are also supported. Their processed frame is shown
+    in place of the live frame while it is newer than maxResultAge.
+
+    Frames the task fails on are counted in the feed statistics (analysisErrors), and the first failure is printed.
+    """
+    # DATABASE
+    # ONLY PROCESS EVERY NTH FRAME (1 = EVERY FRAME THE WORKER IS READY FOR)
+    frameInterval = 1
+    # RESULTS FROM FRAMES CAPTURED LONGER AGO THAN THIS ARE NOT DRAWN (SECONDS)
+    maxResultAge = 0.5
+    # SIZE FRAMES ARE ANALYSED AT AS A FRACTION OF THE CAPTURED SIZE, UNLESS THE TASK SETS ITS OWN
+    analysisScale = 1
+    # FRAMES ARE NOT REDUCED BELOW THIS WIDTH FOR ANALYSIS (PIXELS)
+    minAnalysisWidth = 320
+    # LONGEST TIME TO WAIT FOR THE TASK TO FINISH ITS CURRENT FRAME WHEN STOPPING (SECONDS)
+    stopTimeout = 2
+
+    def __init__(self, task, statistics, frameInterval = None, maxResultAge = None, analysisScale = None):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - task = the class object of the processing algorithm.
+        - statistics = the FEED_STATISTICS of the camera feed, to record processing times in.
+        - frameInterval = only process every nth frame (if not given the default is used).
+        - maxResultAge = maximum age of a result that is still drawn (seconds, if not given the default is used).
+        - analysisScale = size to analyse frames at as a fraction of the captured size (if not given the task's own
+                          analysisScale, or the default, is used).
+
+        RETURNS
+
+        NONE
+        """
+        Thread.__init__(self, daemon = True)
+        self.task = task
+        self.statistics = statistics
+
+        if frameInterval != None:
+            self.frameInterval = max(1, int(frameInterval))
+        if maxResultAge != None:
+            self.maxResultAge = maxResultAge
+        self.analysisScale = analysisScale if analysisScale != None else getattr(task, 'analysisScale', self.analysisScale)
+
+        self.separateResults = hasattr(task, 'analyseFrame') and hasattr(task, 'drawResult')
+        self.scaleResults = self.separateResults and hasattr(task, 'scaleResult')
+        self.runWorker = True
+        self.frameCount = 0
+        self.errorReported = False
+
+        # NEWEST FRAME WAITING TO BE PROCESSED, AND THE TIME IT WAS RECEIVED
+        self.frameCondition = Condition()
+        self.frame = None
+        self.frameTime = 0
+
+        # NEWEST RESULT, THE TIME ITS FRAME WAS RECEIVED AND THE SIZE OF THAT FRAME
+        self.resultLock = Lock()
+        self.result = None
+        self.resultTime = 0
+        self.resultShape = None
+
+    def addFrame(self, frame):
+        """
+        PURPOSE
+
+        Passes a live frame to the worker, replacing any frame it has not started on yet. Never blocks.
+
+        INPUT
+
+        - frame = the captured image (must not be changed afterwards).
+
+        RETURNS
+
+        NONE
+        """
+        self.frameCount += 1
+        if self.frameCount % self.frameInterval != 0:
+            return
+
+        with self.frameCondition:
+            if self.frame is not None:
+                self.statistics.addCount('skippedAnalyses')
+            self.frame = frame
+            self.frameTime = monotonic()
+            self.frameCondition.notify()
+
+    def drawResult(self, frame):
+        """
+        PURPOSE
+
+        Draws the newest result onto a live frame.
+
+        INPUT
+
+        - frame = the captured image.
+
+        RETURNS
+
+        - frame = the image to show (the unchanged frame if there is no recent result).
+        """
+        with self.resultLock:
+            result = self.result
+            resultTime = self.resultTime
+            resultShape = self.resultShape
+
+        # DO NOT DRAW RESULTS THAT ARE OUT OF DATE OR FROM A DIFFERENT RESOLUTION
+        if result is None or monotonic() - resultTime > self.maxResultAge or resultShape != frame.shape:
+            return frame
+
+        if self.separateResults:
+            return self.task.drawResult(frame, result)
+
+        return result
+
+    def run(self):
+        """
+        PURPOSE
+
+        Processes the newest frame whenever one is waiting, until stopped.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        while self.runWorker:
+            with self.frameCondition:
+                while self.frame is None and self.runWorker:
+                    self.frameCondition.wait()
+                frame = self.frame
+                frameTime = self.frameTime
+                self.frame = None
+
+            if not self.runWorker:
+                break
+
+            startTime = perf_counter()
+            try:
+                if self.scaleResults:
+                    # ANALYSE A REDUCED COPY AND MAP THE RESULT BACK TO THE SIZE OF THE LIVE FRAME
+                    reducedFrame, scale = reduceFrame(frame, self.analysisScale, self.minAnalysisWidth)
+                    result = self.task.analyseFrame(reducedFrame)
+                    if scale != 1:
+                        result = self.task.scaleResult(result, 1 / scale)
+                elif self.separateResults:
+                    result = self.task.analyseFrame(frame)
+                else:
+                    result = self.task.runAlgorithm(frame)
+            except Exception:
+                self.reportError()
+                continue
+            self.statistics.recordStage('process', perf_counter() - startTime)
+
+            with self.resultLock:
+                self.result = result
+                self.resultTime = frameTime
+                self.resultShape = frame.shape
+
+    def reportError(self):
+        """
+        PURPOSE
+
+        Counts a frame the task failed on, and prints the first failure so a broken task does not fill the terminal.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.statistics.addCount('analysisErrors')
+
+        if not self.errorReported:
+            self.errorReported = True
+            print("Vision task {} failed (later failures are only counted):".format(type(self.task).__name__))
+            traceback.print_exc()
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops the worker and waits for it to finish the frame it is processing (for at most stopTimeout).
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.frameCondition:
+            self.runWorker = False
+            self.frameCondition.notify()
+
+        if self.is_alive():
+            self.join(self.stopTimeout)
@@ -7,6 +7,21 @@ must be called inside this function.
 Data from the algorithm such as positional data to control the ROV can be sent back to the
 main program via emitting the transmitData signal (using the sendData function).
 
+Tasks run on a background thread so the camera feed keeps its full frame rate. To draw the newest
+result on every live frame (instead of showing the processed frames at the algorithm's rate),
+also define analyseFrame(frame), which returns the result, and drawResult(frame, result), which
+returns a copy of the frame with the result drawn on it (see TRANSECT_LINE_TASK).
+
+Tasks that also define scaleResult(result, scale), which multiplies the coordinates in a result by scale,
+are analysed on a copy of each frame reduced to the task's analysisScale (such as 0.25 for a quarter of the
+captured size), which makes edge detection and Hough transforms much cheaper on high resolution feeds.
+The result is scaled back to the size of the live frame before drawResult is called.
+
+Tasks that also define packResult(result) and unpackResult(data), which convert the result to and
+from bytes, are run in a separate process so they do not compete with the GUI for the Python
+interpreter. Signals emitted there do not reach the main program, so send data from
+publishResult(result), which is called in the main program with each result.
+
 All the processing functions must be defined inside the TASK_NAME class.
 """
 
@@ -2,6 +2,7 @@
 from cv2 import CAP_DSHOW, cvtColor, COLOR_BGR2HSV, inRange, Canny, fillPoly, bitwise_and, HoughLinesP, line, addWeighted, VideoCapture, CAP_PROP_FRAME_WIDTH, CAP_PROP_FRAME_HEIGHT, waitKey, flip, imshow
 import numpy as np
 import math
+import struct
 import sys
 import time
 
@@ -16,9 +17,21 @@ class TRANSECT_LINE_TASK(QObject):
 
     transmitData = pyqtSignal(str)
 
+    # DATABASE
+    # HSV COLOUR RANGES OF THE BLUE AND RED LINES
+    lower_blue = np.array([30, 40, 0], dtype="uint8")
+    upper_blue = np.array([150, 255, 255], dtype="uint8")
+    lower_red = np.array([0, 120, 70], dtype="uint8")
+    upper_red = np.array([10, 255, 255], dtype="uint8")
+    # FRAMES ARE ANALYSED AT A QUARTER OF THE CAPTURED SIZE (480x270 AT 1080p), AS THE LINE ANGLES DO NOT NEED MORE DETAIL
+    analysisScale = 0.25
+
     def __init__(self):
         QObject.__init__(self)
 
+        # REGION OF INTEREST MASK FOR EACH FRAME SIZE, SO IT IS ONLY DRAWN ONCE
+        self.roi_masks = {}
+
     def runAlgorithm(self, frame):
         """
         PURPOSE
@@ -34,13 +47,34 @@ class TRANSECT_LINE_TASK(QObject):
 
         NONE
         """
-        edges = self.detect_edges(frame)
+        return self.drawResult(frame, self.analyseFrame(frame))
+
+    def analyseFrame(self, frame):
+        """
+        PURPOSE
+
+        Finds the transect lines and the steering angle in a camera frame.
+        Transmits required data to main program.
+        Called on the vision worker thread when the task runs in the background.
+
+        INPUT
+
+        - frame = camera frame to process.
+
+        RETURNS
+
+        - result = (lane lines, steering angle) to pass to drawResult.
+        """
+        # CONVERT TO HSV ONCE FOR BOTH COLOUR FILTERS
+        hsv = self.convert_to_hsv(frame)
+
+        edges = self.detect_edges(hsv)
         
         roi = self.region_of_interest(edges)
         
         line_segments = self.detect_line_segments(roi)
         
-        edges_2 = self.detect_red_edges(frame)
+        edges_2 = self.detect_red_edges(hsv)
         
         roi_2 = self.region_of_interest(edges_2)
         
@@ -48,11 +82,30 @@ class TRANSECT_LINE_TASK(QObject):
         
         lane_lines = self.average_slope_intercept(frame, line_segments)
         
-        lane_lines_image = self.display_lines(frame, lane_lines)
-        
         steering_angle = self.get_steering_angle(frame, lane_lines)
-        
-        heading_image = self.display_heading_line(lane_lines_image, steering_angle)
+
+        result = (lane_lines, steering_angle)
+
+        self.publishResult(result)
+
+        return result
+
+    def publishResult(self, result):
+        """
+        PURPOSE
+
+        Sends the steering direction found by analyseFrame back to the main program.
+        Called in the main program when the task runs in a separate process.
+
+        INPUT
+
+        - result = (lane lines, steering angle) returned by analyseFrame.
+
+        RETURNS
+
+        NONE
+        """
+        _, steering_angle = result
 
         # CALCULATE STEERING DATA
         deviation = steering_angle - 90
@@ -71,6 +124,89 @@ class TRANSECT_LINE_TASK(QObject):
         # SEND DATA BACK TO PROGRAM
         self.sendData(data)
 
+    def packResult(self, result):
+        """
+        PURPOSE
+
+        Encodes a result as a compact structure, to send it from the vision process to the main program.
+
+        INPUT
+
+        - result = (lane lines, steering angle) returned by analyseFrame.
+
+        RETURNS
+
+        - data = steering angle and number of lines (int16, uint8), then the end points of each line (4 x int32).
+        """
+        lane_lines, steering_angle = result
+
+        data = struct.pack('<hB', steering_angle, len(lane_lines))
+        for lane_line in lane_lines:
+            data += struct.pack('<4i', *lane_line[0])
+
+        return data
+
+    def unpackResult(self, data):
+        """
+        PURPOSE
+
+        Decodes a result encoded by packResult.
+
+        INPUT
+
+        - data = the encoded result.
+
+        RETURNS
+
+        - result = (lane lines, steering angle).
+        """
+        steering_angle, line_count = struct.unpack_from('<hB', data)
+        lane_lines = [[list(struct.unpack_from('<4i', data, 3 + 16 * number))] for number in range(line_count)]
+
+        return lane_lines, steering_angle
+
+    def scaleResult(self, result, scale):
+        """
+        PURPOSE
+
+        Maps a result found on a reduced copy of a frame back to the size of the live frame.
+
+        INPUT
+
+        - result = (lane lines, steering angle) returned by analyseFrame.
+        - scale = size of the live frame divided by the size of the analysed frame.
+
+        RETURNS
+
+        - result = (lane lines, steering angle) with the end points of the lines scaled (the angle does not change).
+        """
+        lane_lines, steering_angle = result
+        lane_lines = [[[int(round(point * scale)) for point in lane_line[0]]] for lane_line in lane_lines]
+
+        return lane_lines, steering_angle
+
+    def drawResult(self, frame, result):
+        """
+        PURPOSE
+
+        Draws the transect lines and heading found by analyseFrame onto a camera frame.
+        The frame does not need to be the one that was analysed, so the newest result can be drawn on every live frame.
+
+        INPUT
+
+        - frame = camera frame to draw on.
+        - result = (lane lines, steering angle) returned by analyseFrame.
+
+        RETURNS
+
+        - heading_image = copy of the frame with the lines drawn on it.
+        """
+        lane_lines, steering_angle = result
+
+        lane_lines_image = self.display_lines(frame, lane_lines)
+        
+        heading_image = self.display_heading_line(lane_lines_image, steering_angle)
+
         return heading_image
 
     def sendData(self, data):
@@ -93,44 +229,54 @@ class TRANSECT_LINE_TASK(QObject):
     ### ALGORITHM FUNCTIONS ###
     ###########################
 
-    def detect_edges(self, frame):
+    def convert_to_hsv(self, frame):
+        # shared by the blue and red filters, so each frame is only converted once
+        return cvtColor(frame, COLOR_BGR2HSV)
+
+    def detect_edges(self, hsv):
         # filter for blue lane lines
-        hsv = cvtColor(frame, COLOR_BGR2HSV)
-        lower_blue = np.array([30, 40, 0], dtype="uint8")
-        upper_blue = np.array([150, 255, 255], dtype="uint8")
         # blue color mask
-        mask_blue = inRange(hsv, lower_blue, upper_blue)
+        mask_blue = inRange(hsv, self.lower_blue, self.upper_blue)
         # detect edges
         edges = Canny(mask_blue, 200, 400)
 
         return edges
 
-    def detect_red_edges(self, frame):
-        hsv = cvtColor(frame, COLOR_BGR2HSV)
+    def detect_red_edges(self, hsv):
         # filter for red lines
-        lower_red = np.array([0, 120, 70])
-        upper_red = np.array([10, 255, 255])
         # red mask
-        mask_red = inRange(hsv, lower_red, upper_red)
+        mask_red = inRange(hsv, self.lower_red, self.upper_red)
         edges_red = Canny(mask_red, 50, 100)
         return edges_red
 
-    def region_of_interest(self, edges):
-        height, width = edges.shape  # extract the height and width of the edges frame
-        mask = np.zeros_like(edges)  # make an empty matrix with same dimensions of the edges frame
+    def get_roi_mask(self, shape):
+        # masks are cached by frame size, so they are only drawn the first time a size is seen
+        mask = self.roi_masks.get(shape)
+
+        if mask is None:
+            height, width = shape
+            mask = np.zeros(shape, dtype=np.uint8)  # make an empty matrix with same dimensions of the edges frame
+
+            # only focus lower half of the screen
+            # specify the coordinates of 4 points (lower left, upper left, upper right, lower right)
+            polygon = np.array([[
+                (0, height),
+                (0, height / 2),
+                (width, height / 2),
+                (width, height),
+            ]], np.int32)
+
+            fillPoly(mask, polygon, 255)  # fill the polygon with blue color
+
+            self.roi_masks[shape] = mask
 
-        # only focus lower half of the screen
-        # specify the coordinates of 4 points (lower left, upper left, upper right, lower right)
-        polygon = np.array([[
-            (0, height),
-            (0, height / 2),
-            (width, height / 2),
-            (width, height),
-        ]], np.int32)
+        return mask
 
-        fillPoly(mask, polygon, 255)  # fill the polygon with blue color
+    def region_of_interest(self, edges):
+        mask = self.get_roi_mask(edges.shape)
 
-        cropped_edges = bitwise_and(edges, mask)
+        # the edges are not used again, so they are cropped in place
+        cropped_edges = bitwise_and(edges, mask, dst=edges)
         # imshow("roi",cropped_edges)  take the edged frame as parameter and draws a polygon with 4 preset points
 
         return cropped_edges
@@ -153,37 +299,30 @@ class TRANSECT_LINE_TASK(QObject):
             return lane_lines
 
         height, width, _ = frame.shape
-        left_fit = []
-        right_fit = []
 
         boundary = 1 / 3
         left_region_boundary = width * (1 - boundary)
         right_region_boundary = width * boundary
 
-        for line_segment in line_segments:
-            for x1, y1, x2, y2 in line_segment:
-                if x1 == x2:
-                    print("skipping vertical lines (slope = infinity")
-                    continue
-
-                fit = np.polyfit((x1, x2), (y1, y2), 1)
-                slope = (y2 - y1) / (x2 - x1)
-                intercept = y1 - (slope * x1)
-
-                if slope < 0:
-                    if x1 < left_region_boundary and x2 < left_region_boundary:
-                        left_fit.append((slope, intercept))
-                else:
-                    if x1 > right_region_boundary and x2 > right_region_boundary:
-                        right_fit.append((slope, intercept))
-
-        left_fit_average = np.average(left_fit, axis=0)
-        if len(left_fit) > 0:
-            lane_lines.append(self.make_points(frame, left_fit_average))
-
-        right_fit_average = np.average(right_fit, axis=0)
-        if len(right_fit) > 0:
-            lane_lines.append(self.make_points(frame, right_fit_average))
+        # one row (x1, y1, x2, y2) per segment, whether HoughLinesP returned (N, 1, 4) or (N, 4)
+        segments = np.asarray(line_segments, dtype=np.float64).reshape(-1, 4)
+
+        # skip vertical lines (slope = infinity)
+        segments = segments[segments[:, 0] != segments[:, 2]]
+        x1, y1, x2, y2 = segments.T
+
+        slope = (y2 - y1) / (x2 - x1)
+        intercept = y1 - (slope * x1)
+
+        # left lines slope down to the right and lie in the left two thirds, right lines the opposite
+        left = (slope < 0) & (x1 < left_region_boundary) & (x2 < left_region_boundary)
+        right = (slope >= 0) & (x1 > right_region_boundary) & (x2 > right_region_boundary)
+
+        if left.any():
+            lane_lines.append(self.make_points(frame, (slope[left].mean(), intercept[left].mean())))
+
+        if right.any():
+            lane_lines.append(self.make_points(frame, (slope[right].mean(), intercept[right].mean())))
 
         return lane_lines
 
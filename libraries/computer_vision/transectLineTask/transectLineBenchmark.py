@@ -0,0 +1,256 @@
+import time
+import argparse
+
+import numpy as np
+from cv2 import line
+
+from libraries.camera.visionWorker import VISION_WORKER, reduceFrame
+from libraries.computer_vision.transectLineTask.transectLineAlgorithm_v1 import TRANSECT_LINE_TASK
+
+def createLineImage(width = 640, height = 480):
+    """
+    PURPOSE
+
+    Draws a synthetic transect image: two blue lines converging towards the top of the frame.
+
+    INPUT
+
+    - width = width of the image.
+    - height = height of the image.
+
+    RETURNS
+
+    - frame = the image.
+    - lines = the two lines as (x1, y1, x2, y2) in the lower half of the image.
+    """
+    frame = np.full((height, width, 3), 40, dtype = np.uint8)
+    lines = [(width // 10, height, width * 4 // 10, height // 2),
+             (width * 9 // 10, height, width * 6 // 10, height // 2)]
+
+    for x1, y1, x2, y2 in lines:
+        line(frame, (x1, y1), (x2, y2), (255, 0, 0), 6)
+
+    return frame, lines
+
+def createSegments(lines, segmentCount, width, height, seed = 0):
+    """
+    PURPOSE
+
+    Creates line segments in the format returned by HoughLinesP, as pieces of the transect lines
+    with a few pixels of noise, plus stray and vertical segments.
+
+    INPUT
+
+    - lines = the lines in the image, as (x1, y1, x2, y2).
+    - segmentCount = number of segments to create.
+    - width = width of the image.
+    - height = height of the image.
+    - seed = random seed, so every run uses the same segments.
+
+    RETURNS
+
+    - segments = int32 array of shape (segmentCount, 1, 4).
+    """
+    generator = np.random.default_rng(seed)
+    segments = np.empty((segmentCount, 4))
+
+    # MOST SEGMENTS LIE ALONG ONE OF THE LINES
+    lineNumbers = generator.integers(0, len(lines), segmentCount)
+    starts = generator.uniform(0, 0.9, segmentCount)
+    ends = np.minimum(starts + generator.uniform(0.05, 0.3, segmentCount), 1)
+    for number, (x1, y1, x2, y2) in enumerate(lines):
+        selected = lineNumbers == number
+        segments[selected, 0] = x1 + (x2 - x1) * starts[selected]
+        segments[selected, 1] = y1 + (y2 - y1) * starts[selected]
+        segments[selected, 2] = x1 + (x2 - x1) * ends[selected]
+        segments[selected, 3] = y1 + (y2 - y1) * ends[selected]
+    segments += generator.normal(0, 2, segments.shape)
+
+    # ONE IN TEN IS A STRAY SEGMENT, AND ONE IN FIFTY IS VERTICAL
+    stray = generator.random(segmentCount) < 0.1
+    segments[stray] = generator.uniform([0, height / 2, 0, height / 2], [width, height, width, height], (stray.sum(), 4))
+    vertical = generator.random(segmentCount) < 0.02
+    segments[vertical, 2] = segments[vertical, 0]
+
+    segments = np.clip(np.round(segments), 0, [width - 1, height - 1, width - 1, height - 1])
+
+    return segments.astype(np.int32).reshape(-1, 1, 4)
+
+def averageSlopeInterceptLoop(task, frame, line_segments):
+    """
+    PURPOSE
+
+    The previous implementation of TRANSECT_LINE_TASK.average_slope_intercept, which fits one segment at a time
+    (without its print statements). Kept to compare the speed and results of the vectorised version.
+
+    INPUT
+
+    - task = the TRANSECT_LINE_TASK.
+    - frame = the camera frame.
+    - line_segments = segments returned by HoughLinesP.
+
+    RETURNS
+
+    - lane_lines = the left and right lines found.
+    """
+    lane_lines = []
+
+    if line_segments is None or len(line_segments) == 2:
+        return lane_lines
+
+    height, width, _ = frame.shape
+    left_fit = []
+    right_fit = []
+
+    boundary = 1 / 3
+    left_region_boundary = width * (1 - boundary)
+    right_region_boundary = width * boundary
+
+    for line_segment in line_segments:
+        for x1, y1, x2, y2 in line_segment:
+            if x1 == x2:
+                continue
+
+            fit = np.polyfit((x1, x2), (y1, y2), 1)
+            slope = (y2 - y1) / (x2 - x1)
+            intercept = y1 - (slope * x1)
+
+            if slope < 0:
+                if x1 < left_region_boundary and x2 < left_region_boundary:
+                    left_fit.append((slope, intercept))
+            else:
+                if x1 > right_region_boundary and x2 > right_region_boundary:
+                    right_fit.append((slope, intercept))
+
+    if len(left_fit) > 0:
+        lane_lines.append(task.make_points(frame, np.average(left_fit, axis = 0)))
+
+    if len(right_fit) > 0:
+        lane_lines.append(task.make_points(frame, np.average(right_fit, axis = 0)))
+
+    return lane_lines
+
+def timeFunction(function, repeats):
+    """
+    PURPOSE
+
+    Times a function over a number of calls.
+
+    INPUT
+
+    - function = function to call with no arguments.
+    - repeats = number of calls.
+
+    RETURNS
+
+    - callTime = median time per call (ms).
+    - result = what the function returned.
+    """
+    times = []
+    for _ in range(repeats):
+        startTime = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - startTime)
+
+    return 1000 * sorted(times)[len(times) // 2], result
+
+def runBenchmark(segmentCounts = (50, 500, 5000), width = 640, height = 480, repeats = 50):
+    """
+    PURPOSE
+
+    Times the per-frame cost of fitting the transect lines to different numbers of Hough segments,
+    with the previous loop and the vectorised TRANSECT_LINE_TASK.average_slope_intercept.
+
+    INPUT
+
+    - segmentCounts = numbers of segments to time.
+    - width = width of the synthetic image.
+    - height = height of the synthetic image.
+    - repeats = number of times each case is run.
+
+    RETURNS
+
+    - results = list of (segment count, loop time (ms), vectorised time (ms), True if both found the same lines).
+    """
+    task = TRANSECT_LINE_TASK()
+    frame, lines = createLineImage(width, height)
+    results = []
+
+    for segmentCount in segmentCounts:
+        segments = createSegments(lines, segmentCount, width, height)
+
+        loopTime, loopLines = timeFunction(lambda: averageSlopeInterceptLoop(task, frame, segments), repeats)
+        vectorTime, vectorLines = timeFunction(lambda: task.average_slope_intercept(frame, segments), repeats)
+
+        results.append((segmentCount, loopTime, vectorTime, loopLines == vectorLines))
+
+    return results
+
+def runPipelineBenchmark(width = 1920, height = 1080, repeats = 50, analysisScale = 1):
+    """
+    PURPOSE
+
+    Times the whole transect line analysis (colour conversion, edge detection, Hough transform and line fitting)
+    on a synthetic frame, reduced to the analysis scale in the same way as the vision worker.
+
+    INPUT
+
+    - width = width of the synthetic frame.
+    - height = height of the synthetic frame.
+    - repeats = number of frames analysed.
+    - analysisScale = size the frame is analysed at as a fraction of its full size.
+
+    RETURNS
+
+    - frameTime = median time per frame, including reducing the frame and scaling the result back (ms).
+    - result = (lane lines, steering angle) in the coordinates of the full size frame.
+    """
+    task = TRANSECT_LINE_TASK()
+    frame, _ = createLineImage(width, height)
+
+    def analyseFrame():
+        reducedFrame, scale = reduceFrame(frame, analysisScale, VISION_WORKER.minAnalysisWidth)
+        return task.scaleResult(task.analyseFrame(reducedFrame), 1 / scale)
+
+    # THE FIRST FRAME OF EACH SIZE ALSO DRAWS THE REGION OF INTEREST MASK
+    analyseFrame()
+
+    return timeFunction(analyseFrame, repeats)
+
+def printResults(results):
+    """
+    PURPOSE
+
+    Prints the benchmark results.
+
+    INPUT
+
+    - results = list returned by runBenchmark.
+
+    RETURNS
+
+    NONE
+    """
+    print("{:>10}  {:>12}  {:>14}  {:>8}  {}".format("Segments", "Loop (ms)", "Vectorised (ms)", "Speedup", "Same lines"))
+    for segmentCount, loopTime, vectorTime, match in results:
+        print("{:>10}  {:>12.3f}  {:>14.3f}  {:>7.0f}x  {}".format(segmentCount, loopTime, vectorTime, loopTime / vectorTime, "yes" if match else "NO"))
+
+if __name__ == '__main__':
+    # EXAMPLE: python -m libraries.computer_vision.transectLineTask.transectLineBenchmark --segments 50 500 5000
+    parser = argparse.ArgumentParser(description = "Time the transect line fitting for different numbers of Hough segments, and the full analysis of a frame.")
+    parser.add_argument('--segments', type = int, nargs = '+', default = [50, 500, 5000], help = "numbers of segments")
+    parser.add_argument('--width', type = int, default = 640, help = "width of the synthetic image")
+    parser.add_argument('--height', type = int, default = 480, help = "height of the synthetic image")
+    parser.add_argument('--repeats', type = int, default = 50, help = "number of times each case is run")
+    parser.add_argument('--scale', type = float, default = TRANSECT_LINE_TASK.analysisScale, help = "analysis scale to compare with full resolution")
+    args = parser.parse_args()
+
+    printResults(runBenchmark(args.segments, args.width, args.height, args.repeats))
+
+    print()
+    print("{:>10}  {:>10}  {:>12}  {:>8}  {:>12}".format("Frame", "Full (ms)", "Scaled (ms)", "Speedup", "Angles"))
+    for width, height in [(640, 360), (1280, 720), (1920, 1080)]:
+        fullTime, (_, fullAngle) = runPipelineBenchmark(width, height, args.repeats)
+        scaledTime, (_, scaledAngle) = runPipelineBenchmark(width, height, args.repeats, args.scale)
+        print("{:>10}  {:>10.1f}  {:>12.1f}  {:>7.1f}x  {:>5} / {:<5}".format("{}x{}".format(width, height), fullTime, scaledTime,
+                                                                            fullTime / scaledTime, fullAngle, scaledAngle))
@@ -247,6 +247,8 @@ class READ_CONFIG_FILE():
         - cameraLabels = array containing the name label of each camera.
         - cameraAddresses = array containing the source address of each camera.
         - defaultCameraList = array containing the default camera for each camera feed.
+        - cameraResolutions = array containing the resolution menu index of each camera feed.
+        - cameraFrameRates = array containing the frame rate menu index of each camera feed (empty if not saved).
         """
         try:
             child = self.root.find('digital_cameras')
@@ -256,6 +258,7 @@ class READ_CONFIG_FILE():
             cameraAddresses = []
             defaultCameraList = []
             cameraResolutions = []
+            cameraFrameRates = []
 
             for camera in child:
 
@@ -286,7 +289,12 @@ class READ_CONFIG_FILE():
                     for item in camera:
                         cameraResolutions.append(int(item.text))
 
-            return cameraNumber, cameraLabels, cameraAddresses, defaultCameraList, cameraResolutions
+                # FRAME RATES
+                if camera.tag == 'frame_rate':
+                    for item in camera:
+                        cameraFrameRates.append(int(item.text))
+
+            return cameraNumber, cameraLabels, cameraAddresses, defaultCameraList, cameraResolutions, cameraFrameRates
              
         except:
             return
@@ -521,7 +529,7 @@ class WRITE_CONFIG_FILE():
         except:
             pass
 
-    def saveDigitalCamera(self, digitalCameraNumber, digitalCameraLabelList, digitalCameraAddressList, digitalDefaultCameraList, digitalResolutionsList):
+    def saveDigitalCamera(self, digitalCameraNumber, digitalCameraLabelList, digitalCameraAddressList, digitalDefaultCameraList, digitalResolutionsList, digitalFrameRatesList):
         """
         PURPOSE
 
@@ -533,6 +541,8 @@ class WRITE_CONFIG_FILE():
         - digitalCameraLabels = array containing the label for each digital camera.
         - digitalCameraAddressList = array containing the source address of each camera.
         - digitalDefaultCameraList = array containing the default digital camera for each feed.
+        - digitalResolutionsList = array containing the resolution menu index of each feed.
+        - digitalFrameRatesList = array containing the frame rate menu index of each feed.
         
         RETURNS
 
@@ -564,6 +574,11 @@ class WRITE_CONFIG_FILE():
             for index, resolution in enumerate(digitalResolutionsList):
                 SubElement(cameraResolutions, "feed{}".format(index)).text = str(resolution)
 
+            # CAMERA FEED FRAME RATES
+            cameraFrameRates = SubElement(digital, "frame_rate")
+            for index, frameRate in enumerate(digitalFrameRatesList):
+                SubElement(cameraFrameRates, "feed{}".format(index)).text = str(frameRate)
+
         except:
             pass
 
@@ -0,0 +1,313 @@
+from threading import Lock
+from time import perf_counter
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtCore import Qt, QRect, QPoint, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QPainter, QImage, QRegion, QColor, QFont
+
+class CAMERA_VIEW(QWidget):
+    """
+    PURPOSE
+
+    Lightweight widget that displays a camera feed by drawing the newest frame directly in paintEvent.
+    Unlike QLabel.setPixmap, showing a frame does not convert it to a pixmap or trigger a relayout, so the
+    GUI thread only has to draw one image per frame.
+
+    Frames are handed over from the capture thread through a single slot that always holds the newest frame,
+    so at most one frame per feed is ever waiting to be drawn, however slow the GUI thread is.
+    Frames are not drawn while the widget is hidden (for example when another tab is open).
+
+    An optional overlay shows text (such as the feed statistics) in the corner of the frame.
+    """
+    # SIGNAL EMITTED FROM THE CAPTURE THREAD WHEN A NEW FRAME IS WAITING
+    frameReadySignal = pyqtSignal()
+
+    # DATABASE
+    # POSITION OF THE FRAME IN THE WIDGET
+    alignment = Qt.AlignHCenter | Qt.AlignTop
+    # OVERLAY APPEARANCE
+    overlayMargin = 6
+    overlayBackground = QColor(0, 0, 0, 160)
+    overlayColor = QColor(255, 255, 255)
+
+    def __init__(self, parent = None):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - parent = the parent widget.
+
+        RETURNS
+
+        NONE
+        """
+        QWidget.__init__(self, parent)
+        self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+
+        # FRAMES COVER THE WHOLE AREA THEY ARE DRAWN IN, SO QT DOES NOT NEED TO CLEAR IT FIRST
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        self.lock = Lock()
+        # NEWEST FRAME AND THE NUMPY ARRAY HOLDING ITS PIXELS (KEPT WITH THE FRAME, AS THE QIMAGE DOES NOT OWN THEM)
+        self.frame = None
+        self.frameBuffer = None
+        self.framePending = False
+        self.displayed = False
+
+        # AREA OF THE WIDGET THE FRAME IS DRAWN IN (ONLY RECALCULATED WHEN THE FRAME OR WIDGET SIZE CHANGES)
+        self.targetRect = QRect()
+        self.frameSize = None
+
+        # FEED STATISTICS TO RECORD PAINT TIMES IN, AND TEXT SHOWN ON TOP OF THE FRAME
+        self.statistics = None
+        self.showOverlay = False
+        self.overlayText = ""
+        self.overlayFont = QFont("Monospace")
+        self.overlayFont.setStyleHint(QFont.TypeWriter)
+
+        self.frameReadySignal.connect(self.update, Qt.QueuedConnection)
+
+    @pyqtSlot(QImage, int, object)
+    def setFrame(self, frame, identifier = 0, frameBuffer = None):
+        """
+        PURPOSE
+
+        Replaces the frame waiting to be drawn. Safe to call from the capture thread.
+
+        INPUT
+
+        - frame = QImage containing the new frame.
+        - identifier = the camera feed number (unused, allows direct connection to the camera signal).
+        - frameBuffer = the NumPy array holding the pixels of the frame, which is kept until the frame is replaced
+                        (None if the frame owns its pixels).
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.frame = frame
+            self.frameBuffer = frameBuffer
+
+            if not self.displayed:
+                return
+
+            # ONLY ASK FOR A REPAINT IF ONE IS NOT ALREADY WAITING
+            if self.framePending:
+                if self.statistics != None:
+                    self.statistics.addCount('skippedPaints')
+                return
+            self.framePending = True
+
+        self.frameReadySignal.emit()
+
+    def setStatistics(self, statistics):
+        """
+        PURPOSE
+
+        Sets where the time taken to draw each frame is recorded.
+
+        INPUT
+
+        - statistics = the FEED_STATISTICS object of the camera feed shown in this widget.
+
+        RETURNS
+
+        NONE
+        """
+        self.statistics = statistics
+
+    def setOverlay(self, status):
+        """
+        PURPOSE
+
+        Shows or hides the overlay text.
+
+        INPUT
+
+        - status = True to show the overlay.
+
+        RETURNS
+
+        NONE
+        """
+        self.showOverlay = status
+        self.update()
+
+    def setOverlayText(self, text):
+        """
+        PURPOSE
+
+        Changes the text shown by the overlay.
+
+        INPUT
+
+        - text = the text to show (may contain several lines).
+
+        RETURNS
+
+        NONE
+        """
+        self.overlayText = text
+        if self.showOverlay:
+            self.update()
+
+    def getTargetRect(self, frameWidth, frameHeight):
+        """
+        PURPOSE
+
+        Calculates where to draw a frame so it fits inside the widget whilst keeping its aspect ratio.
+
+        INPUT
+
+        - frameWidth = width of the frame in pixels.
+        - frameHeight = height of the frame in pixels.
+
+        RETURNS
+
+        - targetRect = QRect the frame is drawn in.
+        """
+        scale = min(self.width() / frameWidth, self.height() / frameHeight)
+        width = min(self.width(), round(frameWidth * scale))
+        height = min(self.height(), round(frameHeight * scale))
+
+        # ALIGN FRAME INSIDE WIDGET
+        x = (self.width() - width) // 2 if self.alignment & Qt.AlignHCenter else 0
+        y = (self.height() - height) // 2 if self.alignment & Qt.AlignVCenter else 0
+
+        return QRect(x, y, width, height)
+
+    def paintEvent(self, event):
+        """
+        PURPOSE
+
+        Draws the newest frame. Frames are already scaled to the widget size on the capture thread,
+        so this is normally a straight copy. Larger images (such as the no signal image) are scaled here.
+
+        INPUT
+
+        - event = QPaintEvent event.
+
+        RETURNS
+
+        NONE
+        """
+        startTime = perf_counter()
+
+        # KEEP THE FRAME BUFFER UNTIL DRAWING HAS FINISHED, IN CASE A NEW FRAME REPLACES IT IN THE MEANTIME
+        with self.lock:
+            frame = self.frame
+            frameBuffer = self.frameBuffer
+            self.framePending = False
+
+        painter = QPainter(self)
+
+        if frame == None or frame.isNull() or self.width() == 0 or self.height() == 0:
+            painter.fillRect(self.rect(), self.palette().window())
+            painter.end()
+            return
+
+        # RECALCULATE TARGET AREA IF THE FRAME SIZE HAS CHANGED
+        frameSize = (frame.width(), frame.height())
+        if frameSize != self.frameSize:
+            self.frameSize = frameSize
+            self.targetRect = self.getTargetRect(*frameSize)
+
+        # CLEAR THE AREA AROUND THE FRAME
+        if self.targetRect != self.rect():
+            painter.setClipRegion(event.region().subtracted(QRegion(self.targetRect)))
+            painter.fillRect(self.rect(), self.palette().window())
+            painter.setClipping(False)
+
+        if self.targetRect.size() == frame.size():
+            painter.drawImage(self.targetRect.topLeft(), frame)
+        else:
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(self.targetRect, frame)
+
+        if self.showOverlay and self.overlayText != "":
+            self.paintOverlay(painter)
+
+        painter.end()
+
+        if self.statistics != None:
+            self.statistics.recordStage('paint', perf_counter() - startTime)
+
+    def paintOverlay(self, painter):
+        """
+        PURPOSE
+
+        Draws the overlay text in the top left corner of the frame.
+
+        INPUT
+
+        - painter = the QPainter drawing the widget.
+
+        RETURNS
+
+        NONE
+        """
+        painter.setFont(self.overlayFont)
+        textRect = painter.fontMetrics().boundingRect(QRect(0, 0, self.width(), self.height()), Qt.AlignLeft | Qt.AlignTop, self.overlayText)
+        textRect.moveTopLeft(self.targetRect.topLeft() + QPoint(self.overlayMargin, self.overlayMargin))
+
+        painter.fillRect(textRect.adjusted(-4, -2, 4, 2), self.overlayBackground)
+        painter.setPen(self.overlayColor)
+        painter.drawText(textRect, Qt.AlignLeft | Qt.AlignTop, self.overlayText)
+
+    def resizeEvent(self, event):
+        """
+        PURPOSE
+
+        Recalculates the target area when the widget changes size.
+
+        INPUT
+
+        - event = QResizeEvent event.
+
+        RETURNS
+
+        NONE
+        """
+        self.frameSize = None
+        QWidget.resizeEvent(self, event)
+
+    def showEvent(self, event):
+        """
+        PURPOSE
+
+        Starts drawing frames when the widget becomes visible.
+
+        INPUT
+
+        - event = QShowEvent event.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.displayed = True
+        self.update()
+        QWidget.showEvent(self, event)
+
+    def hideEvent(self, event):
+        """
+        PURPOSE
+
+        Stops drawing frames while the widget is hidden.
+
+        INPUT
+
+        - event = QHideEvent event.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.displayed = False
+        QWidget.hideEvent(self, event)
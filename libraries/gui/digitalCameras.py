@@ -11,8 +11,10 @@ class DIGITAL_CAMERAS(QObject):
     # SIGNALS TO CALL FUNCTIONS IN MAIN PROGRAM
     cameraEnableSignal = pyqtSignal(bool, int)
     cameraResolutionSignal = pyqtSignal(int, int, int)
+    cameraFrameRateSignal = pyqtSignal(int, int)
     cameraEditSignal = pyqtSignal()
     cameraChangeAddress = pyqtSignal(int, str)
+    cameraRecordSignal = pyqtSignal(bool)
 
     # DATABASE
     feedQuantity = 4
@@ -26,6 +28,10 @@ class DIGITAL_CAMERAS(QObject):
     resolutions = [[1920, 1080], [1600, 900], [1280, 720], [1024, 576], [640, 360], [256, 144]]
     resolutionMenus = []
     selectedResolutions = [4, 4, 4, 4]
+    # 0 = AS FAST AS THE CAMERA DELIVERS FRAMES
+    frameRates = [0, 60, 30, 15, 10, 5]
+    frameRateMenus = []
+    selectedFrameRates = [2, 2, 2, 2]
     feedStatus = []
 
     def __init__(self, *, controlLayout = None, configLayout = None):
@@ -90,6 +96,11 @@ class DIGITAL_CAMERAS(QObject):
         self.updateResolutionMenus()
         for i, res in enumerate(self.selectedResolutions):
             self.changeResolution(res, i)
+
+        # SET CAMERA FEED FRAME RATES
+        self.updateFrameRateMenus()
+        for i, rate in enumerate(self.selectedFrameRates):
+            self.changeFrameRate(rate, i)
         
     def addCamera(self):
         """
@@ -198,6 +209,8 @@ class DIGITAL_CAMERAS(QObject):
         self.selectedCameras = [0, 0, 0, 0]
         self.resolutions = [[1920, 1080], [1600, 900], [1280, 720], [1024, 576], [640, 360], [256, 144]]
         self.selectedResolutions = [4, 4, 4, 4]
+        self.frameRates = [0, 60, 30, 15, 10, 5]
+        self.selectedFrameRates = [2, 2, 2, 2]
 
         # UPDATE WIDGETS
         self.cameraNumber.setValue(self.quantity)
@@ -224,7 +237,7 @@ class DIGITAL_CAMERAS(QObject):
         parentLayout = QFormLayout()
         parentLayout.setLabelAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
         label1 = QLabel("Enable/Disable")
-        label2 = QLabel("Resolution")
+        label2 = QLabel("Resolution / Frame Rate")
         label2.setAlignment(Qt.AlignCenter)
         parentLayout.addRow(label1, label2)
 
@@ -246,6 +259,8 @@ class DIGITAL_CAMERAS(QObject):
             menu = QComboBox()
             formattedRes = [str(item[0]) + "x" + str(item[1]) for item in self.resolutions]
             menu.addItems(formattedRes)
+            if feed > 0:
+                menu.setToolTip("Maximum resolution. Secondary feeds are captured at the size they are displayed.")
             self.resolutionMenus.append(menu)
 
             # GET FRAME RESOLUTION FROM CONFIG FILE
@@ -253,12 +268,29 @@ class DIGITAL_CAMERAS(QObject):
 
             menu.setCurrentIndex(index)
 
+            # CHANGE FRAME RATE MENU
+            rateMenu = QComboBox()
+            formattedRates = ["Max FPS" if rate == 0 else str(rate) + " FPS" for rate in self.frameRates]
+            rateMenu.addItems(formattedRates)
+            rateMenu.setCurrentIndex(self.selectedFrameRates[feed])
+            self.frameRateMenus.append(rateMenu)
+
             # LINK WIDGETS
             button.clicked.connect(lambda state, feed = feed: self.toggleCameraFeed(state, feed))
             menu.activated.connect(lambda index, feed = feed: self.changeResolution(index, feed))
+            rateMenu.activated.connect(lambda index, feed = feed: self.changeFrameRate(index, feed))
+
+            # ADD BUTTON AND MENUS TO FORM LAYOUT
+            menuLayout = QHBoxLayout()
+            menuLayout.addWidget(menu)
+            menuLayout.addWidget(rateMenu)
+            parentLayout.addRow(button, menuLayout)
 
-            # ADD BUTTON AND MENU TO FORM LAYOUT
-            parentLayout.addRow(button, menu)
+        # RECORD CAMERA FEEDS AND MISSION LOG BUTTON
+        self.recordButton = QPushButton("Record Mission")
+        self.recordButton.setCheckable(True)
+        self.recordButton.clicked.connect(self.toggleRecording)
+        parentLayout.addRow(self.recordButton)
 
         # ADD TO GUI
         self.controlLayout.setLayout(parentLayout)
@@ -281,6 +313,23 @@ class DIGITAL_CAMERAS(QObject):
         self.feedStatus[feed] = status 
         self.cameraEnableSignal.emit(status, feed)
 
+    def toggleRecording(self, status):
+        """
+        PURPOSE
+
+        Emits signal to main program to start/stop recording the camera feeds and mission log.
+
+        INPUT
+
+        - status = state of the button.
+
+        RETURNS
+
+        NONE
+        """
+        self.recordButton.setText("Stop Recording" if status else "Record Mission")
+        self.cameraRecordSignal.emit(status)
+
     def toggleAllFeeds(self, feedStatus):
         """
         PURPOSE
@@ -342,6 +391,42 @@ class DIGITAL_CAMERAS(QObject):
         """
         for i, menu in enumerate(self.resolutionMenus):
             menu.setCurrentIndex(self.selectedResolutions[i])
+
+    def changeFrameRate(self, menuIndex, feed):
+        """
+        PURPOSE
+
+        User selects camera feed capture rate from drop down menu.
+
+        INPUT
+
+        - menuIndex = the index of the menu item selected.
+        - feed = the camera feed being modified.
+
+        RETURNS
+
+        NONE
+        """
+        self.selectedFrameRates[feed] = menuIndex
+
+        self.cameraFrameRateSignal.emit(feed, self.frameRates[menuIndex])
+
+    def updateFrameRateMenus(self):
+        """
+        PURPOSE
+
+        Updates the frame rate menus with the correct indices.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        for i, menu in enumerate(self.frameRateMenus):
+            menu.setCurrentIndex(self.selectedFrameRates[i])
         
     def changeSelectedCameras(self, index, camera):
         """
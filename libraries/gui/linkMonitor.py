@@ -0,0 +1,128 @@
+from PyQt5.QtWidgets import QFormLayout, QLabel, QLineEdit, QSizePolicy
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, QTimer
+
+class LINK_MONITOR(QObject):
+    """
+    PURPOSE
+
+    Displays live performance statistics of the ROV serial link on the configuration tab.
+    """
+    # SIGNAL TO REQUEST THE LATEST STATISTICS FROM THE MAIN PROGRAM
+    getLinkStatistics = pyqtSignal()
+
+    # DATABASE
+    refreshRate = 1
+    statisticLabels = ['Data In', 'Data Out', 'Commands', 'Messages', 'Sensor RTT', 'Identity RTT',
+                       'Timeouts', 'Decode Errors', 'Coalesced Setpoints']
+
+    def __init__(self, *, configLayout = None):
+        """
+        PURPOSE
+
+        Class constructor.
+        Calls setup functions.
+
+        INPUT
+
+        - configLayout = layout widget located on the configuration tab to add widgets to.
+
+        RETURNS
+
+        NONE
+        """
+        QObject.__init__(self)
+
+        self.configLayout = configLayout
+        self.textBoxObjects = []
+
+        # TIMER TO REFRESH THE DISPLAY
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.getLinkStatistics.emit)
+
+        # INITIAL LAYOUT SETUP
+        if configLayout != None:
+            self.setupConfigLayout()
+            self.timer.start(int(1000/self.refreshRate))
+
+    def setupConfigLayout(self):
+        """
+        PURPOSE
+
+        Creates a text box to display each link statistic.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        if self.configLayout.layout() == None:
+            parentLayout = QFormLayout()
+
+            for labelText in self.statisticLabels:
+                # CREATE STATISTIC LABEL
+                label = QLabel(labelText)
+                label.setStyleSheet("font-weight: bold;")
+                label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+                # CREATE TEXT BOX TO DISPLAY VALUE
+                value = QLineEdit()
+                value.setAlignment(Qt.AlignCenter | Qt.AlignVCenter)
+                value.setReadOnly(True)
+
+                # ADD POINTER FOR THE QLINEEDIT INTO AN ARRAY FOR LATER ACCESS
+                self.textBoxObjects.append(value)
+
+                # ADD TO FORM LAYOUT
+                parentLayout.addRow(label, value)
+
+            # ADD TO GUI
+            self.configLayout.setLayout(parentLayout)
+
+    def updateDisplay(self, statistics):
+        """
+        PURPOSE
+
+        Updates the text boxes with the latest link statistics.
+
+        INPUT
+
+        - statistics = dictionary returned by ROV_SERIAL.getLinkStatistics().
+
+        RETURNS
+
+        NONE
+        """
+        values = ["{:.0f} B/s ({} B)".format(statistics['bytesInRate'], statistics['bytesIn']),
+                  "{:.0f} B/s ({} B)".format(statistics['bytesOutRate'], statistics['bytesOut']),
+                  "{:.0f} /s".format(statistics['commandRate']),
+                  "{:.0f} /s".format(statistics['messageRate']),
+                  self.formatRoundTrip(statistics['roundTrip']['sensors']),
+                  self.formatRoundTrip(statistics['roundTrip']['identity']),
+                  str(statistics['timeouts']),
+                  str(statistics['decodeErrors']),
+                  str(statistics['coalescedSetpoints'])]
+
+        for textBox, value in zip(self.textBoxObjects, values):
+            textBox.setText(value)
+
+    def formatRoundTrip(self, summary):
+        """
+        PURPOSE
+
+        Formats a round trip time summary for display.
+
+        INPUT
+
+        - summary = dictionary containing the round trip time statistics (ms).
+
+        RETURNS
+
+        - text = median / 95th percentile / maximum round trip time.
+        """
+        if summary['count'] == 0:
+            return "-"
+
+        return "{:.1f} / {:.1f} / {:.1f} ms".format(summary['p50'], summary['p95'], summary['max'])
@@ -0,0 +1,456 @@
+import os
+import zlib
+import struct
+import argparse
+from math import nan
+from time import monotonic, time
+from threading import Lock
+
+# RECORD TYPES
+RECORD_SENSORS = 1
+RECORD_THRUSTERS = 2
+RECORD_CONTROLLER = 3
+RECORD_FRAME = 4
+
+RECORD_NAMES = {RECORD_SENSORS: 'sensors', RECORD_THRUSTERS: 'thrusters', RECORD_CONTROLLER: 'controller', RECORD_FRAME: 'frame'}
+
+class MISSION_LOG():
+    """
+    PURPOSE
+
+    Append-only binary log of everything that happens during a dive (sensor readings, thruster commands,
+    controller inputs and recorded camera frames), timed with a single monotonic clock so they can be
+    replayed and analysed together.
+
+    FILE FORMAT
+
+    - File header = magic number, wall clock time the log started (seconds since the epoch).
+    - Chunks = chunk header (magic, compression, payload length, record count, first and last record time)
+               followed by the payload, which is the chunk's records, zlib compressed if compression is 1.
+    - Record = time since the log started (seconds), record type, payload length, payload.
+
+    RECORD PAYLOADS
+
+    - RECORD_SENSORS = float32 for each sensor reading.
+    - RECORD_THRUSTERS = float32 for each thruster speed.
+    - RECORD_CONTROLLER = number of buttons, one byte for each button state, then float32 for each joystick value.
+    - RECORD_FRAME = camera feed number and the position of the frame in that feed's FRAME_INDEX.
+
+    Records are buffered and written a chunk at a time. If the program stops unexpectedly only the
+    unwritten chunk is lost, and readers ignore a chunk that was only partly written.
+    """
+    # DATABASE
+    fileMagic = b'ROVLOG01'
+    chunkMagic = b'CHNK'
+    fileHeader = struct.Struct('<8sd')
+    chunkHeader = struct.Struct('<4sBIIdd')
+    recordHeader = struct.Struct('<dBH')
+    frameRecord = struct.Struct('<BI')
+    # WRITE A CHUNK WHEN IT HOLDS THIS MANY RECORDS OR COVERS THIS LONG (SECONDS)
+    chunkRecords = 1000
+    chunkDuration = 1
+    # COMPRESS CHUNKS WITH ZLIB (0 = STORE UNCOMPRESSED)
+    compressionLevel = 1
+
+    def __init__(self, filePath):
+        """
+        PURPOSE
+
+        Class constructor. Creates the log file, or continues an existing one.
+
+        INPUT
+
+        - filePath = path of the log file.
+
+        RETURNS
+
+        NONE
+        """
+        self.lock = Lock()
+        self.filePath = filePath
+        self.startTime = monotonic()
+
+        if os.path.exists(filePath) and os.path.getsize(filePath) >= self.fileHeader.size:
+            # CONTINUE THE EXISTING CLOCK
+            with open(filePath, 'rb') as logFile:
+                _, wallTime = self.fileHeader.unpack(logFile.read(self.fileHeader.size))
+            self.startTime -= time() - wallTime
+            self.logFile = open(filePath, 'ab')
+        else:
+            self.logFile = open(filePath, 'wb')
+            self.logFile.write(self.fileHeader.pack(self.fileMagic, time()))
+
+        # RECORDS WAITING TO BE WRITTEN
+        self.chunk = bytearray()
+        self.chunkCount = 0
+        self.chunkStart = 0
+        self.chunkEnd = 0
+        self.recordCount = 0
+
+    def getTime(self):
+        """
+        PURPOSE
+
+        Returns the log clock.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - logTime = seconds since the log started.
+        """
+        return monotonic() - self.startTime
+
+    def addRecord(self, recordType, payload, logTime = None):
+        """
+        PURPOSE
+
+        Appends a record to the log. Safe to call from any thread.
+
+        INPUT
+
+        - recordType = RECORD_SENSORS, RECORD_THRUSTERS, RECORD_CONTROLLER or RECORD_FRAME.
+        - payload = the encoded record.
+        - logTime = time of the record on the log clock (if not given the current time is used).
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            if self.logFile == None:
+                return
+
+            if logTime == None:
+                logTime = self.getTime()
+
+            if self.chunkCount == 0:
+                self.chunkStart = logTime
+            self.chunkEnd = max(self.chunkEnd, logTime)
+
+            self.chunk += self.recordHeader.pack(logTime, recordType, len(payload))
+            self.chunk += payload
+            self.chunkCount += 1
+            self.recordCount += 1
+
+            if self.chunkCount >= self.chunkRecords or logTime - self.chunkStart >= self.chunkDuration:
+                self.writeChunk()
+
+    def addValues(self, recordType, values):
+        """
+        PURPOSE
+
+        Appends a record containing a list of numbers (sensor readings or thruster speeds).
+
+        INPUT
+
+        - recordType = RECORD_SENSORS or RECORD_THRUSTERS.
+        - values = list of numbers (values that are not numbers are stored as NaN).
+
+        RETURNS
+
+        NONE
+        """
+        self.addRecord(recordType, self.encodeFloats(values))
+
+    def addController(self, buttonStates, joystickValues):
+        """
+        PURPOSE
+
+        Appends a record containing the controller inputs.
+
+        INPUT
+
+        - buttonStates = array containing the state of each controller button.
+        - joystickValues = array containing the value of each controller joystick.
+
+        RETURNS
+
+        NONE
+        """
+        payload = bytes([len(buttonStates)]) + bytes(1 if state else 0 for state in buttonStates) + self.encodeFloats(joystickValues)
+        self.addRecord(RECORD_CONTROLLER, payload)
+
+    def addFrame(self, identifier, position):
+        """
+        PURPOSE
+
+        Appends a record of a camera frame that has been sent to the video recorder.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - position = position of the frame in the feed's FRAME_INDEX.
+
+        RETURNS
+
+        NONE
+        """
+        self.addRecord(RECORD_FRAME, self.frameRecord.pack(identifier, position))
+
+    def encodeFloats(self, values):
+        """
+        PURPOSE
+
+        Packs a list of numbers as float32 values.
+
+        INPUT
+
+        - values = list of numbers.
+
+        RETURNS
+
+        - payload = the packed values.
+        """
+        numbers = []
+        for value in values:
+            try:
+                numbers.append(float(value))
+            except:
+                numbers.append(nan)
+
+        return struct.pack('<{}f'.format(len(numbers)), *numbers)
+
+    def writeChunk(self):
+        """
+        PURPOSE
+
+        Compresses the buffered records and appends them to the file as a chunk. Must be called with the lock held.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        if self.chunkCount == 0:
+            return
+
+        compression = 0
+        payload = bytes(self.chunk)
+        if self.compressionLevel > 0:
+            compression = 1
+            payload = zlib.compress(payload, self.compressionLevel)
+
+        self.logFile.write(self.chunkHeader.pack(self.chunkMagic, compression, len(payload), self.chunkCount, self.chunkStart, self.chunkEnd))
+        self.logFile.write(payload)
+        self.logFile.flush()
+
+        self.chunk = bytearray()
+        self.chunkCount = 0
+
+    def flush(self):
+        """
+        PURPOSE
+
+        Writes any buffered records to the file.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            if self.logFile != None:
+                self.writeChunk()
+
+    def close(self):
+        """
+        PURPOSE
+
+        Writes any buffered records and closes the file.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            if self.logFile != None:
+                self.writeChunk()
+                self.logFile.close()
+                self.logFile = None
+
+class MISSION_LOG_READER():
+    """
+    PURPOSE
+
+    Reads a MISSION_LOG. Only the chunk headers are read when the log is opened, so any window of time
+    can be streamed back by decompressing just the chunks that overlap it.
+    """
+    def __init__(self, filePath):
+        """
+        PURPOSE
+
+        Class constructor. Reads the chunk headers.
+
+        INPUT
+
+        - filePath = path of the log file.
+
+        RETURNS
+
+        NONE
+        """
+        self.filePath = filePath
+        self.logFile = open(filePath, 'rb')
+
+        magic, self.wallStartTime = MISSION_LOG.fileHeader.unpack(self.logFile.read(MISSION_LOG.fileHeader.size))
+        if magic != MISSION_LOG.fileMagic:
+            raise ValueError("{} is not a mission log".format(filePath))
+
+        # CHUNK TABLE (FILE OFFSET, COMPRESSION, PAYLOAD LENGTH, RECORD COUNT, FIRST TIME, LAST TIME)
+        self.chunks = []
+        fileSize = os.path.getsize(filePath)
+        offset = MISSION_LOG.fileHeader.size
+
+        while offset + MISSION_LOG.chunkHeader.size <= fileSize:
+            self.logFile.seek(offset)
+            magic, compression, length, count, firstTime, lastTime = MISSION_LOG.chunkHeader.unpack(self.logFile.read(MISSION_LOG.chunkHeader.size))
+            payloadOffset = offset + MISSION_LOG.chunkHeader.size
+
+            # STOP AT A CHUNK THAT WAS NOT COMPLETELY WRITTEN
+            if magic != MISSION_LOG.chunkMagic or payloadOffset + length > fileSize:
+                break
+
+            self.chunks.append((payloadOffset, compression, length, count, firstTime, lastTime))
+            offset = payloadOffset + length
+
+    def getDuration(self):
+        """
+        PURPOSE
+
+        Returns the time covered by the log.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - startTime = time of the first record (seconds on the log clock).
+        - endTime = time of the last record.
+        """
+        if len(self.chunks) == 0:
+            return 0, 0
+
+        return min(chunk[4] for chunk in self.chunks), max(chunk[5] for chunk in self.chunks)
+
+    def readRecords(self, startTime = None, endTime = None, recordTypes = None):
+        """
+        PURPOSE
+
+        Streams back the records in a window of time, in the order they were logged.
+
+        INPUT
+
+        - startTime = start of the window (seconds on the log clock, None = from the start of the log).
+        - endTime = end of the window (None = to the end of the log).
+        - recordTypes = list of record types to return (None = every type).
+
+        RETURNS
+
+        - records = generator of (logTime, recordType, values) tuples (see decodeRecord).
+        """
+        for offset, compression, length, count, firstTime, lastTime in self.chunks:
+            # SKIP CHUNKS OUTSIDE THE WINDOW WITHOUT READING THEM
+            if startTime != None and lastTime < startTime:
+                continue
+            if endTime != None and firstTime > endTime:
+                break
+
+            self.logFile.seek(offset)
+            payload = self.logFile.read(length)
+            if compression == 1:
+                payload = zlib.decompress(payload)
+
+            position = 0
+            for _ in range(count):
+                logTime, recordType, size = MISSION_LOG.recordHeader.unpack_from(payload, position)
+                position += MISSION_LOG.recordHeader.size
+                recordPayload = payload[position:position + size]
+                position += size
+
+                if startTime != None and logTime < startTime:
+                    continue
+                if endTime != None and logTime > endTime:
+                    return
+                if recordTypes != None and recordType not in recordTypes:
+                    continue
+
+                yield logTime, recordType, self.decodeRecord(recordType, recordPayload)
+
+    def decodeRecord(self, recordType, payload):
+        """
+        PURPOSE
+
+        Unpacks the payload of a record.
+
+        INPUT
+
+        - recordType = the type of the record.
+        - payload = the encoded record.
+
+        RETURNS
+
+        - values = list of numbers for sensor and thruster records,
+                   (buttonStates, joystickValues) for controller records,
+                   (identifier, position) for frame records.
+        """
+        if recordType in (RECORD_SENSORS, RECORD_THRUSTERS):
+            return list(struct.unpack('<{}f'.format(len(payload) // 4), payload))
+
+        if recordType == RECORD_CONTROLLER:
+            buttonCount = payload[0]
+            buttonStates = list(payload[1:1 + buttonCount])
+            joystickPayload = payload[1 + buttonCount:]
+            joystickValues = list(struct.unpack('<{}f'.format(len(joystickPayload) // 4), joystickPayload))
+            return buttonStates, joystickValues
+
+        if recordType == RECORD_FRAME:
+            return MISSION_LOG.frameRecord.unpack(payload)
+
+        return payload
+
+    def close(self):
+        """
+        PURPOSE
+
+        Closes the log file.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.logFile.close()
+
+if __name__ == '__main__':
+    # EXAMPLE: python -m libraries.recording.missionLog recordings/mission_20240101_120000/mission.log --start 60 --end 65
+    parser = argparse.ArgumentParser(description = "Print the records in a window of a mission log.")
+    parser.add_argument('log', help = "path of the mission log")
+    parser.add_argument('--start', type = float, default = None, help = "start of the window (seconds)")
+    parser.add_argument('--end', type = float, default = None, help = "end of the window (seconds)")
+    args = parser.parse_args()
+
+    reader = MISSION_LOG_READER(args.log)
+    startTime, endTime = reader.getDuration()
+    print("{} chunks, {:.1f} s to {:.1f} s".format(len(reader.chunks), startTime, endTime))
+
+    for logTime, recordType, values in reader.readRecords(args.start, args.end):
+        print("{:10.3f}  {:<10}  {}".format(logTime, RECORD_NAMES.get(recordType, recordType), values))
+
+    reader.close()
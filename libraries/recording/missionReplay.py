@@ -0,0 +1,358 @@
+import os
+import sys
+import argparse
+from threading import Event
+from time import monotonic
+
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QThread, Qt
+
+from libraries.camera.frameIndex import FRAME_INDEX
+from libraries.recording.missionLog import MISSION_LOG_READER, RECORD_SENSORS, RECORD_CONTROLLER, RECORD_FRAME, RECORD_NAMES
+
+class MISSION_REPLAY(QThread):
+    """
+    PURPOSE
+
+    Plays a recorded mission back into the program, so the GUI can be profiled with a repeatable load
+    and without the ROV, controller or cameras connected.
+
+    Records are read from the mission log in order and sent through the same signals as the live hardware:
+    sensor readings through the sensorReadingsSignal of ROV_SERIAL, controller inputs through the
+    processInputSignal of CONTROLLER, and recorded frames through the cameraNewFrameSignal of each
+    camera feed (including any vision processing task running on the feed). Thruster records are not
+    replayed, as the replayed controller inputs generate the thruster commands again.
+
+    The mission can be played in real time, faster than real time, or as fast as possible (speed 0).
+    Every syncInterval records the thread waits for the GUI thread to handle the signals already sent,
+    so the GUI event queue cannot grow without limit when the GUI is slower than the replay.
+    """
+    # SIGNAL EMITTED WITH THE REPLAY STATISTICS WHEN THE REPLAY ENDS
+    replayFinishedSignal = pyqtSignal(dict)
+
+    # SIGNAL USED TO WAIT FOR THE GUI THREAD TO CATCH UP
+    synchroniseSignal = pyqtSignal()
+
+    # DATABASE
+    logName = "mission.log"
+    # RECORDS SENT BETWEEN EACH WAIT FOR THE GUI THREAD
+    syncInterval = 100
+
+    def __init__(self, missionDirectory, speed = 1, comms = None, controller = None, cameraManager = None):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - missionDirectory = folder of the recording (containing mission.log and the camera recordings).
+        - speed = playback speed (1 = real time, 4 = four times faster etc., 0 = as fast as possible).
+        - comms = the ROV_SERIAL object that sensor readings are sent through (None to skip them).
+        - controller = the CONTROLLER object that controller inputs are sent through (None to skip them).
+        - cameraManager = the CAMERA_MANAGER whose feeds recorded frames are shown on (None to skip them).
+
+        RETURNS
+
+        NONE
+        """
+        QThread.__init__(self)
+        self.missionDirectory = missionDirectory
+        self.speed = speed
+        self.comms = comms
+        self.controller = controller
+        self.cameraManager = cameraManager
+
+        self.stopEvent = Event()
+        self.syncEvent = Event()
+        self.synchroniseSignal.connect(self.synchronise, Qt.QueuedConnection)
+
+        # RECORDS REPLAYED OF EACH TYPE, FRAMES THAT COULD NOT BE READ AND THE MOST THE REPLAY FELL BEHIND (SECONDS)
+        self.recordCounts = {name: 0 for name in RECORD_NAMES.values()}
+        self.missingFrames = 0
+        self.maxLateness = 0
+        self.missionDuration = 0
+        self.replayDuration = 0
+
+    def run(self):
+        """
+        PURPOSE
+
+        Replays the mission log until it ends or the replay is stopped.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        reader = MISSION_LOG_READER(os.path.join(self.missionDirectory, self.logName))
+        frameIndexes = {}
+        firstTime = None
+        startTime = monotonic()
+        recordNumber = 0
+
+        try:
+            for logTime, recordType, values in reader.readRecords():
+                if self.stopEvent.is_set():
+                    break
+
+                if firstTime == None:
+                    firstTime = logTime
+                    startTime = monotonic()
+
+                # WAIT UNTIL THE RECORD IS DUE
+                if self.speed > 0:
+                    delay = startTime + (logTime - firstTime) / self.speed - monotonic()
+                    if delay > 0:
+                        if self.stopEvent.wait(delay):
+                            break
+                    else:
+                        self.maxLateness = max(self.maxLateness, -delay)
+
+                self.replayRecord(recordType, values, frameIndexes)
+                if recordType in RECORD_NAMES:
+                    self.recordCounts[RECORD_NAMES[recordType]] += 1
+                self.missionDuration = logTime - firstTime
+
+                # LET THE GUI THREAD CATCH UP
+                recordNumber += 1
+                if recordNumber % self.syncInterval == 0:
+                    self.waitForGUI()
+
+        finally:
+            reader.close()
+            for frameIndex in frameIndexes.values():
+                frameIndex.close()
+
+        self.replayDuration = monotonic() - startTime
+        self.replayFinishedSignal.emit(self.getStatistics())
+
+    def replayRecord(self, recordType, values, frameIndexes):
+        """
+        PURPOSE
+
+        Sends a single record through the signal of the device it came from.
+
+        INPUT
+
+        - recordType = the type of the record.
+        - values = the decoded record (see MISSION_LOG_READER.decodeRecord).
+        - frameIndexes = dictionary of the FRAME_INDEX of each camera feed opened so far.
+
+        RETURNS
+
+        NONE
+        """
+        if recordType == RECORD_SENSORS:
+            if self.comms != None:
+                self.comms.sensorReadingsSignal.emit(values)
+
+        elif recordType == RECORD_CONTROLLER:
+            if self.controller != None:
+                buttonStates, joystickValues = values
+                self.controller.processInputSignal.emit(buttonStates, joystickValues)
+
+        elif recordType == RECORD_FRAME:
+            if self.cameraManager != None:
+                identifier, position = values
+                frame = self.readFrame(identifier, position, frameIndexes)
+                if frame is None:
+                    self.missingFrames += 1
+                else:
+                    self.cameraManager.getFeed(identifier).deliverFrame(frame)
+
+    def readFrame(self, identifier, position, frameIndexes):
+        """
+        PURPOSE
+
+        Reads a recorded frame of a camera feed.
+
+        INPUT
+
+        - identifier = the camera feed number.
+        - position = position of the frame in the feed's frame index.
+        - frameIndexes = dictionary of the FRAME_INDEX of each camera feed opened so far.
+
+        RETURNS
+
+        - frame = the recorded image (None if it could not be read).
+        """
+        if identifier >= len(self.cameraManager.feeds):
+            return None
+
+        frameIndex = frameIndexes.get(identifier)
+        if frameIndex == None:
+            try:
+                frameIndex = FRAME_INDEX(os.path.join(self.missionDirectory, "camera_{}".format(identifier + 1)))
+            except:
+                return None
+            frameIndexes[identifier] = frameIndex
+
+        # FRAMES STILL QUEUED WHEN THE RECORDING STOPPED ARE LOGGED BUT NOT INDEXED
+        try:
+            status, frame, _ = frameIndex.readPosition(position)
+        except:
+            return None
+
+        return frame if status else None
+
+    def waitForGUI(self):
+        """
+        PURPOSE
+
+        Blocks the replay thread until the GUI thread has handled every signal sent so far,
+        or the replay is stopped.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.syncEvent.clear()
+        self.synchroniseSignal.emit()
+
+        # CHECK FOR A STOP REQUEST, AS THE GUI THREAD MAY BE WAITING FOR THIS THREAD TO FINISH
+        while not self.syncEvent.wait(0.1):
+            if self.stopEvent.is_set():
+                return
+
+    @pyqtSlot()
+    def synchronise(self):
+        """
+        PURPOSE
+
+        Runs on the GUI thread once it has handled every signal sent before it, and releases the replay thread.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.syncEvent.set()
+
+    def getStatistics(self):
+        """
+        PURPOSE
+
+        Returns how much of the mission has been replayed.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - statistics = dictionary containing the records replayed of each type, the frames that could not be read,
+                       the mission time replayed and the time taken (seconds), and the most the replay fell behind (seconds).
+        """
+        statistics = dict(self.recordCounts)
+        statistics['missingFrames'] = self.missingFrames
+        statistics['missionDuration'] = self.missionDuration
+        statistics['replayDuration'] = self.replayDuration
+        statistics['maxLateness'] = self.maxLateness
+
+        return statistics
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops the replay and waits for the thread to finish.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.stopEvent.set()
+        self.wait()
+
+def parseSpeed(text):
+    """
+    PURPOSE
+
+    Converts a replay speed given on the command line.
+
+    INPUT
+
+    - text = a number ('1', '4', '0.5') or 'max'.
+
+    RETURNS
+
+    - speed = the playback speed (0 = as fast as possible).
+    """
+    if text.lower() == 'max':
+        return 0
+
+    speed = float(text)
+    if speed < 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+
+    return speed
+
+def printResults(statistics):
+    """
+    PURPOSE
+
+    Prints the statistics of a finished replay.
+
+    INPUT
+
+    - statistics = dictionary returned by MISSION_REPLAY.getStatistics.
+
+    RETURNS
+
+    NONE
+    """
+    replayDuration = max(statistics['replayDuration'], 1e-9)
+    recordCount = sum(statistics[name] for name in RECORD_NAMES.values())
+
+    print("Replayed {:.1f} s of mission in {:.2f} s ({:.1f}x)".format(statistics['missionDuration'], statistics['replayDuration'],
+                                                                   statistics['missionDuration'] / replayDuration))
+    print("Records: {} ({:.0f}/s)".format(recordCount, recordCount / replayDuration))
+    for name in RECORD_NAMES.values():
+        print("  {:<12}{}".format(name, statistics[name]))
+    print("Missing frames: {}".format(statistics['missingFrames']))
+    print("Furthest behind schedule: {:.1f} ms".format(1000 * statistics['maxLateness']))
+
+if __name__ == '__main__':
+    # EXAMPLE: python -m libraries.recording.missionReplay recordings/mission_20240101_120000 --speed max
+    # REPLAYS THE SENSOR READINGS AND FRAMES WITHOUT THE GUI, TO MEASURE HOW FAST A RECORDING CAN BE READ BACK
+    # (TO REPLAY INTO THE GUI, RUN: python main.py --replay recordings/mission_20240101_120000)
+    from PyQt5.QtWidgets import QApplication
+    from libraries.camera.cameraManager import CAMERA_MANAGER
+    from libraries.serial.rovComms import ROV_SERIAL
+
+    parser = argparse.ArgumentParser(description = "Replay a recorded mission without the GUI.")
+    parser.add_argument('mission', help = "folder of the recording")
+    parser.add_argument('--speed', type = parseSpeed, default = 0, help = "playback speed (1 = real time, 'max' = as fast as possible)")
+    parser.add_argument('--feeds', type = int, default = 4, help = "number of camera feeds")
+    parser.add_argument('--width', type = int, default = 640, help = "width frames are scaled to")
+    parser.add_argument('--height', type = int, default = 360, help = "height frames are scaled to")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    comms = ROV_SERIAL()
+    cameraManager = CAMERA_MANAGER()
+    for identifier in range(args.feeds):
+        cameraManager.addFeed()
+        cameraManager.setTargetSize(identifier, args.width, args.height)
+
+    replay = MISSION_REPLAY(args.mission, args.speed, comms, None, cameraManager)
+    replay.replayFinishedSignal.connect(printResults)
+    replay.finished.connect(app.quit)
+    replay.start()
+
+    app.exec_()
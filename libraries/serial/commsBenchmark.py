@@ -0,0 +1,143 @@
+import sys
+import argparse
+from random import randint
+from time import sleep
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from libraries.serial.rovComms import ROV_SERIAL
+from libraries.serial.rovSimulator import ROV_SIMULATOR
+from libraries.serial.sensorPoller import SENSOR_POLLER
+from libraries.serial.rovProtocol import MSG_THRUSTERS
+
+# ROUND TRIP TIME HISTOGRAM BUCKET EDGES (MS)
+bucketEdges = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500]
+
+def runBenchmark(protocolName = 'ASCII', baudRate = 115200, latency = 0, jitter = 0, packetLoss = 0,
+                 duration = 5, pollRate = 50, maxSendRate = ROV_SERIAL.maxSendRate, thrusterQuantity = 8):
+    """
+    PURPOSE
+
+    Connects ROV_SERIAL to a simulated ROV, sends thruster setpoints as fast as possible
+    and polls the sensors for a fixed time.
+
+    INPUT
+
+    - protocolName = 'ASCII' or 'Binary'.
+    - baudRate = simulated link speed in bits per second.
+    - latency = simulated reply latency (seconds).
+    - jitter = simulated reply jitter (seconds).
+    - packetLoss = probability (0 -> 1) that a message is lost.
+    - duration = length of the benchmark (seconds).
+    - pollRate = requested sensor polling rate (Hz).
+    - maxSendRate = maximum setpoint send rate passed to ROV_SERIAL (Hz, 0 = unlimited).
+    - thrusterQuantity = number of thruster speeds in each setpoint.
+
+    RETURNS
+
+    - results = dictionary containing the link statistics, the number of setpoints delivered to the ROV
+                and the sensor round trip time histogram.
+    """
+    app = QCoreApplication.instance()
+    if app == None:
+        app = QCoreApplication(sys.argv)
+
+    # START SIMULATED ROV
+    simulator = ROV_SIMULATOR(protocolName, baudRate, latency, jitter, packetLoss)
+    portName = simulator.start()
+
+    # CONNECT TO SIMULATED ROV
+    comms = ROV_SERIAL()
+    comms.setMaxSendRate(maxSendRate)
+    status, message = comms.serialConnect(portName, baudRate, protocolName)
+    if status == False:
+        simulator.stop()
+        raise RuntimeError(message)
+    comms.armThrusters()
+
+    # SEND A NEW THRUSTER SETPOINT EVERY TIME THE EVENT LOOP IS IDLE
+    setpointTimer = QTimer()
+    setpointTimer.timeout.connect(lambda: comms.setThrusters([randint(1, 999) for _ in range(thrusterQuantity)]))
+
+    # POLL SENSORS WITH THE SAME SCHEDULER AS THE GUI
+    sensorPoller = SENSOR_POLLER(pollRate)
+    sensorPoller.pollSignal.connect(comms.getSensors)
+    comms.sensorReadingsSignal.connect(sensorPoller.replyReceived)
+
+    setpointTimer.start(0)
+    sensorPoller.start()
+    QTimer.singleShot(int(1000 * duration), app.quit)
+    app.exec_()
+
+    # STOP AND WAIT FOR THE LAST REPLIES
+    setpointTimer.stop()
+    sensorPoller.stop()
+    sleep(latency + jitter + 0.1)
+    app.processEvents()
+
+    results = comms.getLinkStatistics()
+    results['setpointsDelivered'] = simulator.messagesReceived.get(MSG_THRUSTERS, 0)
+    results['setpointRate'] = results['setpointsDelivered'] / duration
+    results['roundTripBuckets'] = comms.linkStatistics.roundTrip['sensors'].getBuckets(bucketEdges)
+
+    comms.serialDisconnect()
+    simulator.stop()
+
+    return results
+
+def printResults(protocolName, results):
+    """
+    PURPOSE
+
+    Prints the results of a benchmark run.
+
+    INPUT
+
+    - protocolName = the protocol that was benchmarked.
+    - results = dictionary returned by runBenchmark.
+
+    RETURNS
+
+    NONE
+    """
+    roundTrip = results['roundTrip']['sensors']
+
+    print("\n{} PROTOCOL".format(protocolName.upper()))
+    print("  Setpoints delivered:  {} ({:.1f} /s)".format(results['setpointsDelivered'], results['setpointRate']))
+    print("  Commands sent:        {}".format(results['commandsSent']))
+    print("  Setpoints coalesced:  {}".format(results['coalescedSetpoints']))
+    print("  Messages received:    {}".format(results['messagesReceived']))
+    print("  Timeouts:             {}".format(results['timeouts']))
+    print("  Decode errors:        {}".format(results['decodeErrors']))
+
+    if roundTrip['count'] == 0:
+        print("  Sensor RTT:           no replies")
+        return
+
+    print("  Sensor RTT (ms):      mean {:.2f}  min {:.2f}  p50 {:.2f}  p95 {:.2f}  p99 {:.2f}  max {:.2f}  (n = {})".format(
+          roundTrip['mean'], roundTrip['min'], roundTrip['p50'], roundTrip['p95'], roundTrip['p99'], roundTrip['max'], roundTrip['count']))
+
+    for i, count in enumerate(results['roundTripBuckets']):
+        if i < len(bucketEdges) - 1:
+            label = "{:>4} - {:<4} ms".format(bucketEdges[i], bucketEdges[i + 1])
+        else:
+            label = "{:>4} +      ms".format(bucketEdges[i])
+        print("    {}  {:>6}  {}".format(label, count, '#' * int(50 * count / roundTrip['count'])))
+
+if __name__ == '__main__':
+    # EXAMPLE: python -m libraries.serial.commsBenchmark --baud 115200 --latency 0.005 --jitter 0.002 --loss 0.01
+    parser = argparse.ArgumentParser(description = "Benchmark the ROV serial link against a simulated ROV.")
+    parser.add_argument('--protocol', nargs = '+', default = ['ASCII', 'Binary'], help = "protocols to benchmark")
+    parser.add_argument('--baud', type = int, default = 115200, help = "simulated baud rate")
+    parser.add_argument('--latency', type = float, default = 0, help = "reply latency (seconds)")
+    parser.add_argument('--jitter', type = float, default = 0, help = "reply jitter (seconds)")
+    parser.add_argument('--loss', type = float, default = 0, help = "packet loss probability (0 -> 1)")
+    parser.add_argument('--duration', type = float, default = 5, help = "length of each run (seconds)")
+    parser.add_argument('--poll-rate', type = float, default = 50, help = "sensor polling rate (Hz)")
+    parser.add_argument('--max-send-rate', type = float, default = ROV_SERIAL.maxSendRate, help = "setpoint send rate limit (Hz, 0 = unlimited)")
+    args = parser.parse_args()
+
+    for protocolName in args.protocol:
+        results = runBenchmark(protocolName, args.baud, args.latency, args.jitter, args.loss,
+                               args.duration, args.poll_rate, args.max_send_rate)
+        printResults(protocolName, results)
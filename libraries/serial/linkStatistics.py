@@ -0,0 +1,378 @@
+from collections import deque
+from threading import Lock
+from time import monotonic
+
+class ROLLING_HISTOGRAM():
+    """
+    PURPOSE
+
+    Stores the most recent samples of a measurement and summarises their distribution.
+    """
+    def __init__(self, maxSamples = 500):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - maxSamples = number of recent samples to keep.
+
+        RETURNS
+
+        NONE
+        """
+        self.samples = deque(maxlen = maxSamples)
+
+    def addSample(self, value):
+        """
+        PURPOSE
+
+        Adds a sample, discarding the oldest sample if the history is full.
+
+        INPUT
+
+        - value = the measured value.
+
+        RETURNS
+
+        NONE
+        """
+        self.samples.append(value)
+
+    def getSummary(self):
+        """
+        PURPOSE
+
+        Calculates the count, mean, minimum, maximum and percentiles of the stored samples.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - summary = dictionary of the statistics (values are None if there are no samples).
+        """
+        samples = sorted(self.samples)
+        count = len(samples)
+
+        if count == 0:
+            return {'count': 0, 'mean': None, 'min': None, 'max': None, 'p50': None, 'p95': None, 'p99': None}
+
+        return {'count': count,
+                'mean': sum(samples) / count,
+                'min': samples[0],
+                'max': samples[-1],
+                'p50': samples[int(0.50 * (count - 1))],
+                'p95': samples[int(0.95 * (count - 1))],
+                'p99': samples[int(0.99 * (count - 1))]}
+
+    def getBuckets(self, edges):
+        """
+        PURPOSE
+
+        Counts how many stored samples fall between each pair of bucket edges.
+
+        INPUT
+
+        - edges = ascending list of bucket edges.
+
+        RETURNS
+
+        - counts = list with one count per edge (the last bucket holds every sample above the last edge).
+        """
+        counts = [0] * len(edges)
+
+        for sample in self.samples:
+            bucket = 0
+            while bucket < len(edges) - 1 and sample >= edges[bucket + 1]:
+                bucket += 1
+            counts[bucket] += 1
+
+        return counts
+
+class RATE_COUNTER():
+    """
+    PURPOSE
+
+    Measures how much of something (events, bytes) happened over the last few seconds.
+    """
+    def __init__(self, window = 1):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - window = length of time to average the rate over (seconds).
+
+        RETURNS
+
+        NONE
+        """
+        self.window = window
+        self.events = deque()
+        self.total = 0
+
+    def addEvent(self, currentTime, amount = 1):
+        """
+        PURPOSE
+
+        Records a single event.
+
+        INPUT
+
+        - currentTime = monotonic time of the event (seconds).
+        - amount = size of the event (1 for a single event, or a number of bytes).
+
+        RETURNS
+
+        NONE
+        """
+        self.events.append((currentTime, amount))
+        self.total += amount
+        self.removeOldEvents(currentTime)
+
+    def removeOldEvents(self, currentTime):
+        """
+        PURPOSE
+
+        Removes events older than the averaging window.
+
+        INPUT
+
+        - currentTime = current monotonic time (seconds).
+
+        RETURNS
+
+        NONE
+        """
+        while len(self.events) > 0 and self.events[0][0] < currentTime - self.window:
+            _, amount = self.events.popleft()
+            self.total -= amount
+
+    def getRate(self, currentTime):
+        """
+        PURPOSE
+
+        Calculates the rate over the averaging window.
+
+        INPUT
+
+        - currentTime = current monotonic time (seconds).
+
+        RETURNS
+
+        - rate = amount per second.
+        """
+        self.removeOldEvents(currentTime)
+        return self.total / self.window
+
+class LINK_STATISTICS():
+    """
+    PURPOSE
+
+    Thread safe counters and rolling histograms describing the performance of the ROV serial link.
+
+    - bytesIn / bytesOut = total bytes read from / written to the serial interface.
+    - commandsSent / messagesReceived = total commands written / messages decoded.
+    - timeouts = requests that received no reply within the reply timeout.
+    - decodeErrors = received data that failed to decode (bad CRC, unrecognised or malformed messages).
+    - coalescedSetpoints = setpoint commands that were replaced by a newer setpoint before they could be sent.
+    - sendFailures / receiveFailures = exceptions raised by the serial interface.
+    - roundTrip = round trip time histograms (ms) for sensor and identity requests.
+    """
+    # DATABASE
+    replyTimeout = 1
+    requestNames = ['sensors', 'identity']
+
+    def __init__(self):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        PURPOSE
+
+        Clears all counters and histograms.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.counters = {'bytesIn': 0, 'bytesOut': 0, 'commandsSent': 0, 'messagesReceived': 0,
+                             'timeouts': 0, 'decodeErrors': 0, 'coalescedSetpoints': 0,
+                             'sendFailures': 0, 'receiveFailures': 0}
+            self.commandRate = RATE_COUNTER()
+            self.messageRate = RATE_COUNTER()
+            self.bytesOutRate = RATE_COUNTER()
+            self.bytesInRate = RATE_COUNTER()
+            self.roundTrip = {name: ROLLING_HISTOGRAM() for name in self.requestNames}
+            self.pendingRequests = {name: deque() for name in self.requestNames}
+
+    def addCount(self, counter, amount = 1):
+        """
+        PURPOSE
+
+        Increments one of the counters.
+
+        INPUT
+
+        - counter = name of the counter.
+        - amount = amount to add.
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.counters[counter] += amount
+
+    def recordSend(self, numberOfBytes, requestName = None):
+        """
+        PURPOSE
+
+        Records a command written to the serial interface.
+
+        INPUT
+
+        - numberOfBytes = size of the command.
+        - requestName = 'sensors' or 'identity' if the command expects a reply, otherwise None.
+
+        RETURNS
+
+        NONE
+        """
+        currentTime = monotonic()
+        with self.lock:
+            self.counters['bytesOut'] += numberOfBytes
+            self.counters['commandsSent'] += 1
+            self.commandRate.addEvent(currentTime)
+            self.bytesOutRate.addEvent(currentTime, numberOfBytes)
+            if requestName != None:
+                self.pendingRequests[requestName].append(currentTime)
+
+    def recordReceive(self, numberOfBytes):
+        """
+        PURPOSE
+
+        Records data read from the serial interface.
+
+        INPUT
+
+        - numberOfBytes = number of bytes read.
+
+        RETURNS
+
+        NONE
+        """
+        currentTime = monotonic()
+        with self.lock:
+            self.counters['bytesIn'] += numberOfBytes
+            self.bytesInRate.addEvent(currentTime, numberOfBytes)
+
+    def recordMessage(self, replyName = None):
+        """
+        PURPOSE
+
+        Records a decoded message. If it answers an outstanding request, the round trip time is stored.
+
+        INPUT
+
+        - replyName = 'sensors' or 'identity' if the message is a reply, otherwise None.
+
+        RETURNS
+
+        NONE
+        """
+        currentTime = monotonic()
+        with self.lock:
+            self.counters['messagesReceived'] += 1
+            self.messageRate.addEvent(currentTime)
+            if replyName != None and len(self.pendingRequests[replyName]) > 0:
+                requestTime = self.pendingRequests[replyName].popleft()
+                self.roundTrip[replyName].addSample(1000 * (currentTime - requestTime))
+
+    def addRoundTrip(self, requestName, roundTripTime):
+        """
+        PURPOSE
+
+        Stores a round trip time that was measured outside the worker thread (for example during COM port discovery).
+
+        INPUT
+
+        - requestName = 'sensors' or 'identity'.
+        - roundTripTime = the round trip time (ms).
+
+        RETURNS
+
+        NONE
+        """
+        with self.lock:
+            self.roundTrip[requestName].addSample(roundTripTime)
+
+    def checkTimeouts(self):
+        """
+        PURPOSE
+
+        Counts and forgets any requests that have waited longer than the reply timeout.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        currentTime = monotonic()
+        with self.lock:
+            for pending in self.pendingRequests.values():
+                while len(pending) > 0 and pending[0] < currentTime - self.replyTimeout:
+                    pending.popleft()
+                    self.counters['timeouts'] += 1
+
+    def getSnapshot(self):
+        """
+        PURPOSE
+
+        Returns a copy of all the link statistics.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - snapshot = dictionary containing the counters, rates (per second) and round trip summaries (ms).
+        """
+        currentTime = monotonic()
+        with self.lock:
+            snapshot = dict(self.counters)
+            snapshot['commandRate'] = self.commandRate.getRate(currentTime)
+            snapshot['messageRate'] = self.messageRate.getRate(currentTime)
+            snapshot['bytesInRate'] = self.bytesInRate.getRate(currentTime)
+            snapshot['bytesOutRate'] = self.bytesOutRate.getRate(currentTime)
+            snapshot['roundTrip'] = {name: histogram.getSummary() for name, histogram in self.roundTrip.items()}
+
+        return snapshot
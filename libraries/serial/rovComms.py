@@ -1,7 +1,16 @@
 import serial
 from datetime import datetime
+from queue import Queue, Empty
+from threading import Lock
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from serial.tools import list_ports
 
-from PyQt5.QtCore import pyqtSignal, QObject
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QThread
+
+from libraries.serial.linkStatistics import LINK_STATISTICS
+from libraries.serial.rovProtocol import (createProtocol, MSG_IDENTITY_REQUEST, MSG_ARM_THRUSTERS, MSG_THRUSTERS, 
+                                          MSG_ACTUATORS, MSG_SENSOR_REQUEST, MSG_SENSOR_STREAM, MSG_IDENTITY, MSG_SENSORS)
 
 class ROV_SERIAL(QObject):
     """
@@ -12,11 +21,28 @@ class ROV_SERIAL(QObject):
     # SIGNAL EMITTED TO UI FUNCTION WHEN THERE IS A COMMS FAIL EVENT
     uiSerialFunction = pyqtSignal(str)
 
+    # SIGNALS EMITTED WHEN A MESSAGE IS RECEIVED FROM THE ROV
+    sensorReadingsSignal = pyqtSignal(list)
+    identitySignal = pyqtSignal(str)
+
     # DATABASE
     rovID = "AVALONROV"
     rovComPort = None
     comms = None
     commsStatus = False
+    serialWorker = None
+    # RATE THE ROV IS PUSHING SENSOR READINGS AT (HZ, 0 = NOT STREAMING)
+    sensorStreamRate = 0
+    # MAXIMUM RATE THRUSTER/ACTUATOR SETPOINTS ARE SENT AT (HZ, 0 = UNLIMITED)
+    maxSendRate = 60
+    # COM PORT DISCOVERY SETTINGS
+    cachedComPort = None
+    cachedHardwareID = None
+    probeTimeout = 0.5
+    maxProbeThreads = 16
+    protocolOptions = ['ASCII', 'Binary']
+    # PROTOCOL SELECTED WHILE CONNECTED, APPLIED WHEN THE LINK IS CLOSED
+    pendingProtocol = None
 
     def __init__(self):
         """
@@ -34,11 +60,19 @@ class ROV_SERIAL(QObject):
         """
         QObject.__init__(self)
 
+        # ASCII PROTOCOL IS THE DEFAULT
+        self.protocol = createProtocol('ASCII')
+
+        # LINK PERFORMANCE COUNTERS
+        self.linkStatistics = LINK_STATISTICS()
+
     def findComPorts(self, menuObject, baudRate, rovIdentity):
         """
         PURPOSE
 
         Find all available COM ports and adds them to drop down menu.
+        The last known ROV port (or a port with the same USB VID:PID) is checked first,
+        then all other ports are probed at the same time.
 
         INPUT
 
@@ -54,48 +88,112 @@ class ROV_SERIAL(QObject):
         """
         # DISCONNECTED FROM CURRENT COM PORT IF ALREADY CONNECTED
         if self.commsStatus == True:
-            self.rovConnect()
+            self.serialDisconnect()
 
-        # CREATE LIST OF ALL POSSIBLE COM PORTS
-        ports = ['COM%s' % (i + 1) for i in range(256)] 
+        # GET LIST OF COM PORTS PRESENT ON THE SYSTEM (COMx ON WINDOWS, /dev/tty* ON LINUX)
+        hardwareIDs = self.listComPorts()
+        availableComPorts = list(hardwareIDs)
 
         # CLEAR CURRENT MENU LIST
         menuObject.clear()
         menuObject.addItem("None")
+        menuObject.addItems(availableComPorts)
 
         identity = ""
         rovComPort = None
-        availableComPorts = []
-        
-        # CHECK WHICH COM PORTS ARE AVAILABLE
-        for port in ports:
-            try:
-                comms = serial.Serial(port, baudRate, timeout = 1)
-                
-                # ADD AVAILABLE COM PORT TO MENU LIST
-                availableComPorts.append(port)
-                menuObject.addItem(port)
-                
-                # REQUEST IDENTITY FROM COM PORT
-                self.commsStatus = True
-                identity = self.getIdentity(comms, rovIdentity)
-                comms.close()
-                self.commsStatus = False
+
+        # CHECK LAST KNOWN ROV PORT FIRST
+        cachedPorts = [port for port in availableComPorts 
+                        if port == self.cachedComPort or 
+                        (self.cachedHardwareID != None and hardwareIDs[port] == self.cachedHardwareID)]
+        cachedPorts.sort(key = lambda port: port != self.cachedComPort)
+
+        for port in cachedPorts:
+            if self.probeComPort(port, baudRate, rovIdentity) == rovIdentity:
+                rovComPort = port
+                break
+
+        # PROBE REMAINING COM PORTS IN PARALLEL
+        remainingPorts = [port for port in availableComPorts if port not in cachedPorts]
+
+        if rovComPort == None and len(remainingPorts) > 0:
+            with ThreadPoolExecutor(max_workers = min(self.maxProbeThreads, len(remainingPorts))) as pool:
+                probes = {pool.submit(self.probeComPort, port, baudRate, rovIdentity): port for port in remainingPorts}
                 
-                # FIND WHICH COM PORT IS THE ROV
-                if identity == rovIdentity:
-                    rovComPort = port
-                    menuIndex = availableComPorts.index(rovComPort) + 1
-                    menuObject.setCurrentIndex(menuIndex)
-                    break
-                    
-            # SKIP COM PORT IF UNAVAILABLE
-            except (OSError, serial.SerialException):
-                pass
+                for probe in as_completed(probes):
+                    # FIND WHICH COM PORT IS THE ROV
+                    if probe.result() == rovIdentity:
+                        rovComPort = probes[probe]
+                        break
+
+        if rovComPort != None:
+            identity = rovIdentity
+
+            # REMEMBER ROV PORT FOR FAST RECONNECTION
+            self.cachedComPort = rovComPort
+            self.cachedHardwareID = hardwareIDs[rovComPort]
+
+            menuIndex = availableComPorts.index(rovComPort) + 1
+            menuObject.setCurrentIndex(menuIndex)
 
         return availableComPorts, rovComPort, identity
 
-    def getIdentity(self, serialInterface, identity):
+    def listComPorts(self):
+        """
+        PURPOSE
+
+        Lists the serial ports present on the system.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - hardwareIDs = dictionary of port name to USB 'VID:PID' string (None for non-USB ports).
+        """
+        hardwareIDs = {}
+
+        for port in sorted(list_ports.comports(), key = lambda port: port.device):
+            if port.vid != None and port.pid != None:
+                hardwareIDs[port.device] = "{:04X}:{:04X}".format(port.vid, port.pid)
+            else:
+                hardwareIDs[port.device] = None
+
+        return hardwareIDs
+
+    def probeComPort(self, port, baudRate, rovIdentity):
+        """
+        PURPOSE
+
+        Opens a COM port and requests its identity, giving up after the probe timeout.
+        Safe to call from multiple threads at the same time.
+
+        INPUT
+
+        - port = the COM port to probe.
+        - baudRate = baud rate of the serial interface.
+        - rovIdentity = string containing the required device identity to connect to the ROV.
+
+        RETURNS
+
+        - identity = the devices response ("" if there was no response).
+        """
+        identity = ""
+        try:
+            comms = serial.Serial(port, baudRate, timeout = min(0.1, self.probeTimeout))
+            try:
+                identity = self.getIdentity(comms, rovIdentity, self.probeTimeout)
+            finally:
+                comms.close()
+
+        # SKIP COM PORT IF UNAVAILABLE
+        except (OSError, serial.SerialException):
+            pass
+
+        return identity
+
+    def getIdentity(self, serialInterface, identity, timeout = 3):
         """
         PURPOSE
 
@@ -105,94 +203,323 @@ class ROV_SERIAL(QObject):
 
         - serialInterface = pointer to the serial interface object.
         - identity = the desired identity response from the device connected to the COM port.
+        - timeout = how long to keep requesting the identity for (seconds).
 
         RETURNS
 
         - identity = the devices response.
         """
+        # SEPARATE DECODER SO SEVERAL PORTS CAN BE PROBED AT ONCE
+        protocol = createProtocol(self.protocol.name)
+        request = protocol.packMessage(MSG_IDENTITY_REQUEST)
+
         identity = ""
         startTime = datetime.now()
         elapsedTime = 0
-        # REPEATIDELY REQUEST IDENTIFICATION FROM DEVICE FOR UP TO 3 SECONDS
-        while (identity == "") and (elapsedTime < 3):
-            self.serialSend("?I", serialInterface)
-            identity = self.serialReceive(serialInterface)
+        # REPEATIDELY REQUEST IDENTIFICATION FROM DEVICE UNTIL TIMEOUT
+        while (identity == "") and (elapsedTime < timeout):
+            try:
+                requestTime = monotonic()
+                serialInterface.write(request)
+                messageType, payload = protocol.readMessage(serialInterface)
+                if messageType == MSG_IDENTITY:
+                    identity = payload
+                    self.linkStatistics.addRoundTrip('identity', 1000 * (monotonic() - requestTime))
+            except (OSError, serial.SerialException):
+                break
             elapsedTime = (datetime.now() - startTime).total_seconds()
 
         return identity
 
-    def serialConnect(self, rovComPort, baudRate):
+    def setProtocol(self, protocolName):
+        """
+        PURPOSE
+
+        Selects the protocol used to communicate with the ROV.
+        While connected the current protocol is kept (the worker thread and the ROV are using it),
+        and the new protocol takes effect on the next connection.
+
+        INPUT
+
+        - protocolName = 'ASCII' (default) or 'Binary'.
+
+        RETURNS
+
+        NONE
+        """
+        if self.commsStatus == True:
+            self.pendingProtocol = protocolName
+        else:
+            self.protocol = createProtocol(protocolName)
+            self.pendingProtocol = None
+
+    def serialConnect(self, rovComPort, baudRate, protocolName = None):
         """
         PURPOSE
 
         Attempts to initialise a serial communication interface with a desired COM port.
+        Once connected, a background worker thread owns the port so the GUI never blocks on it.
 
         INPUT
 
         - rovComPort = the COM port of the ROV.
         - baudRate = the baud rate of the serial interface.
+        - protocolName = 'ASCII' or 'Binary' (if not given the currently selected protocol is used).
 
         RETURNS
 
         NONE
         """
+        # CLOSE ANY EXISTING CONNECTION
+        if self.commsStatus == True:
+            self.serialDisconnect()
+
         self.commsStatus = False
+        if protocolName != None:
+            self.setProtocol(protocolName)
         if rovComPort != None:
             try:
                 self.comms = serial.Serial(rovComPort, baudRate, timeout = 1)
-                message = "Connection to ROV successful."
+                self.protocol.reset()
+                message = "Connection to ROV successful ({} protocol).".format(self.protocol.name)
                 self.commsStatus = True
             except:
                 message = "Failed to connect to {}.".format(rovComPort)
         else:
             message = "Failed to recognise device identity."
 
+        # START BACKGROUND READ/WRITE THREAD
+        if self.commsStatus == True:
+            self.startWorker()
+
         return self.commsStatus, message
 
-    def serialSend(self, command, serialInterface):
+    def serialConnectInterface(self, serialInterface, protocolName = None):
+        """
+        PURPOSE
+
+        Connects to an object that behaves like a serial port instead of a COM port,
+        such as the SERIAL_SINK that discards commands during a mission replay.
+
+        INPUT
+
+        - serialInterface = object with the write, read, timeout and in_waiting members of a serial port.
+        - protocolName = 'ASCII' or 'Binary' (if not given the currently selected protocol is used).
+
+        RETURNS
+
+        NONE
+        """
+        # CLOSE ANY EXISTING CONNECTION
+        if self.commsStatus == True:
+            self.serialDisconnect()
+
+        if protocolName != None:
+            self.setProtocol(protocolName)
+
+        self.comms = serialInterface
+        self.protocol.reset()
+        self.commsStatus = True
+        self.startWorker()
+
+    def startWorker(self):
+        """
+        PURPOSE
+
+        Starts the background thread that reads and writes the connected serial interface.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.serialWorker = ROV_SERIAL_WORKER(self.comms, self.protocol, self.linkStatistics)
+        self.serialWorker.setMaxSendRate(self.maxSendRate)
+        self.serialWorker.messageReceivedSignal.connect(self.processMessage)
+        self.serialWorker.serialFailSignal.connect(self.serialFailEvent)
+        self.serialWorker.start()
+
+    @pyqtSlot(str)
+    def serialFailEvent(self, message):
+        """
+        PURPOSE
+
+        Called when the worker thread stops because the serial interface failed.
+        Disconnects, so commands are no longer queued to the stopped thread, and reports the failure to the UI.
+
+        INPUT
+
+        - message = string error message to show on the GUI.
+
+        RETURNS
+
+        NONE
+        """
+        # IGNORE FAILURES OF A WORKER THAT HAS ALREADY BEEN REPLACED
+        if self.sender() is not self.serialWorker:
+            return
+
+        # THE ROV CANNOT BE ASKED TO STOP STREAMING OVER A FAILED LINK
+        self.sensorStreamRate = 0
+        self.serialDisconnect()
+
+        self.uiSerialFunction.emit(message)
+
+    def setMaxSendRate(self, rate):
+        """
+        PURPOSE
+
+        Sets the maximum rate that thruster and actuator setpoints are sent to the ROV.
+
+        INPUT
+
+        - rate = maximum number of setpoints of each type sent per second (0 = unlimited).
+
+        RETURNS
+
+        NONE
+        """
+        self.maxSendRate = rate
+
+        if self.serialWorker != None:
+            self.serialWorker.setMaxSendRate(rate)
+
+    def serialDisconnect(self):
         """
         PURPOSE
 
-        Sends a string down the serial interface to the ROV.
+        Stops the background worker thread and closes the serial interface.
 
         INPUT
 
-        - command = the command to send.
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        # ASK ROV TO STOP PUSHING SENSOR READINGS
+        if self.commsStatus == True and self.sensorStreamRate > 0:
+            self.stopSensorStream()
+
+        self.commsStatus = False
+
+        # STOP BACKGROUND READ/WRITE THREAD
+        if self.serialWorker != None:
+            self.serialWorker.stop()
+            self.serialWorker = None
+
+        try:
+            self.comms.close()
+        except:
+            pass
+
+        # APPLY ANY PROTOCOL SELECTED WHILE CONNECTED
+        if self.pendingProtocol != None:
+            self.setProtocol(self.pendingProtocol)
+
+    def serialSend(self, command, serialInterface, requestName = None):
+        """
+        PURPOSE
+
+        Sends a command down the serial interface to the ROV.
+
+        INPUT
+
+        - command = the encoded command bytes, or an ASCII command string (a newline is appended).
         - serialInterface = pointer to the serial interface object.
+        - requestName = 'sensors' or 'identity' if a reply is expected (used to measure the round trip time).
 
         RETURNS
 
         NONE
         """
-        if self.commsStatus:
+        if isinstance(command, str):
+            command = (command + '\n').encode('ascii')
+
+        # ONCE CONNECTED, THE WORKER THREAD WRITES TO THE ROV PORT
+        if self.commsStatus and self.serialWorker != None and serialInterface is self.comms:
+            self.serialWorker.send(command, requestName)
+
+        elif self.commsStatus:
             try:
-                serialInterface.write((command + '\n').encode('ascii'))
+                serialInterface.write(command)
             except:
+                self.linkStatistics.addCount('sendFailures')
                 message = "Failed to send command."
                 self.uiSerialFunction.emit(message)
 
-    def serialReceive(self, serialInterface):
+    def serialSendLatest(self, messageType, command):
         """
         PURPOSE
 
-        Waits for data until a newline character is received.
+        Sends a setpoint command to the ROV, replacing any unsent command of the same type.
+        This stops stale setpoints building up when commands are generated faster than the link can send them.
 
         INPUT
 
-        - serialInterface = pointer to the serial interface object.
+        - messageType = the type of message being sent.
+        - command = the encoded command bytes.
 
         RETURNS
 
         NONE
         """
-        received = ""
+        if self.commsStatus and self.serialWorker != None:
+            self.serialWorker.sendLatest(messageType, command)
+        else:
+            self.serialSend(command, self.comms)
+
+    def receiveMessage(self, serialInterface):
+        """
+        PURPOSE
+
+        Waits until a complete message is received using the selected protocol.
+
+        INPUT
+
+        - serialInterface = pointer to the serial interface object.
+
+        RETURNS
+
+        - messageType = the type of message received (None if nothing was received).
+        - payload = the message data.
+        """
+        messageType, payload = None, None
         try:
-            received = serialInterface.readline().decode('ascii').strip()
+            messageType, payload = self.protocol.readMessage(serialInterface)
         except:
+            self.linkStatistics.addCount('receiveFailures')
             message = "Failed to receive data."
             self.uiSerialFunction.emit(message)
             
-        return(received)
+        return messageType, payload
+
+    @pyqtSlot(int, object)
+    def processMessage(self, messageType, payload):
+        """
+        PURPOSE
+
+        Called when the worker thread receives a message from the ROV.
+        Emits the message data to the rest of the program.
+
+        INPUT
+
+        - messageType = the type of message received.
+        - payload = the message data.
+
+        RETURNS
+
+        NONE
+        """
+        if messageType == MSG_SENSORS:
+            self.sensorReadingsSignal.emit(payload)
+
+        elif messageType == MSG_IDENTITY:
+            self.identitySignal.emit(payload)
 
     def armThrusters(self):
         """
@@ -209,7 +536,7 @@ class ROV_SERIAL(QObject):
         NONE
         """
         # COMMAND INITIALISATION  
-        transmitArmThrusters = '?RX'
+        transmitArmThrusters = self.protocol.packMessage(MSG_ARM_THRUSTERS)
         self.serialSend(transmitArmThrusters, self.comms)
 
     def setThrusters(self, thrusterSpeeds):
@@ -227,13 +554,9 @@ class ROV_SERIAL(QObject):
         NONE
         """
         # COMMAND INITIALISATION  
-        transmitThrusterSpeeds = '?RT'
-        # ADD ACTUATOR STATES ONTO THE END OF STRING
-        for speed in thrusterSpeeds:
-            # CONVERT TO 'xxx' format (PAD EMPTY SPACES WITH ZEROS)
-            transmitThrusterSpeeds += ('{0:03d}'.format(speed))
+        transmitThrusterSpeeds = self.protocol.packMessage(MSG_THRUSTERS, thrusterSpeeds)
 
-        self.serialSend(transmitThrusterSpeeds, self.comms)
+        self.serialSendLatest(MSG_THRUSTERS, transmitThrusterSpeeds)
 
     def setActuators(self, actuatorStates):
         """
@@ -250,18 +573,15 @@ class ROV_SERIAL(QObject):
         NONE
         """
         # COMMAND INITIALISATION  
-        transmitActuatorStates = '?RA'
-        # ADD ACTUATOR STATES ONTO THE END OF STRING
-        for state in actuatorStates:
-            # CONVERT TRUE/FALSE TO '1'/'0'
-            transmitActuatorStates += ('1' if state == True else '0')
-        self.serialSend(transmitActuatorStates, self.comms)
+        transmitActuatorStates = self.protocol.packMessage(MSG_ACTUATORS, actuatorStates)
+        self.serialSendLatest(MSG_ACTUATORS, transmitActuatorStates)
 
     def getSensors(self):
         """
         PURPOSE
 
-        Send request to ROV to get sensor readings and return them.
+        Send request to ROV to get sensor readings.
+        The readings are emitted by the sensorReadingsSignal when the reply arrives.
         
         INPUT
 
@@ -269,12 +589,275 @@ class ROV_SERIAL(QObject):
 
         RETURNS
 
-        - results = array containing the sensor readings.
+        NONE
         """
         # REQUEST SENSOR READINGS
-        command = "?RS"
+        command = self.protocol.packMessage(MSG_SENSOR_REQUEST)
+        self.serialSend(command, self.comms, 'sensors')
+
+    def getLinkStatistics(self):
+        """
+        PURPOSE
+
+        Returns the current performance statistics of the serial link.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - statistics = dictionary of counters, rates and round trip time summaries (see LINK_STATISTICS).
+        """
+        return self.linkStatistics.getSnapshot()
+
+    def startSensorStream(self, rate):
+        """
+        PURPOSE
+
+        Asks the ROV to push sensor readings at a fixed rate instead of waiting to be polled.
+        The readings are emitted by the sensorReadingsSignal as they arrive.
+
+        INPUT
+
+        - rate = number of sensor readings per second.
+
+        RETURNS
+
+        NONE
+        """
+        self.sensorStreamRate = rate
+        command = self.protocol.packMessage(MSG_SENSOR_STREAM, rate)
+        self.serialSend(command, self.comms)
+
+    def stopSensorStream(self):
+        """
+        PURPOSE
+
+        Asks the ROV to stop pushing sensor readings.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.sensorStreamRate = 0
+        command = self.protocol.packMessage(MSG_SENSOR_STREAM, 0)
         self.serialSend(command, self.comms)
-        # READ RESPONSE INTO AN ARRAY
-        results = self.serialReceive(self.comms).split(",")
 
-        return results
+class ROV_SERIAL_WORKER(QThread):
+    """
+    PURPOSE
+
+    Background thread that owns the serial interface while connected to the ROV.
+    Writes queued commands and reads/decodes replies so the GUI thread never blocks on the port.
+    """
+    # SIGNALS TO SEND DATA BACK TO ROV_SERIAL (SERIAL FAIL IS EMITTED AS THE THREAD STOPS)
+    messageReceivedSignal = pyqtSignal(int, object)
+    serialFailSignal = pyqtSignal(str)
+
+    # REPLY MESSAGES USED TO MEASURE ROUND TRIP TIMES
+    replyNames = {MSG_SENSORS: 'sensors', MSG_IDENTITY: 'identity'}
+
+    def __init__(self, serialInterface, protocol, linkStatistics):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - serialInterface = pointer to the serial interface object.
+        - protocol = the protocol object used to decode replies.
+        - linkStatistics = the LINK_STATISTICS object to record link performance in.
+
+        RETURNS
+
+        NONE
+        """
+        QThread.__init__(self)
+        self.serialInterface = serialInterface
+        self.protocol = protocol
+        self.linkStatistics = linkStatistics
+        self.sendQueue = Queue()
+        self.runWorker = True
+        # MAXIMUM TIME A READ BLOCKS FOR, WHICH LIMITS HOW LONG A QUEUED COMMAND WAITS (SECONDS)
+        self.readTimeout = 0.005
+
+        # LATEST UNSENT SETPOINT OF EACH MESSAGE TYPE
+        self.latestCommands = {}
+        self.latestLock = Lock()
+        self.sendInterval = 0
+        self.nextSendTime = 0
+
+    def send(self, command, requestName = None):
+        """
+        PURPOSE
+
+        Adds a command to the outbound queue. Never blocks.
+
+        INPUT
+
+        - command = the encoded command bytes.
+        - requestName = 'sensors' or 'identity' if a reply is expected.
+
+        RETURNS
+
+        NONE
+        """
+        self.sendQueue.put((command, requestName))
+
+    def sendLatest(self, messageType, command):
+        """
+        PURPOSE
+
+        Stores a setpoint command, overwriting any unsent command of the same type. Never blocks.
+
+        INPUT
+
+        - messageType = the type of message being sent.
+        - command = the encoded command bytes.
+
+        RETURNS
+
+        NONE
+        """
+        with self.latestLock:
+            if messageType in self.latestCommands:
+                self.linkStatistics.addCount('coalescedSetpoints')
+            self.latestCommands[messageType] = command
+
+    def setMaxSendRate(self, rate):
+        """
+        PURPOSE
+
+        Sets the maximum rate that setpoint commands are written at.
+
+        INPUT
+
+        - rate = maximum number of setpoints of each type sent per second (0 = unlimited).
+
+        RETURNS
+
+        NONE
+        """
+        self.sendInterval = 1 / rate if rate > 0 else 0
+
+    def outputDrained(self):
+        """
+        PURPOSE
+
+        Checks whether the operating system has finished sending previously written data.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - drained = True if the output buffer is empty (or cannot be checked).
+        """
+        try:
+            return self.serialInterface.out_waiting == 0
+        except:
+            return True
+
+    def run(self):
+        """
+        PURPOSE
+
+        Main loop that writes queued commands and emits each message received from the ROV.
+        Setpoint commands are only written once the previous data has left the output buffer,
+        so the ROV always receives the newest setpoint rather than a backlog of old ones.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.serialInterface.timeout = self.readTimeout
+
+        while self.runWorker:
+            # WRITE ALL QUEUED COMMANDS
+            try:
+                while True:
+                    command, requestName = self.sendQueue.get_nowait()
+                    self.serialInterface.write(command)
+                    self.linkStatistics.recordSend(len(command), requestName)
+            except Empty:
+                pass
+            except:
+                self.linkStatistics.addCount('sendFailures')
+                self.serialFailSignal.emit("Failed to send command.")
+                break
+
+            # WRITE LATEST SETPOINTS AT THE MAXIMUM SEND RATE
+            currentTime = monotonic()
+            if len(self.latestCommands) > 0 and currentTime >= self.nextSendTime and self.outputDrained():
+                with self.latestLock:
+                    commands = list(self.latestCommands.values())
+                    self.latestCommands.clear()
+                try:
+                    for command in commands:
+                        self.serialInterface.write(command)
+                        self.linkStatistics.recordSend(len(command))
+                except:
+                    self.linkStatistics.addCount('sendFailures')
+                    self.serialFailSignal.emit("Failed to send command.")
+                    break
+                self.nextSendTime = currentTime + self.sendInterval
+
+            # READ ANY AVAILABLE DATA
+            try:
+                data = self.serialInterface.read(max(1, self.serialInterface.in_waiting))
+            except:
+                self.linkStatistics.addCount('receiveFailures')
+                self.serialFailSignal.emit("Failed to receive data.")
+                break
+
+            # DECODE AND EMIT EACH COMPLETE MESSAGE
+            if len(data) > 0:
+                self.linkStatistics.recordReceive(len(data))
+                previousErrors = self.protocol.decodeErrors
+
+                for messageType, payload in self.protocol.decode(data):
+                    self.linkStatistics.recordMessage(self.replyNames.get(messageType))
+                    self.messageReceivedSignal.emit(messageType, payload)
+
+                if self.protocol.decodeErrors > previousErrors:
+                    self.linkStatistics.addCount('decodeErrors', self.protocol.decodeErrors - previousErrors)
+
+            # COUNT REQUESTS THAT HAVE NOT BEEN ANSWERED
+            self.linkStatistics.checkTimeouts()
+
+        # SEND ANY COMMANDS QUEUED BEFORE THE THREAD WAS STOPPED
+        if not self.runWorker:
+            try:
+                while True:
+                    command, _ = self.sendQueue.get_nowait()
+                    self.serialInterface.write(command)
+            except:
+                pass
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops the worker thread and waits for it to finish.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.runWorker = False
+        self.wait()
\ No newline at end of file
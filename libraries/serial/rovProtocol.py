@@ -0,0 +1,430 @@
+from binascii import crc_hqx
+from struct import pack, unpack, error as StructError
+from datetime import datetime
+from collections import deque
+
+# MESSAGE TYPES (GUI -> ROV)
+MSG_IDENTITY_REQUEST = 0x01
+MSG_ARM_THRUSTERS = 0x02
+MSG_THRUSTERS = 0x03
+MSG_ACTUATORS = 0x04
+MSG_SENSOR_REQUEST = 0x05
+MSG_SENSOR_STREAM = 0x06
+
+# MESSAGE TYPES (ROV -> GUI)
+MSG_IDENTITY = 0x81
+MSG_SENSORS = 0x85
+
+class ASCII_PROTOCOL():
+    """
+    PURPOSE
+
+    Packs and unpacks the original newline terminated ASCII commands ('?I', '?RX', '?RT', '?RA', '?RS').
+    This is the default protocol and is understood by all existing ROV firmware.
+
+    '?RSSxxx' asks the ROV to push sensor readings at xxx Hz without being polled ('?RSS000' stops the stream).
+    """
+    # DATABASE
+    name = "ASCII"
+
+    def __init__(self):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.receiveBuffer = b""
+        self.decodeErrors = 0
+        # MESSAGES DECODED BY readMessage THAT HAVE NOT BEEN RETURNED YET
+        self.pendingMessages = deque()
+
+    def packMessage(self, messageType, payload = None):
+        """
+        PURPOSE
+
+        Converts a message into the bytes to write to the serial interface.
+
+        INPUT
+
+        - messageType = one of the MSG_ constants.
+        - payload = the message data (thruster speeds, actuator states, sensor readings or identity string).
+
+        RETURNS
+
+        - data = the encoded message.
+        """
+        if messageType == MSG_IDENTITY_REQUEST:
+            command = "?I"
+
+        elif messageType == MSG_ARM_THRUSTERS:
+            command = "?RX"
+
+        elif messageType == MSG_THRUSTERS:
+            # CONVERT TO 'xxx' FORMAT (PAD EMPTY SPACES WITH ZEROS)
+            command = "?RT" + "".join('{0:03d}'.format(speed) for speed in payload)
+
+        elif messageType == MSG_ACTUATORS:
+            # CONVERT TRUE/FALSE TO '1'/'0'
+            command = "?RA" + "".join('1' if state == True else '0' for state in payload)
+
+        elif messageType == MSG_SENSOR_REQUEST:
+            command = "?RS"
+
+        elif messageType == MSG_SENSOR_STREAM:
+            command = "?RSS" + '{0:03d}'.format(payload)
+
+        elif messageType == MSG_SENSORS:
+            command = ",".join(str(reading) for reading in payload)
+
+        elif messageType == MSG_IDENTITY:
+            command = payload
+
+        else:
+            raise ValueError("Unknown message type {}.".format(messageType))
+
+        return (command + '\n').encode('ascii')
+
+    def unpackMessage(self, line):
+        """
+        PURPOSE
+
+        Converts a single received line into a message.
+
+        INPUT
+
+        - line = the received line without the newline character.
+
+        RETURNS
+
+        - messageType = one of the MSG_ constants, or None if the line could not be decoded.
+        - payload = the message data.
+        """
+        try:
+            command = line.decode('ascii').strip() if isinstance(line, bytes) else line.strip()
+        except UnicodeDecodeError:
+            self.decodeErrors += 1
+            return None, None
+
+        if command == "":
+            return None, None
+
+        if command.startswith("?"):
+            if command == "?I":
+                return MSG_IDENTITY_REQUEST, None
+            if command == "?RX":
+                return MSG_ARM_THRUSTERS, None
+            if command == "?RS":
+                return MSG_SENSOR_REQUEST, None
+            if command.startswith("?RSS") and len(command) == 7 and command[4:].isdigit():
+                return MSG_SENSOR_STREAM, int(command[4:])
+            if command.startswith("?RT"):
+                digits = command[3:]
+                if len(digits) % 3 == 0 and digits.isdigit():
+                    return MSG_THRUSTERS, [int(digits[i:i + 3]) for i in range(0, len(digits), 3)]
+            if command.startswith("?RA"):
+                states = command[3:]
+                if set(states) <= {'0', '1'}:
+                    return MSG_ACTUATORS, [state == '1' for state in states]
+
+            self.decodeErrors += 1
+            return None, None
+
+        # A LINE OF COMMA SEPARATED NUMBERS IS A SENSOR REPLY, ANYTHING ELSE IS AN IDENTITY
+        try:
+            return MSG_SENSORS, [float(reading) for reading in command.split(",")]
+        except ValueError:
+            return MSG_IDENTITY, command
+
+    def decode(self, data):
+        """
+        PURPOSE
+
+        Adds received bytes to the receive buffer and returns every complete message.
+
+        INPUT
+
+        - data = bytes read from the serial interface.
+
+        RETURNS
+
+        - messages = list of (messageType, payload) tuples.
+        """
+        self.receiveBuffer += data
+        messages = []
+
+        # SPLIT OFF EACH COMPLETE LINE
+        *lines, self.receiveBuffer = self.receiveBuffer.split(b'\n')
+        for line in lines:
+            messageType, payload = self.unpackMessage(line)
+            if messageType != None:
+                messages.append((messageType, payload))
+
+        return messages
+
+    def readMessage(self, serialInterface):
+        """
+        PURPOSE
+
+        Blocks until a single message is received or the serial interface times out.
+
+        INPUT
+
+        - serialInterface = pointer to the serial interface object.
+
+        RETURNS
+
+        - messageType = one of the MSG_ constants, or None if nothing was received.
+        - payload = the message data.
+        """
+        return self.unpackMessage(serialInterface.readline())
+
+    def reset(self):
+        """
+        PURPOSE
+
+        Clears any partially received message, and any received messages that have not been returned yet.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.receiveBuffer = b""
+        self.pendingMessages.clear()
+
+class BINARY_PROTOCOL(ASCII_PROTOCOL):
+    """
+    PURPOSE
+
+    Packs and unpacks length prefixed binary frames.
+
+    FRAME FORMAT
+
+    | 0xA5 0x5A | LENGTH (1) | TYPE (1) | PAYLOAD (LENGTH) | CRC16 (2) |
+
+    All multi-byte fields are little-endian. The CRC is CRC-16/CCITT (initial value 0xFFFF)
+    calculated over the LENGTH, TYPE and PAYLOAD bytes.
+
+    PAYLOADS
+
+    - MSG_THRUSTERS = one uint16 per thruster (speed 1 - 999).
+    - MSG_ACTUATORS = uint8 actuator count followed by the states packed into bits (LSB first).
+    - MSG_SENSORS = one float32 per sensor.
+    - MSG_SENSOR_STREAM = uint16 rate that the ROV should push sensor readings at (Hz, 0 = stop).
+    - MSG_IDENTITY = ASCII identity string.
+    - All requests have an empty payload.
+    """
+    # DATABASE
+    name = "Binary"
+    syncBytes = b'\xa5\x5a'
+    headerSize = 4
+    crcSize = 2
+
+    def packMessage(self, messageType, payload = None):
+        """
+        PURPOSE
+
+        Converts a message into a binary frame.
+
+        INPUT
+
+        - messageType = one of the MSG_ constants.
+        - payload = the message data (thruster speeds, actuator states, sensor readings or identity string).
+
+        RETURNS
+
+        - data = the encoded frame.
+        """
+        if messageType in (MSG_IDENTITY_REQUEST, MSG_ARM_THRUSTERS, MSG_SENSOR_REQUEST):
+            body = b""
+
+        elif messageType == MSG_THRUSTERS:
+            body = pack('<{}H'.format(len(payload)), *payload)
+
+        elif messageType == MSG_ACTUATORS:
+            # PACK ACTUATOR STATES INTO BITS
+            bits = bytearray((len(payload) + 7) // 8)
+            for i, state in enumerate(payload):
+                if state == True:
+                    bits[i // 8] |= 1 << (i % 8)
+            body = pack('<B', len(payload)) + bytes(bits)
+
+        elif messageType == MSG_SENSOR_STREAM:
+            body = pack('<H', payload)
+
+        elif messageType == MSG_SENSORS:
+            body = pack('<{}f'.format(len(payload)), *payload)
+
+        elif messageType == MSG_IDENTITY:
+            body = payload.encode('ascii')
+
+        else:
+            raise ValueError("Unknown message type {}.".format(messageType))
+
+        if len(body) > 255:
+            raise ValueError("Payload too long for a single frame.")
+
+        header = pack('<BB', len(body), messageType)
+        crc = crc_hqx(header + body, 0xFFFF)
+
+        return self.syncBytes + header + body + pack('<H', crc)
+
+    def unpackPayload(self, messageType, body):
+        """
+        PURPOSE
+
+        Converts the payload of a frame back into the message data.
+
+        INPUT
+
+        - messageType = one of the MSG_ constants.
+        - body = the payload bytes.
+
+        RETURNS
+
+        - payload = the message data, raises ValueError if the payload is malformed.
+        """
+        try:
+            if messageType in (MSG_IDENTITY_REQUEST, MSG_ARM_THRUSTERS, MSG_SENSOR_REQUEST):
+                return None
+
+            if messageType == MSG_THRUSTERS:
+                return list(unpack('<{}H'.format(len(body) // 2), body))
+
+            if messageType == MSG_ACTUATORS:
+                quantity = body[0]
+                return [bool(body[1 + i // 8] & (1 << (i % 8))) for i in range(quantity)]
+
+            if messageType == MSG_SENSOR_STREAM:
+                return unpack('<H', body)[0]
+
+            if messageType == MSG_SENSORS:
+                return list(unpack('<{}f'.format(len(body) // 4), body))
+
+            if messageType == MSG_IDENTITY:
+                return body.decode('ascii')
+
+        except (StructError, IndexError, UnicodeDecodeError):
+            pass
+
+        raise ValueError("Malformed payload for message type {}.".format(messageType))
+
+    def decode(self, data):
+        """
+        PURPOSE
+
+        Adds received bytes to the receive buffer and returns every complete, valid frame.
+        Corrupted frames are discarded and the decoder re-synchronises on the next sync bytes.
+
+        INPUT
+
+        - data = bytes read from the serial interface.
+
+        RETURNS
+
+        - messages = list of (messageType, payload) tuples.
+        """
+        self.receiveBuffer += data
+        messages = []
+
+        while True:
+            # FIND START OF NEXT FRAME
+            start = self.receiveBuffer.find(self.syncBytes)
+            if start < 0:
+                # KEEP LAST BYTE IN CASE IT IS THE FIRST HALF OF THE SYNC BYTES
+                self.receiveBuffer = self.receiveBuffer[-1:]
+                break
+            if start > 0:
+                self.receiveBuffer = self.receiveBuffer[start:]
+
+            # WAIT FOR COMPLETE HEADER
+            if len(self.receiveBuffer) < self.headerSize:
+                break
+
+            length, messageType = self.receiveBuffer[2], self.receiveBuffer[3]
+            frameSize = self.headerSize + length + self.crcSize
+
+            # WAIT FOR COMPLETE FRAME
+            if len(self.receiveBuffer) < frameSize:
+                break
+
+            header = self.receiveBuffer[2:4]
+            body = self.receiveBuffer[4:4 + length]
+            crc, = unpack('<H', self.receiveBuffer[4 + length:frameSize])
+
+            if crc_hqx(header + body, 0xFFFF) != crc:
+                # SKIP THESE SYNC BYTES AND SEARCH FOR THE NEXT FRAME
+                self.decodeErrors += 1
+                self.receiveBuffer = self.receiveBuffer[2:]
+                continue
+
+            self.receiveBuffer = self.receiveBuffer[frameSize:]
+
+            try:
+                messages.append((messageType, self.unpackPayload(messageType, body)))
+            except ValueError:
+                self.decodeErrors += 1
+
+        return messages
+
+    def readMessage(self, serialInterface):
+        """
+        PURPOSE
+
+        Blocks until a single frame is received or the serial interface times out.
+        If one read contains several frames, the others are kept and returned by the next calls.
+
+        INPUT
+
+        - serialInterface = pointer to the serial interface object.
+
+        RETURNS
+
+        - messageType = one of the MSG_ constants, or None if nothing was received.
+        - payload = the message data.
+        """
+        if len(self.pendingMessages) > 0:
+            return self.pendingMessages.popleft()
+
+        timeout = serialInterface.timeout if serialInterface.timeout != None else 1
+        startTime = datetime.now()
+
+        while (datetime.now() - startTime).total_seconds() < timeout:
+            data = serialInterface.read(max(1, serialInterface.in_waiting))
+            if data == b"":
+                break
+            self.pendingMessages.extend(self.decode(data))
+            if len(self.pendingMessages) > 0:
+                return self.pendingMessages.popleft()
+
+        return None, None
+
+def createProtocol(name):
+    """
+    PURPOSE
+
+    Creates a protocol object from its name.
+
+    INPUT
+
+    - name = "ASCII" or "Binary".
+
+    RETURNS
+
+    - protocol = the protocol object (defaults to ASCII if the name is not recognised).
+    """
+    if name == BINARY_PROTOCOL.name:
+        return BINARY_PROTOCOL()
+
+    return ASCII_PROTOCOL()
@@ -0,0 +1,292 @@
+import os
+import tty
+import select
+import heapq
+import random
+from math import sin
+from threading import Thread, Condition
+from time import monotonic, sleep
+
+from libraries.serial.rovProtocol import (createProtocol, MSG_IDENTITY_REQUEST, MSG_ARM_THRUSTERS, MSG_THRUSTERS,
+                                          MSG_ACTUATORS, MSG_SENSOR_REQUEST, MSG_SENSOR_STREAM, MSG_IDENTITY, MSG_SENSORS)
+
+class ROV_SIMULATOR():
+    """
+    PURPOSE
+
+    A simulated ROV connected to a pseudo-terminal, so ROV_SERIAL can be benchmarked and tested without the physical ROV.
+    Speaks the same '?I', '?RX', '?RT', '?RA', '?RS' (and sensor stream) commands using either protocol.
+
+    The link can be degraded with a baud rate limit, reply latency, jitter and packet loss.
+    Pseudo-terminals are only available on Linux and macOS. They do not report how much data is waiting
+    to be sent, so on a throttled link setpoints are only limited by the maximum send rate of ROV_SERIAL.
+    """
+    # DATABASE
+    identity = "AVALONROV"
+
+    def __init__(self, protocolName = 'ASCII', baudRate = 115200, latency = 0, jitter = 0, packetLoss = 0, sensorQuantity = 4):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - protocolName = 'ASCII' or 'Binary'.
+        - baudRate = simulated link speed in bits per second (0 = unlimited).
+        - latency = delay before each reply is sent (seconds).
+        - jitter = maximum random variation added to the latency (seconds).
+        - packetLoss = probability (0 -> 1) that a message in either direction is lost.
+        - sensorQuantity = number of sensor readings in each reply.
+
+        RETURNS
+
+        NONE
+        """
+        self.protocolName = protocolName
+        self.baudRate = baudRate
+        self.latency = latency
+        self.jitter = jitter
+        self.packetLoss = packetLoss
+        self.sensorQuantity = sensorQuantity
+
+        self.portName = None
+        self.runSimulator = False
+
+        # ROV STATE
+        self.armed = False
+        self.thrusterSpeeds = []
+        self.actuatorStates = []
+        self.streamRate = 0
+        self.messagesReceived = {}
+
+        # REPLIES WAITING TO BE SENT (SEND TIME, ORDER, DATA)
+        self.replyQueue = []
+        self.replyOrder = 0
+        self.replyCondition = Condition()
+
+    def start(self):
+        """
+        PURPOSE
+
+        Creates the pseudo-terminal and starts the simulator threads.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - portName = the device name to connect ROV_SERIAL to (for example /dev/pts/3).
+        """
+        self.masterPort, self.slavePort = os.openpty()
+        tty.setraw(self.slavePort)
+        self.portName = os.ttyname(self.slavePort)
+
+        self.protocol = createProtocol(self.protocolName)
+        self.runSimulator = True
+
+        self.receiveThread = Thread(target = self.receiveLoop, daemon = True)
+        self.transmitThread = Thread(target = self.transmitLoop, daemon = True)
+        self.receiveThread.start()
+        self.transmitThread.start()
+
+        return self.portName
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops the simulator threads and closes the pseudo-terminal.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.runSimulator = False
+        with self.replyCondition:
+            self.replyCondition.notify()
+        self.receiveThread.join()
+        self.transmitThread.join()
+
+        os.close(self.masterPort)
+        os.close(self.slavePort)
+
+    def throttle(self, numberOfBytes):
+        """
+        PURPOSE
+
+        Waits for the time the simulated link would take to carry some data (10 bits per byte).
+
+        INPUT
+
+        - numberOfBytes = size of the data.
+
+        RETURNS
+
+        NONE
+        """
+        if self.baudRate > 0:
+            sleep(numberOfBytes * 10 / self.baudRate)
+
+    def receiveLoop(self):
+        """
+        PURPOSE
+
+        Reads commands from the pseudo-terminal at the simulated baud rate and processes them.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        while self.runSimulator:
+            ready, _, _ = select.select([self.masterPort], [], [], 0.05)
+            if len(ready) == 0:
+                continue
+
+            # READ SMALL CHUNKS SO DATA BACKS UP IN THE OPERATING SYSTEM BUFFER LIKE A REAL LINK
+            try:
+                data = os.read(self.masterPort, 64)
+            except OSError:
+                break
+            self.throttle(len(data))
+
+            for messageType, payload in self.protocol.decode(data):
+                if random.random() >= self.packetLoss:
+                    self.processMessage(messageType, payload)
+
+    def processMessage(self, messageType, payload):
+        """
+        PURPOSE
+
+        Updates the simulated ROV state and queues any reply.
+
+        INPUT
+
+        - messageType = the type of message received.
+        - payload = the message data.
+
+        RETURNS
+
+        NONE
+        """
+        self.messagesReceived[messageType] = self.messagesReceived.get(messageType, 0) + 1
+
+        if messageType == MSG_IDENTITY_REQUEST:
+            self.queueReply(MSG_IDENTITY, self.identity)
+
+        elif messageType == MSG_ARM_THRUSTERS:
+            self.armed = True
+
+        elif messageType == MSG_THRUSTERS:
+            self.thrusterSpeeds = payload
+
+        elif messageType == MSG_ACTUATORS:
+            self.actuatorStates = payload
+
+        elif messageType == MSG_SENSOR_REQUEST:
+            self.queueReply(MSG_SENSORS, self.getSensorReadings())
+
+        elif messageType == MSG_SENSOR_STREAM:
+            self.streamRate = payload
+            with self.replyCondition:
+                self.replyCondition.notify()
+
+    def queueReply(self, messageType, payload, delay = None):
+        """
+        PURPOSE
+
+        Schedules a reply to be sent after the simulated latency and jitter.
+
+        INPUT
+
+        - messageType = the type of message to send.
+        - payload = the message data.
+        - delay = delay before sending (seconds). If not given the latency and jitter are used.
+
+        RETURNS
+
+        NONE
+        """
+        if delay == None:
+            delay = max(0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+        data = self.protocol.packMessage(messageType, payload)
+
+        with self.replyCondition:
+            self.replyOrder += 1
+            heapq.heappush(self.replyQueue, (monotonic() + delay, self.replyOrder, data))
+            self.replyCondition.notify()
+
+    def transmitLoop(self):
+        """
+        PURPOSE
+
+        Sends queued replies when they are due, and streamed sensor readings when streaming is enabled.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        nextStreamTime = monotonic()
+
+        while self.runSimulator:
+            with self.replyCondition:
+                currentTime = monotonic()
+
+                # QUEUE NEXT STREAMED SENSOR READING
+                if self.streamRate > 0 and currentTime >= nextStreamTime:
+                    nextStreamTime = currentTime + 1 / self.streamRate
+                    self.replyOrder += 1
+                    data = self.protocol.packMessage(MSG_SENSORS, self.getSensorReadings())
+                    heapq.heappush(self.replyQueue, (currentTime, self.replyOrder, data))
+
+                # WAIT UNTIL THE NEXT REPLY OR STREAMED READING IS DUE
+                if len(self.replyQueue) == 0 or self.replyQueue[0][0] > currentTime:
+                    waitTime = 0.05
+                    if len(self.replyQueue) > 0:
+                        waitTime = min(waitTime, self.replyQueue[0][0] - currentTime)
+                    if self.streamRate > 0:
+                        waitTime = min(waitTime, nextStreamTime - currentTime)
+                    self.replyCondition.wait(max(waitTime, 0))
+                    continue
+
+                _, _, data = heapq.heappop(self.replyQueue)
+
+            # SEND REPLY AT THE SIMULATED BAUD RATE
+            if random.random() >= self.packetLoss:
+                self.throttle(len(data))
+                try:
+                    os.write(self.masterPort, data)
+                except OSError:
+                    break
+
+    def getSensorReadings(self):
+        """
+        PURPOSE
+
+        Generates slowly varying sensor readings.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - readings = list of sensor readings.
+        """
+        currentTime = monotonic()
+
+        return [round(10 * (i + 1) + sin(currentTime + i), 2) for i in range(self.sensorQuantity)]
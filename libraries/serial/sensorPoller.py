@@ -0,0 +1,215 @@
+from time import monotonic
+
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QTimer, Qt
+
+class SENSOR_POLLER(QObject):
+    """
+    PURPOSE
+
+    Single long-lived scheduler that requests sensor readings at a set rate.
+    If replies arrive late or are lost the polling rate is reduced, and it recovers back
+    to the requested rate once replies are on time again.
+    """
+    # SIGNAL EMITTED WHEN A SENSOR READING SHOULD BE REQUESTED
+    pollSignal = pyqtSignal()
+
+    # DATABASE
+    minimumRate = 1
+    # A REPLY IS LATE IF IT TAKES LONGER THAN THIS FRACTION OF THE POLLING INTERVAL
+    lateThreshold = 0.8
+    # RATE IS DIVIDED BY THIS WHEN A REPLY IS LATE
+    backoffFactor = 1.5
+    # RATE IS MULTIPLIED BY THIS WHEN A REPLY IS ON TIME
+    recoveryFactor = 1.1
+    # A REQUEST WITH NO REPLY IS ABANDONED AFTER THIS MANY POLLING INTERVALS
+    timeoutPolls = 3
+
+    def __init__(self, rate = 10, clock = monotonic, timerClass = QTimer):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        - rate = the requested polling rate (Hz).
+        - clock = function returning the current time (seconds), replaced to run the poller on simulated time.
+        - timerClass = class of the polling timer, replaced to run the poller on simulated time.
+
+        RETURNS
+
+        NONE
+        """
+        QObject.__init__(self)
+        self.targetRate = rate
+        self.currentRate = rate
+        self.awaitingReply = False
+        self.requestTime = 0
+        self.missedPolls = 0
+        self.clock = clock
+
+        # ONE TIMER FOR THE LIFE OF THE PROGRAM
+        self.timer = timerClass()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.poll)
+
+    def start(self, rate = None):
+        """
+        PURPOSE
+
+        Starts polling. Calling this while already polling only changes the rate.
+
+        INPUT
+
+        - rate = the requested polling rate (Hz). If not given the previous rate is used.
+
+        RETURNS
+
+        NONE
+        """
+        if rate != None:
+            self.targetRate = rate
+        self.currentRate = self.targetRate
+        self.awaitingReply = False
+        self.timer.start(self.getInterval())
+
+    def stop(self):
+        """
+        PURPOSE
+
+        Stops polling.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.timer.stop()
+        self.awaitingReply = False
+
+    def setRate(self, rate):
+        """
+        PURPOSE
+
+        Changes the requested polling rate without restarting the poller.
+
+        INPUT
+
+        - rate = the requested polling rate (Hz).
+
+        RETURNS
+
+        NONE
+        """
+        self.targetRate = rate
+        self.changeCurrentRate(rate)
+
+    def isActive(self):
+        """
+        PURPOSE
+
+        Checks whether the poller is running.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - status = True if polling.
+        """
+        return self.timer.isActive()
+
+    def getInterval(self):
+        """
+        PURPOSE
+
+        Calculates the timer interval for the current polling rate.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - interval = time between polls (ms).
+        """
+        return int(1000 / self.currentRate)
+
+    def changeCurrentRate(self, rate):
+        """
+        PURPOSE
+
+        Applies a new polling rate, limited between the minimum and requested rate.
+
+        INPUT
+
+        - rate = the new polling rate (Hz).
+
+        RETURNS
+
+        NONE
+        """
+        self.currentRate = min(max(rate, self.minimumRate), self.targetRate)
+
+        if self.timer.isActive():
+            self.timer.setInterval(self.getInterval())
+
+    def poll(self):
+        """
+        PURPOSE
+
+        Called by the timer. Emits a request unless the previous request is still waiting for a reply.
+        A request with no reply after timeoutPolls intervals counts as one lost reply and the rate backs off once.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        # DO NOT LET REQUESTS PILE UP WHILST THE ROV IS SLOW TO REPLY
+        if self.awaitingReply:
+            self.missedPolls += 1
+            if self.missedPolls < self.timeoutPolls:
+                return
+
+            # THE REPLY WAS LOST
+            self.changeCurrentRate(self.currentRate / self.backoffFactor)
+
+        self.awaitingReply = True
+        self.missedPolls = 0
+        self.requestTime = self.clock()
+        self.pollSignal.emit()
+
+    @pyqtSlot()
+    def replyReceived(self):
+        """
+        PURPOSE
+
+        Called when sensor readings are received. Adjusts the polling rate depending on how long the reply took.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        if not self.awaitingReply:
+            return
+
+        self.awaitingReply = False
+        replyTime = self.clock() - self.requestTime
+
+        # BACK OFF IF THE REPLY WAS LATE, OTHERWISE RECOVER TOWARDS THE REQUESTED RATE
+        if replyTime > self.lateThreshold / self.currentRate:
+            self.changeCurrentRate(self.currentRate / self.backoffFactor)
+        elif self.currentRate < self.targetRate:
+            self.changeCurrentRate(self.currentRate * self.recoveryFactor)
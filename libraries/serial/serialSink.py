@@ -0,0 +1,121 @@
+from threading import Lock
+from time import sleep
+
+class SERIAL_SINK():
+    """
+    PURPOSE
+
+    Stands in for the serial port when there is no ROV, such as during a mission replay.
+    Every command written to it is counted and discarded, and reads return nothing after waiting
+    for the read timeout, just like a connected ROV that never replies.
+    """
+    # DATABASE
+    timeout = 1
+    in_waiting = 0
+    out_waiting = 0
+
+    def __init__(self):
+        """
+        PURPOSE
+
+        Class constructor.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.lock = Lock()
+        self.bytesWritten = 0
+        self.writeCount = 0
+        self.isOpen = True
+
+    def write(self, data):
+        """
+        PURPOSE
+
+        Discards the data written to the port.
+
+        INPUT
+
+        - data = the encoded command bytes.
+
+        RETURNS
+
+        - length = number of bytes written.
+        """
+        with self.lock:
+            self.bytesWritten += len(data)
+            self.writeCount += 1
+
+        return len(data)
+
+    def read(self, size = 1):
+        """
+        PURPOSE
+
+        Waits for the read timeout and returns no data.
+
+        INPUT
+
+        - size = number of bytes to read (unused).
+
+        RETURNS
+
+        - data = empty bytes.
+        """
+        sleep(self.timeout if self.timeout != None else 1)
+        return b""
+
+    def readline(self):
+        """
+        PURPOSE
+
+        Waits for the read timeout and returns no data.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - data = empty bytes.
+        """
+        return self.read()
+
+    def getStatistics(self):
+        """
+        PURPOSE
+
+        Returns how much has been written to the sink.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        - writeCount = number of writes.
+        - bytesWritten = total number of bytes written.
+        """
+        with self.lock:
+            return self.writeCount, self.bytesWritten
+
+    def close(self):
+        """
+        PURPOSE
+
+        Closes the sink.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        self.isOpen = False
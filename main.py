@@ -18,6 +18,8 @@ try:
 
     # ADDITIONAL MODULES
     import sys, os
+    import argparse
+    import multiprocessing
     import threading
     #from threading import Thread, Timer
     from datetime import datetime
@@ -39,7 +41,7 @@ except:
              "\n###################################################################################################")
 
 from libraries.animation.slideAnimation import SLIDE_ANIMATION
-from libraries.camera.cameraCapture import CAMERA_CAPTURE
+from libraries.camera.cameraManager import CAMERA_MANAGER
 from libraries.computer_vision.mosaicTask.mosaicPopupWindow import \
     MOSAIC_POPUP_WINDOW
 from libraries.computer_vision.transectLineTask.transectLineAlgorithm_v1 import \
@@ -55,11 +57,16 @@ from libraries.gui.analogCameras import ANALOG_CAMERAS
 from libraries.gui.controllerDisplay import CONTROLLER_DISPLAY
 from libraries.gui.digitalCameras import DIGITAL_CAMERAS
 from libraries.gui.keybindings import KEYBINDINGS
+from libraries.gui.linkMonitor import LINK_MONITOR
 from libraries.gui.profileSelector import PROFILE_SELECTOR
 from libraries.gui.sensors import SENSORS
 from libraries.gui.thrusters import THRUSTERS
 from libraries.gui.timerWidget import TIMER
+from libraries.recording.missionLog import MISSION_LOG, RECORD_SENSORS, RECORD_THRUSTERS, RECORD_CONTROLLER
+from libraries.recording.missionReplay import MISSION_REPLAY, parseSpeed
 from libraries.serial.rovComms import ROV_SERIAL
+from libraries.serial.serialSink import SERIAL_SINK
+from libraries.serial.sensorPoller import SENSOR_POLLER
 from libraries.visual.visualEffects import STYLE
 
 def getResourcePath(relativePath):
@@ -84,7 +91,9 @@ class UI(QMainWindow):
     # DATABASE
     fileName = ""
     cameraFeeds = []
-    cameraThreadList = []
+    cameraManager = None
+    missionLog = None
+    missionReplay = None
     visionTaskStatus = [False] * 4
 
     # INITIAL SETUP
@@ -208,6 +217,9 @@ class UI(QMainWindow):
         # INITIATE SENSORS
         self.sensors = SENSORS(controlLayout = self.sensor_control, configLayout = self.sensor_config)
 
+        # INITIATE SERIAL LINK STATISTICS DISPLAY
+        self.linkMonitor = LINK_MONITOR(configLayout = self.link_monitor_config)
+
     def connectSignals(self):
         """
         PURPOSE
@@ -238,8 +250,10 @@ class UI(QMainWindow):
         # DIGITAL CAMERA CHANGE ADDRESS/LABEL SIGNALS
         self.digitalCameras.cameraEnableSignal.connect(self.toggleCameraFeed)
         self.digitalCameras.cameraResolutionSignal.connect(self.changeCameraResolution)
+        self.digitalCameras.cameraFrameRateSignal.connect(self.changeCameraFrameRate)
         self.digitalCameras.cameraEditSignal.connect(self.updateCameraMenus)
         self.digitalCameras.cameraChangeAddress.connect(self.changeCameraAddress)
+        self.digitalCameras.cameraRecordSignal.connect(self.toggleCameraRecording)
 
         # THRUSTER TEST/SET SPEED SIGNALS
         self.thrusters.thrusterTestSignal.connect(self.control.changeThrusters)
@@ -256,6 +270,18 @@ class UI(QMainWindow):
         # COMMS FAIL SIGNAL
         self.comms.uiSerialFunction.connect(self.control.serialFailEvent)
 
+        # SENSOR READINGS RECEIVED SIGNAL
+        self.comms.sensorReadingsSignal.connect(self.sensors.updateSensorReadings)
+        self.comms.sensorReadingsSignal.connect(lambda readings: self.cameraManager.recordSensorReadings(readings))
+
+        # LOG SENSOR READINGS, THRUSTER COMMANDS AND CONTROLLER INPUTS WHILE A MISSION IS BEING RECORDED
+        self.comms.sensorReadingsSignal.connect(lambda readings: self.logMission(RECORD_SENSORS, readings))
+        self.thrusters.thrusterSpeedsSignal.connect(lambda speeds: self.logMission(RECORD_THRUSTERS, speeds))
+        self.controller.processInputSignal.connect(lambda buttonStates, joystickValues: self.logMission(RECORD_CONTROLLER, (buttonStates, joystickValues)))
+
+        # SERIAL LINK STATISTICS REFRESH SIGNAL
+        self.linkMonitor.getLinkStatistics.connect(lambda: self.linkMonitor.updateDisplay(self.comms.getLinkStatistics()))
+
     ###############################
     ### CONFIGURATION FUNCTIONS ###
     ###############################
@@ -355,7 +381,10 @@ class UI(QMainWindow):
             self.analogCameras.quantity, self.analogCameras.labelList, self.analogCameras.defaultCameras = configFile.readAnalogCamera()
 
             # READ DIGITAL CAMERA SETTINGS
-            self.digitalCameras.quantity, self.digitalCameras.labelList, self.digitalCameras.addressList, self.digitalCameras.defaultCameras, self.digitalCameras.selectedResolutions = configFile.readDigitalCamera()
+            self.digitalCameras.quantity, self.digitalCameras.labelList, self.digitalCameras.addressList, self.digitalCameras.defaultCameras, self.digitalCameras.selectedResolutions, frameRates = configFile.readDigitalCamera()
+            # OLDER CONFIGURATION FILES DO NOT CONTAIN FRAME RATES
+            if len(frameRates) == self.digitalCameras.feedQuantity:
+                self.digitalCameras.selectedFrameRates = frameRates
             
             # READ KEYBINDING SETTINGS
             self.keybindings.bindings = configFile.readKeyBinding()
@@ -397,7 +426,7 @@ class UI(QMainWindow):
         configFile.saveAnalogCamera(self.analogCameras.quantity, self.analogCameras.labelList, self.analogCameras.defaultCameras)
 
         # SAVE DIGITAL CAMERA SETTINGS
-        configFile.saveDigitalCamera(self.digitalCameras.quantity, self.digitalCameras.labelList, self.digitalCameras.addressList, self.digitalCameras.defaultCameras, self.digitalCameras.selectedResolutions)
+        configFile.saveDigitalCamera(self.digitalCameras.quantity, self.digitalCameras.labelList, self.digitalCameras.addressList, self.digitalCameras.defaultCameras, self.digitalCameras.selectedResolutions, self.digitalCameras.selectedFrameRates)
         
         # SAVE KEYBINDING SETTINGS
         configFile.saveKeybinding(self.keybindings.bindings)
@@ -444,7 +473,7 @@ class UI(QMainWindow):
 
         # SAVE DIGITAL CAMERA SETTINGS
         digitalCameras = DIGITAL_CAMERAS()
-        configFile.saveDigitalCamera(digitalCameras.quantity, digitalCameras.labelList, digitalCameras.addressList, digitalCameras.defaultCameras, digitalCameras.selectedResolutions)
+        configFile.saveDigitalCamera(digitalCameras.quantity, digitalCameras.labelList, digitalCameras.addressList, digitalCameras.defaultCameras, digitalCameras.selectedResolutions, digitalCameras.selectedFrameRates)
         
         # SAVE KEYBINDING SETTINGS
         keybindings = KEYBINDINGS()
@@ -639,6 +668,10 @@ class UI(QMainWindow):
         self.config_com_port_list.activated.connect(self.config.changeComPort)
         self.config_find_com_ports.clicked.connect(self.config.refreshComPorts)   
 
+        # SERIAL PROTOCOL MENU
+        self.config_protocol_list.addItems(self.comms.protocolOptions)
+        self.config_protocol_list.activated.connect(self.config.changeProtocol)
+
     def linkToolbarWidgets(self):
         """
         PURPOSE
@@ -672,7 +705,7 @@ class UI(QMainWindow):
         """
         PURPOSE
 
-        Instantiates a camera feed object for each camera and starts the threads.
+        Creates the camera manager, adds a camera feed for each display and starts capturing.
 
         INPUT
 
@@ -684,20 +717,28 @@ class UI(QMainWindow):
         """
         self.cameraFeeds = [self.camera_feed_1, self.camera_feed_2, self.camera_feed_3, self.camera_feed_4]
 
-        # INITIATE CAMERA THREADS
-        feedQuantity = len(self.cameraFeeds)
+        # ONE MANAGER CAPTURES EVERY CAMERA FEED
+        self.cameraManager = CAMERA_MANAGER()
         
-        for i in range(feedQuantity):
-            cameraThread = CAMERA_CAPTURE(identifier = i)
-            
-            # CONNECT SIGNAL TO SLOT
-            cameraThread.cameraNewFrameSignal.connect(self.updateCameraFeed)
+        for cameraFeed in self.cameraFeeds:
+            identifier = self.cameraManager.addFeed()
+            self.cameraManager.setTargetSize(identifier, cameraFeed.size().width(), cameraFeed.size().height())
+
+            # THE FIRST FEED IS THE MAIN DISPLAY, THE OTHERS ARE CAPTURED AT THEIR DISPLAY SIZE
+            self.cameraManager.setPrimary(identifier, identifier == 0)
             
-            # STORE THREAD POINTER FOR LATER USE
-            self.cameraThreadList.append(cameraThread)
+            # SEND FRAMES STRAIGHT TO THE DISPLAY WIDGET, WHICH ONLY KEEPS THE NEWEST FRAME
+            self.cameraManager.subscribe(identifier, cameraFeed.setFrame, Qt.DirectConnection)
+
+            # RECORD HOW LONG EACH STAGE OF THE FEED TAKES
+            cameraFeed.setStatistics(self.cameraManager.getFeed(identifier).statistics)
+            self.cameraManager.getFeed(identifier).cameraStatisticsSignal.connect(self.updateCameraStatistics)
 
-            # START THREAD
-            cameraThread.start()
+        # SHOW THE CONNECTION STATUS OF EACH FEED
+        self.cameraManager.cameraStatusSignal.connect(self.updateCameraStatus)
+
+        # START CAPTURING
+        self.cameraManager.startManager()
 
     @pyqtSlot()
     def updateCameraMenus(self):
@@ -737,11 +778,7 @@ class UI(QMainWindow):
 
         NONE
         """
-        if status:
-            self.cameraThreadList[feed].feedBegin()
-            self.cameraThreadList[feed].start()
-        else:
-            self.cameraThreadList[feed].feedStop()
+        self.cameraManager.enableFeed(feed, status)
 
     @pyqtSlot(int, str)
     def changeCameraAddress(self, camera, address):
@@ -766,15 +803,15 @@ class UI(QMainWindow):
         formattedAddress = self.digitalCameras.addressConverter(address)
 
         # CHECK IF THIS ADDRESS IS ALREADY IN USE
-        for i, cameraThread in enumerate(self.cameraThreadList):
-            address = cameraThread.address
+        for i, cameraFeed in enumerate(self.cameraManager.feeds):
+            address = cameraFeed.address
             if address == formattedAddress and i != camera:
                 # DISCONNECT FROM THAT FEED BEFORE ATTEMPTING TO CONNECT AGAIN
-                # PREVENTS THREADS FIGHTING OVER CAMERA ACCESS
-                cameraThread.changeSource("")
+                # PREVENTS FEEDS FIGHTING OVER CAMERA ACCESS
+                self.cameraManager.changeSource(i, "")
 
         # REINITIALISE CAMERA WITH NEW ADDRESS
-        self.cameraThreadList[camera].changeSource(formattedAddress)
+        self.cameraManager.changeSource(camera, formattedAddress)
  
     @pyqtSlot(int, int, int)
     def changeCameraResolution(self, camera, width, height):
@@ -794,31 +831,199 @@ class UI(QMainWindow):
         NONE
         """
         try:
-            self.cameraThreadList[camera].changeResolution(width, height)
+            self.cameraManager.changeResolution(camera, width, height)
         except:
             pass
 
-    @pyqtSlot(QPixmap, int)
-    def updateCameraFeed(self, frame, identifier):
+    @pyqtSlot(bool)
+    def toggleCameraRecording(self, status):
         """
         PURPOSE
 
-        Refreshes a specific camera feed with a new frame.
+        Starts or stops recording every camera feed to video files.
+
+        INPUT
+
+        - status = True to start recording, False to stop.
+
+        RETURNS
+
+        NONE
+        """
+        if status:
+            directory = self.cameraManager.startRecording()
+            self.missionLog = MISSION_LOG(os.path.join(directory, "mission.log"))
+            self.cameraManager.setMissionLog(self.missionLog)
+            self.printTerminal("Recording mission to {}".format(directory))
+        else:
+            self.cameraManager.stopRecording()
+            if self.missionLog != None:
+                self.missionLog.close()
+                self.missionLog = None
+            self.printTerminal("Mission recording stopped")
+
+    def startReplay(self, missionDirectory, speed = 1, exitWhenFinished = False):
+        """
+        PURPOSE
+
+        Replays a recorded mission through the GUI instead of using the ROV, controller and cameras.
+        The cameras are disconnected and commands sent to the ROV are discarded.
+
+        INPUT
+
+        - missionDirectory = folder of the recording.
+        - speed = playback speed (1 = real time, 0 = as fast as possible).
+        - exitWhenFinished = True to close the program when the replay ends.
+
+        RETURNS
+
+        NONE
+        """
+        # STOP CAPTURING FROM THE CAMERAS AND SEND COMMANDS TO A SINK INSTEAD OF THE ROV
+        self.cameraManager.stopManager()
+        self.comms.serialConnectInterface(SERIAL_SINK())
+
+        self.missionReplay = MISSION_REPLAY(missionDirectory, speed, self.comms, self.controller, self.cameraManager)
+        self.missionReplay.replayFinishedSignal.connect(self.replayFinished)
+        if exitWhenFinished:
+            self.missionReplay.finished.connect(self.app.quit)
+        self.missionReplay.start()
+
+        self.printTerminal("Replaying {} at {}".format(missionDirectory, "{}x speed".format(speed) if speed > 0 else "maximum speed"))
+
+    @pyqtSlot(dict)
+    def replayFinished(self, statistics):
+        """
+        PURPOSE
+
+        Prints how the mission replay performed once it ends.
+
+        INPUT
+
+        - statistics = dictionary returned by MISSION_REPLAY.getStatistics.
+
+        RETURNS
+
+        NONE
+        """
+        self.printTerminal("Replayed {:.1f} s of mission in {:.1f} s ({} frames, {} sensor readings, {} controller inputs)".format(
+                           statistics['missionDuration'], statistics['replayDuration'], statistics['frame'], statistics['sensors'], statistics['controller']))
+
+    def logMission(self, recordType, values):
+        """
+        PURPOSE
+
+        Adds an event to the mission log if a mission is being recorded.
+
+        INPUT
+
+        - recordType = RECORD_SENSORS, RECORD_THRUSTERS or RECORD_CONTROLLER.
+        - values = the sensor readings or thruster speeds, or (buttonStates, joystickValues) for controller inputs.
+
+        RETURNS
+
+        NONE
+        """
+        missionLog = self.missionLog
+        if missionLog == None:
+            return
+
+        if recordType == RECORD_CONTROLLER:
+            missionLog.addController(*values)
+        else:
+            missionLog.addValues(recordType, values)
+
+    @pyqtSlot(int, int)
+    def changeCameraFrameRate(self, camera, frameRate):
+        """
+        PURPOSE
+
+        Calls function in camera capture library to change the camera capture rate.
+
+        INPUT
+
+        - camera = the camera feed being modified (0,1,2,3).
+        - frameRate = target frames per second (0 = as fast as the camera delivers frames).
+
+        RETURNS
+
+        NONE
+        """
+        try:
+            self.cameraManager.setFrameRate(camera, frameRate)
+        except:
+            pass
+
+    @pyqtSlot(int, dict)
+    def updateCameraStatistics(self, identifier, statistics):
+        """
+        PURPOSE
+
+        Shows the latest frame rate and stage timings of a camera feed on its overlay.
 
         INPUT
 
-        - frame = QImage containing the new frame captures from the camera.
         - identifier = the identification number of the camera feed (0, 1, 2 etc.)
+        - statistics = dictionary returned by FEED_STATISTICS.getSnapshot().
 
         RETURNS
 
         NONE
         """
-        # RESIZE PIXMAP
-        pixmap = frame.scaled(self.cameraFeeds[identifier].size().width(), self.cameraFeeds[identifier].size().height(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        
-        # PAINT PIXMAP ONTO LABEL
-        self.cameraFeeds[identifier].setPixmap(pixmap)
+        lines = ["{:.0f} FPS captured / {:.0f} FPS shown".format(statistics['captureRate'], statistics['paintRate']),
+                 "Dropped {} / skipped {}".format(statistics['droppedFrames'], statistics['skippedPaints'])]
+
+        if statistics['analysisErrors'] > 0:
+            lines.append("Analysis errors {}".format(statistics['analysisErrors']))
+
+        # MEDIAN AND WORST TIME OF EACH STAGE
+        for stageName, summary in statistics['stages'].items():
+            if summary['count'] > 0:
+                lines.append("{:<8} {:6.1f} / {:6.1f} ms".format(stageName.capitalize(), summary['p50'], summary['max']))
+
+        self.cameraFeeds[identifier].setOverlayText("\n".join(lines))
+
+    def toggleCameraOverlay(self):
+        """
+        PURPOSE
+
+        Shows or hides the performance overlay on every camera feed.
+
+        INPUT
+
+        NONE
+
+        RETURNS
+
+        NONE
+        """
+        status = not self.cameraFeeds[0].showOverlay
+        for cameraFeed in self.cameraFeeds:
+            cameraFeed.setOverlay(status)
+
+    @pyqtSlot(int, str)
+    def updateCameraStatus(self, identifier, status):
+        """
+        PURPOSE
+
+        Shows the connection status of a camera feed when the mouse is held over it,
+        and reports cameras connecting and dropping out on the serial terminal.
+
+        INPUT
+
+        - identifier = the identification number of the camera feed (0, 1, 2 etc.)
+        - status = 'off', 'connecting', 'live', 'stalled' or 'failed'.
+
+        RETURNS
+
+        NONE
+        """
+        self.cameraFeeds[identifier].setToolTip("Camera {}: {}".format(identifier + 1, status))
+
+        if status == 'live':
+            self.printTerminal("Camera {} connected".format(identifier + 1))
+        elif status == 'stalled':
+            self.printTerminal("Camera {} stopped responding, reconnecting".format(identifier + 1))
 
     def changeCameraFeed(self, event, cameraFeed):
         """
@@ -1082,11 +1287,10 @@ class UI(QMainWindow):
         self.control.mosaicPopup.imageResizeEvent()
 
         # UPDATE SIZE OF EACH CAMERA FEED
-        for camera in self.cameraFeeds:
+        for i, camera in enumerate(self.cameraFeeds):
+            # FRAMES ARE SCALED TO THE NEW SIZE ON THE CAMERA THREAD, AND SECONDARY FEEDS CHANGE CAPTURE RESOLUTION TO SUIT
             try:
-                camSize = [camera.size().width(), camera.size().height()]
-                cameraPixmap = camera.pixmap().scaled(camSize[0], camSize[1], Qt.KeepAspectRatio)
-                camera.setPixmap(cameraPixmap)  
+                self.cameraManager.setTargetSize(i, camera.size().width(), camera.size().height())
             except:
                 pass
 
@@ -1353,12 +1557,16 @@ class UI(QMainWindow):
         switchModes = QShortcut(QKeySequence(Qt.Key_Tab), self)
         switchModes.activated.connect(self.changeView)
 
+        # F3 TO SHOW CAMERA FEED PERFORMANCE
+        cameraOverlay = QShortcut(QKeySequence(Qt.Key_F3), self)
+        cameraOverlay.activated.connect(self.toggleCameraOverlay)
+
     def programExit(self):
         """
         PURPOSE
 
         Called when program exits.
-        Closes the camera threads to prevent them from continually running in the background.#
+        Closes the serial and camera threads to prevent them from continually running in the background.
 
         INPUT
 
@@ -1368,12 +1576,19 @@ class UI(QMainWindow):
 
         NONE
         """
-        # CLOSE CAMERA THREADS
-        self.toggleCameraFeed(False, 0)
-        self.toggleCameraFeed(False, 1)
-        self.toggleCameraFeed(False, 2)
-        # REQUIRED TO LET THREADS CLOSE BEFORE MAIN EVENT LOOP EXITS
-        time.sleep(1)
+        # STOP ANY MISSION REPLAY
+        if self.missionReplay != None:
+            self.missionReplay.stop()
+
+        # CLOSE SERIAL THREAD
+        self.comms.serialDisconnect()
+
+        # STOP CAPTURING AND DISCONNECT FROM ALL CAMERAS
+        self.cameraManager.stopManager()
+
+        # FINISH THE MISSION LOG
+        if self.missionLog != None:
+            self.missionLog.close()
 
 class CONTROL_PANEL():
     """
@@ -1404,6 +1619,12 @@ class CONTROL_PANEL():
         self.controller = Object2
         self.comms = Object3
 
+        # SENSOR POLLING SCHEDULER (HZ)
+        self.sensorPollRate = 10
+        self.sensorPoller = SENSOR_POLLER(self.sensorPollRate)
+        self.sensorPoller.pollSignal.connect(self.comms.getSensors)
+        self.comms.sensorReadingsSignal.connect(self.sensorPoller.replyReceived)
+
     ############################
     ##### SERIAL FUNCTIONS #####
     ############################
@@ -1504,11 +1725,13 @@ class CONTROL_PANEL():
         self.ui.config_rov_connect.setText('CONNECT')
         self.ui.config_rov_connect.setChecked(False)
         
+        # STOP REQUESTING SENSOR VALUES
+        self.sensorPoller.stop()
+
         # CLOSE COM PORT
         if self.comms.commsStatus:
             self.ui.printTerminal("Disconnected from {}".format(self.ui.comms.rovComPort))
-            self.comms.comms.close()
-            self.comms.commsStatus = False
+            self.comms.serialDisconnect()
 
     def serialFailEvent(self, message):
         """
@@ -1819,14 +2042,22 @@ class CONTROL_PANEL():
         # ARM THE THRUSTER ESCs
         self.comms.armThrusters()
 
-        # START POLLING SENSORS VALUES
-        self.getSensorReadings()
+        # ASK ROV TO PUSH SENSOR READINGS IF A STREAM RATE IS SET
+        streamRate = self.ui.config_sensor_stream_rate.value()
+        if streamRate > 0:
+            self.comms.startSensorStream(streamRate)
+            self.ui.printTerminal("Streaming sensor readings at {} Hz.".format(streamRate))
+
+        # OTHERWISE START POLLING SENSORS VALUES
+        else:
+            self.getSensorReadings()
 
     def getSensorReadings(self):
         """
         PURPOSE
 
-        Requests sensor readings from ROV and updates GUI.
+        Starts requesting sensor readings from the ROV at the sensor polling rate.
+        The GUI is updated by the sensorReadingsSignal when each reply arrives.
 
         INPUT
 
@@ -1836,25 +2067,9 @@ class CONTROL_PANEL():
 
         NONE
         """
-        # SENSOR POLLING RATE (HZ)
-        refreshRate = 10
-
-        # START QTIMER TO REPEATEDLY UPDATE SENSORS AT THE DESIRED POLLING RATE 
-        self.timer = QTimer()
-        self.timer.setTimerType(Qt.PreciseTimer)
-        self.timer.timeout.connect(self.getSensorReadings)
-        self.timer.start(int(1000*1/refreshRate))
-        
-        # STOP REQUESTING SENSOR VALUES IF ROV IS DISCONNECTED
-        if self.comms.commsStatus == False:
-            self.timer.stop()
-        
-        else:
-            # REQEST SINGLE READING
-            sensorReadings = self.comms.getSensors()
-
-            # UPDATE GUI
-            self.ui.sensors.updateSensorReadings(sensorReadings)
+        # ONLY POLL WHILST CONNECTED TO THE ROV
+        if self.comms.commsStatus:
+            self.sensorPoller.start(self.sensorPollRate)
 
     ###############################
     #### COMPUTER VISION TASKS ####
@@ -1880,7 +2095,7 @@ class CONTROL_PANEL():
         self.mosaicPopup = MOSAIC_POPUP_WINDOW(self.ui.group_box_mosaic_task)
         
         # TRANSECT LINE TASK
-        self.transectLinePopup = TRANSECT_LINE_POPUP_WINDOW(self.ui.group_box_transect_task, self.ui.cameraThreadList[0])
+        self.transectLinePopup = TRANSECT_LINE_POPUP_WINDOW(self.ui.group_box_transect_task, self.ui.cameraManager.getFeed(0))
 
     def changeVisionButtons(self, index, status):
         """
@@ -2070,6 +2285,28 @@ class CONFIG():
 
         self.comms.rovComPort = comPorts[index]
 
+    def changeProtocol(self, index):
+        """
+        PURPOSE
+
+        Allows user to select the protocol (ASCII or Binary) to use for the next ROV connection.
+
+        INPUT
+
+        - index = the menu index selected.
+
+        RETURNS
+
+        NONE
+        """
+        protocolName = self.comms.protocolOptions[index]
+        self.comms.setProtocol(protocolName)
+
+        if self.comms.commsStatus:
+            self.ui.printTerminal("{} protocol selected, it will be used from the next connection.".format(protocolName))
+        else:
+            self.ui.printTerminal("{} protocol selected.".format(protocolName))
+
     def refreshComPorts(self):
         """
         PURPOSE
@@ -2331,6 +2568,13 @@ def guiInitiate():
     # CREATE QAPPLICATION INSTANCE (PASS SYS.ARGV TO ALLOW COMMAND LINE ARGUMENTS)
     app = QApplication(sys.argv)
 
+    # OPTIONAL MISSION REPLAY (EXAMPLE: python main.py --replay recordings/mission_20240101_120000 --speed max)
+    parser = argparse.ArgumentParser(description = "Avalon ROV Control Interface")
+    parser.add_argument('--replay', default = None, help = "folder of a recorded mission to replay instead of using the ROV")
+    parser.add_argument('--speed', type = parseSpeed, default = 1, help = "replay speed (1 = real time, 'max' = as fast as possible)")
+    parser.add_argument('--exit', action = 'store_true', help = "close the program when the replay ends")
+    args, _ = parser.parse_known_args(app.arguments()[1:])
+
     # PROGRAM BOOT SPLASH SCREEN
     splash_pix = QPixmap('graphics/splash_screen.png')
     splash = QSplashScreen(splash_pix, Qt.WindowStaysOnTopHint)
@@ -2347,9 +2591,14 @@ def guiInitiate():
     program.setWindowTitle("Avalon ROV Control Interface")
     
     splash.finish(program)
+
+    if args.replay != None:
+        program.startReplay(args.replay, args.speed, args.exit)
     
     # START EVENT LOOP
     app.exec_()
 
 if __name__ == '__main__':
+    # ALLOWS VISION PROCESSES TO START WHEN THE PROGRAM IS PACKAGED AS AN EXECUTABLE
+    multiprocessing.freeze_support()
     guiInitiate()
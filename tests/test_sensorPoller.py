@@ -0,0 +1,182 @@
+import heapq
+import random
+import unittest
+
+from PyQt5.QtCore import pyqtSignal, QObject, QCoreApplication
+
+from libraries.serial.sensorPoller import SENSOR_POLLER
+
+class SIMULATED_LOOP():
+    """
+    PURPOSE
+
+    Event queue and clock standing in for the Qt event loop, so hours of polling can be run in a fraction of a second.
+    Time is kept in whole milliseconds, like QTimer intervals, so long runs do not drift.
+    """
+    def __init__(self):
+        self.currentTime = 0
+        self.events = []
+        self.eventCount = 0
+
+    def clock(self):
+        return self.currentTime / 1000
+
+    def schedule(self, delay, callback):
+        self.eventCount += 1
+        heapq.heappush(self.events, (self.currentTime + round(1000 * delay), self.eventCount, callback))
+
+    def run(self, duration):
+        endTime = self.currentTime + round(1000 * duration)
+        while len(self.events) > 0 and self.events[0][0] <= endTime:
+            self.currentTime, _, callback = heapq.heappop(self.events)
+            callback()
+        self.currentTime = endTime
+
+class SIMULATED_TIMER(QObject):
+    """
+    PURPOSE
+
+    Stands in for QTimer on a SIMULATED_LOOP. Like QTimer, changing the interval of an active timer restarts it.
+    """
+    timeout = pyqtSignal()
+
+    # SET BY THE TEST BEFORE THE POLLER IS CREATED
+    loop = None
+    instances = 0
+
+    def __init__(self):
+        QObject.__init__(self)
+        SIMULATED_TIMER.instances += 1
+        self.interval = 0
+        self.active = False
+        self.generation = 0
+        self.startCount = 0
+
+    def setTimerType(self, timerType):
+        pass
+
+    def start(self, interval = None):
+        if interval != None:
+            self.interval = interval
+        self.active = True
+        self.startCount += 1
+        self.schedule()
+
+    def stop(self):
+        self.active = False
+        self.generation += 1
+
+    def setInterval(self, interval):
+        self.interval = interval
+        if self.active:
+            self.schedule()
+
+    def isActive(self):
+        return self.active
+
+    def schedule(self):
+        # EVENTS FROM BEFORE A RESTART ARE IGNORED
+        self.generation += 1
+        generation = self.generation
+        self.loop.schedule(self.interval / 1000, lambda: self.fire(generation))
+
+    def fire(self, generation):
+        if not self.active or generation != self.generation:
+            return
+        self.loop.schedule(self.interval / 1000, lambda: self.fire(generation))
+        self.timeout.emit()
+
+class TEST_SENSOR_POLLER(unittest.TestCase):
+    """
+    PURPOSE
+
+    Runs SENSOR_POLLER against a simulated ROV for long periods of simulated time.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.loop = SIMULATED_LOOP()
+        SIMULATED_TIMER.loop = self.loop
+        SIMULATED_TIMER.instances = 0
+
+        # THE ROV REPLIES AFTER replyDelay SECONDS, AND A FRACTION replyLoss OF REPLIES ARE LOST
+        self.replyDelay = 0.01
+        self.replyLoss = 0
+        self.random = random.Random(0)
+        self.pollCount = 0
+
+        self.poller = SENSOR_POLLER(10, self.loop.clock, SIMULATED_TIMER)
+        self.poller.pollSignal.connect(self.requestSensors)
+
+    def requestSensors(self):
+        self.pollCount += 1
+        if self.random.random() >= self.replyLoss:
+            self.loop.schedule(self.replyDelay, self.poller.replyReceived)
+
+    def testSteadyTickCount(self):
+        self.poller.start()
+        self.loop.run(3600)
+
+        # ONE REQUEST EVERY 100 MS FOR AN HOUR
+        self.assertEqual(self.pollCount, 36000)
+        self.assertEqual(self.poller.currentRate, 10)
+        self.assertEqual(SIMULATED_TIMER.instances, 1)
+        self.assertEqual(self.poller.timer.startCount, 1)
+
+    def testBackoffAndRecovery(self):
+        self.poller.start()
+
+        # A SLOW ROV MAKES THE POLLER BACK OFF
+        self.replyDelay = 0.3
+        self.loop.run(600)
+        self.assertLess(self.poller.currentRate, 10)
+        self.assertLessEqual(self.pollCount, 600 / self.replyDelay)
+
+        # ONCE THE ROV IS FAST AGAIN THE POLLER RECOVERS TO THE REQUESTED RATE
+        self.replyDelay = 0.01
+        self.loop.run(600)
+        self.assertEqual(self.poller.currentRate, 10)
+
+        # AND THEN POLLS STEADILY AT THAT RATE
+        self.pollCount = 0
+        self.loop.run(3600)
+        self.assertAlmostEqual(self.pollCount, 36000, delta = 1)
+
+        # RATE CHANGES ONLY ADJUST THE ONE TIMER
+        self.assertEqual(SIMULATED_TIMER.instances, 1)
+        self.assertEqual(self.poller.timer.startCount, 1)
+        # ONLY THE TIMER AND AT MOST ONE OUTSTANDING REPLY ARE QUEUED
+        self.assertLessEqual(len(self.loop.events), 2)
+
+    def testLostReplies(self):
+        self.poller.start(50)
+        self.replyDelay = 0.005
+
+        # EACH LOST REPLY ONLY BACKS OFF ONCE, SO OCCASIONAL LOSS BARELY AFFECTS THE RATE
+        for replyLoss in [0.001, 0.01]:
+            self.replyLoss = replyLoss
+            self.pollCount = 0
+            self.loop.run(3600)
+            self.assertGreater(self.pollCount, 0.95 * 50 * 3600)
+
+        # THE POLLER IS STILL RUNNING AT THE REQUESTED RATE AFTERWARDS
+        self.replyLoss = 0
+        self.loop.run(60)
+        self.assertEqual(self.poller.currentRate, 50)
+
+    def testStopAndRestart(self):
+        self.poller.start()
+        self.loop.run(60)
+        self.poller.stop()
+        self.loop.run(60)
+        self.assertEqual(self.pollCount, 600)
+
+        self.poller.start()
+        self.loop.run(60)
+        self.assertEqual(self.pollCount, 1200)
+        self.assertEqual(SIMULATED_TIMER.instances, 1)
+
+if __name__ == '__main__':
+    unittest.main()